@@ -0,0 +1,6 @@
+"""
+Pruebas de rendimiento del compilador SimpleDoc
+
+Cada módulo se ejecuta desde la raíz del repositorio, por ejemplo:
+    python -m benchmarks.memoria_tokens
+"""
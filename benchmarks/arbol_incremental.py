@@ -0,0 +1,61 @@
+"""
+Recompilación incremental de un árbol grande de documentos
+
+Genera un árbol de ``--archivos`` documentos, lo compila completo con
+manifiesto y mide la recompilación incremental sin cambios y tras modificar
+un único archivo. Uso:
+
+    python -m benchmarks.arbol_incremental --archivos 20000 --jobs 4
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.corpus import generar_documento
+from simpledoc.lote import Manifiesto, expandir_entradas, compilar_lote_incremental
+
+
+def generar_arbol(raiz, archivos, por_directorio=200):
+    """Escribe ``archivos`` documentos pequeños repartidos en subdirectorios"""
+    documento = generar_documento(2048)
+    for i in range(archivos):
+        directorio = os.path.join(raiz, f"seccion{i // por_directorio:04d}")
+        os.makedirs(directorio, exist_ok=True)
+        with open(os.path.join(directorio, f"pagina{i:06d}.sd"), 'w', encoding='utf-8') as f:
+            f.write(f"# Página {i}\n\n{documento}")
+
+
+def construir(fuentes, salida, jobs):
+    """Compila el árbol en modo incremental y devuelve el resultado y el tiempo total"""
+    inicio = time.perf_counter()
+    trabajos = expandir_entradas([fuentes], recursivo=True, directorio_salida=salida)
+    resultado = compilar_lote_incremental(trabajos, Manifiesto.ruta_por_defecto(salida), jobs=jobs)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(description='Recompilación incremental de un árbol de documentos')
+    parser.add_argument('--archivos', type=int, default=20000, help='Número de documentos')
+    parser.add_argument('--jobs', type=int, default=0, help='Procesos de la compilación completa')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as raiz:
+        fuentes = os.path.join(raiz, "docs")
+        salida = os.path.join(raiz, "build")
+        generar_arbol(fuentes, args.archivos)
+        
+        casos = [("Compilación completa", None), ("Sin cambios", None), ("Un archivo modificado", True)]
+        for nombre, modificar in casos:
+            if modificar:
+                with open(os.path.join(fuentes, "seccion0000", "pagina000000.sd"), 'a', encoding='utf-8') as f:
+                    f.write("\nLínea añadida.")
+            resultado, segundos = construir(fuentes, salida, args.jobs)
+            print(f"{nombre:<24} {segundos:8.3f} s  ({resultado.compilados} compilados, "
+                  f"{resultado.omitidos} sin cambios)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Tiempo de arranque de la línea de comandos
+
+Ejecuta ``main.py --help`` y la compilación de un documento de una línea en
+procesos nuevos con ``python -X importtime`` y mide el tiempo total de
+importación, el tiempo de pared y los módulos más costosos. Con ``--json``
+guarda los resultados para que CI pueda seguir su evolución, y con
+``--max-ms`` termina con error si algún caso importa durante más tiempo:
+
+    python -m benchmarks.arranque --repeticiones 10 --json arranque.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(RAIZ, "main.py")
+
+
+def analizar_importtime(salida):
+    """
+    Extrae los tiempos de ``-X importtime`` de la salida de error
+    
+    Returns:
+        Tupla (microsegundos totales de importación, {módulo: acumulado})
+    """
+    total = 0
+    acumulados = {}
+    
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:") or "[us]" in linea:
+            continue
+        _, propio, acumulado, nombre = [parte.strip() for parte in linea.replace("import time:", "|", 1).split("|")]
+        acumulados[nombre] = int(acumulado)
+        # Solo las importaciones de primer nivel, para no contar dos veces
+        if not linea.rsplit("|", 1)[1].startswith("  "):
+            total += int(acumulado)
+    
+    return total, acumulados
+
+
+def medir(argumentos, repeticiones, directorio):
+    """Ejecuta un caso varias veces y devuelve sus medianas y los módulos más costosos"""
+    importaciones = []
+    paredes = []
+    acumulados = {}
+    
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        proceso = subprocess.run([sys.executable, "-X", "importtime", MAIN] + argumentos,
+                                 cwd=directorio, capture_output=True, text=True)
+        paredes.append(time.perf_counter() - inicio)
+        total, acumulados = analizar_importtime(proceso.stderr)
+        importaciones.append(total)
+    
+    principales = sorted(acumulados.items(), key=lambda par: par[1], reverse=True)[:10]
+    return {
+        'importacion_ms': statistics.median(importaciones) / 1000,
+        'pared_ms': statistics.median(paredes) * 1000,
+        'modulos': [{'modulo': nombre.strip(), 'acumulado_ms': us / 1000} for nombre, us in principales],
+        'flask_cargado': any(nombre.strip() == "flask" for nombre in acumulados),
+    }
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(description='Tiempo de arranque de main.py')
+    parser.add_argument('--repeticiones', type=int, default=5, help='Ejecuciones por caso')
+    parser.add_argument('--json', metavar='ARCHIVO', help='Guardar los resultados en JSON')
+    parser.add_argument('--max-ms', type=float, help='Tiempo de importación máximo admitido por caso')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directorio:
+        with open(os.path.join(directorio, "linea.sd"), 'w', encoding='utf-8') as f:
+            f.write("# Documento de una línea\n")
+        
+        casos = {
+            "main.py --help": ["--help"],
+            "main.py linea.sd": ["linea.sd"],
+        }
+        resultados = {nombre: medir(argumentos, args.repeticiones, directorio)
+                      for nombre, argumentos in casos.items()}
+    
+    for nombre, resultado in resultados.items():
+        print(f"{nombre:<20} importación {resultado['importacion_ms']:7.1f} ms  "
+              f"pared {resultado['pared_ms']:7.1f} ms  Flask: {'sí' if resultado['flask_cargado'] else 'no'}")
+        for modulo in resultado['modulos'][:5]:
+            print(f"    {modulo['modulo']:<32} {modulo['acumulado_ms']:7.1f} ms")
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+    
+    if args.max_ms is not None:
+        lentos = [nombre for nombre, r in resultados.items() if r['importacion_ms'] > args.max_ms]
+        if lentos:
+            print(f"Superan {args.max_ms} ms: {', '.join(lentos)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Peticiones por segundo de /compilar con varios hilos
+
+Lanza la aplicación web con gunicorn (un proceso, ``--hilos`` hilos) y la
+somete a carga desde ``--clientes`` hilos cliente. Cada petición envía un
+documento distinto para que la caché de compilaciones no oculte el coste de
+compilar. Con ``--comparar-con REF`` se mide también la aplicación tal como
+estaba en esa referencia de git (en un worktree temporal), por ejemplo para
+comparar con la versión que construía un compilador por petición:
+
+    python -m benchmarks.carga_web --comparar-con HEAD~1 --hilos 8
+
+Con ``--directo`` no se levanta ningún servidor: se compara en el propio
+proceso construir un Compiler por petición frente a reutilizar los del
+RegistroCompiladores, con el mismo número de hilos.
+"""
+
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.corpus import generar_documento
+from simpledoc.compiler import Compiler, RegistroCompiladores
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def documentos(base, total):
+    """Genera ``total`` variantes distintas de un documento base"""
+    for i in range(total):
+        yield f"{base}\n\nPetición {i}"
+
+
+def puerto_libre():
+    """Devuelve un puerto TCP libre en localhost"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def esperar_servidor(url, proceso, timeout=30):
+    """Espera a que el servidor responda o termine con error"""
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError("gunicorn terminó antes de aceptar conexiones")
+        try:
+            urllib.request.urlopen(url, timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"El servidor no respondió en {timeout} s")
+
+
+def cargar(url, textos, clientes, nivel):
+    """
+    Envía todas las peticiones desde varios hilos cliente
+    
+    Returns:
+        Tupla (peticiones por segundo, latencias en segundos)
+    """
+    def peticion(codigo):
+        datos = urllib.parse.urlencode({'codigo': codigo, 'nivel_complejidad': nivel}).encode()
+        inicio = time.perf_counter()
+        with urllib.request.urlopen(url + "/compilar", datos) as respuesta:
+            respuesta.read()
+        return time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clientes) as pool:
+        latencias = list(pool.map(peticion, textos))
+    return len(latencias) / (time.perf_counter() - inicio), latencias
+
+
+def medir_gunicorn(directorio, args, textos):
+    """Levanta gunicorn sobre ``directorio`` y mide la carga"""
+    puerto = puerto_libre()
+    url = f"http://127.0.0.1:{puerto}"
+    proceso = subprocess.Popen(
+        [shutil.which("gunicorn") or "gunicorn", "--chdir", directorio,
+         "-w", "1", "--threads", str(args.hilos), "-b", f"127.0.0.1:{puerto}",
+         "web_interface:app"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        esperar_servidor(url + "/", proceso)
+        # Calentamiento: crear los compiladores y cargar las plantillas
+        cargar(url, textos[:args.clientes], args.clientes, args.nivel)
+        return cargar(url, textos, args.clientes, args.nivel)
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+
+def medir_directo(textos, hilos, nivel, compartido):
+    """Compila los textos en hilos, reutilizando o no el compilador"""
+    registro = RegistroCompiladores()
+    
+    def compilar(codigo):
+        inicio = time.perf_counter()
+        compiler = registro.obtener(nivel) if compartido else Compiler(nivel)
+        compiler.compilar(codigo)
+        return time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        latencias = list(pool.map(compilar, textos))
+    return len(latencias) / (time.perf_counter() - inicio), latencias
+
+
+def imprimir(nombre, resultado):
+    """Imprime una fila de la tabla de resultados"""
+    por_segundo, latencias = resultado
+    latencias = sorted(latencias)
+    p95 = latencias[int(len(latencias) * 0.95) - 1]
+    print(f"{nombre:<28} {por_segundo:>10.1f} pet/s  "
+          f"p50 {statistics.median(latencias) * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms")
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(description='Carga concurrente sobre /compilar')
+    parser.add_argument('--peticiones', type=int, default=2000, help='Número de peticiones')
+    parser.add_argument('--clientes', type=int, default=16, help='Hilos cliente')
+    parser.add_argument('--hilos', type=int, default=8, help='Hilos de gunicorn (o del pool con --directo)')
+    parser.add_argument('--tamano', type=int, default=4, help='Tamaño de cada documento en KB')
+    parser.add_argument('--nivel', type=int, default=3, help='Nivel de complejidad')
+    parser.add_argument('--comparar-con', metavar='REF', help='Referencia de git con la que comparar')
+    parser.add_argument('--directo', action='store_true', help='Medir en el proceso, sin servidor web')
+    args = parser.parse_args()
+    
+    base = generar_documento(args.tamano * 1024)
+    textos = list(documentos(base, args.peticiones))
+    print(f"{args.peticiones} peticiones de {args.tamano} KB, {args.hilos} hilos")
+    
+    if args.directo:
+        imprimir("Compiler por petición", medir_directo(textos, args.hilos, args.nivel, False))
+        imprimir("RegistroCompiladores", medir_directo(textos, args.hilos, args.nivel, True))
+        return
+    
+    if shutil.which("gunicorn") is None:
+        sys.exit("gunicorn no está instalado (pip install gunicorn)")
+    
+    imprimir("actual", medir_gunicorn(RAIZ, args, textos))
+    
+    if args.comparar_con:
+        worktree = tempfile.mkdtemp(prefix="simpledoc-")
+        subprocess.run(["git", "-C", RAIZ, "worktree", "add", "--detach", worktree, args.comparar_con],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            imprimir(args.comparar_con, medir_gunicorn(worktree, args, textos))
+        finally:
+            subprocess.run(["git", "-C", RAIZ, "worktree", "remove", "--force", worktree], check=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Detección de regresiones de rendimiento respecto a una línea base
+
+Carga unos resultados de benchmarks.etapas guardados en JSON, vuelve a
+medir las mismas etapas con los mismos documentos (tamaños, niveles, mezcla
+y semilla) y termina con código 1 si alguna etapa es más lenta que en la
+línea base más allá de la tolerancia. Para no confundir el ruido con una
+regresión, la diferencia de medianas también debe superar varias veces la
+dispersión de ambas mediciones, estimada con la MAD. Los tiempos actuales
+se corrigen con el trabajo de calibración medido junto a cada etapa, de modo
+que una máquina más lenta o más cargada que durante la línea base no se
+confunda con una regresión del compilador. Las etapas que parecen haber
+empeorado se vuelven a medir antes de darlas por regresiones. Uso:
+
+    python -m benchmarks.comparar benchmarks/referencia.json
+    python -m benchmarks.comparar benchmarks/referencia.json --actualizar
+
+La línea base solo es significativa en la máquina donde se midió; con
+``--actualizar`` se vuelve a medir y se sobrescribe.
+"""
+
+import argparse
+import json
+import math
+import sys
+
+from benchmarks.etapas import FORMATO, medir
+
+
+# Factor que convierte la MAD en una estimación de la desviación típica
+FACTOR_MAD = 1.4826
+
+# Criterio por defecto, el mismo desde Python y desde la línea de comandos: aumento
+# relativo de la mediana que se tolera (en una máquina dedicada puede bajarse a 0.1)
+# y desviaciones típicas que debe superar la diferencia
+TOLERANCIA = 0.25
+UMBRAL_RUIDO = 3.0
+
+
+def comparar(base, actual, tolerancia=TOLERANCIA, umbral_ruido=UMBRAL_RUIDO):
+    """
+    Compara las medianas de cada etapa con las de la línea base
+    
+    Una medición es una regresión si su mediana supera la de la línea base en
+    más de ``tolerancia`` (en proporción) y la diferencia es mayor que
+    ``umbral_ruido`` desviaciones típicas combinadas de ambas mediciones.
+    Antes de comparar, los tiempos actuales se escalan por la razón entre la
+    calibración de la línea base y la actual.
+    
+    Args:
+        base: Resultados de la línea base (formato de benchmarks.etapas)
+        actual: Resultados de la medición actual
+        tolerancia: Aumento relativo de la mediana que se tolera
+        umbral_ruido: Número de desviaciones típicas que debe superar la diferencia
+    
+    Returns:
+        Lista de diccionarios, uno por medición común, con la clave
+        ``regresion`` indicando si se considera una regresión
+    """
+    anteriores = {(m['tamano'], m['nivel'], m['etapa']): m for m in base['mediciones']}
+    comparaciones = []
+    
+    for medicion in actual['mediciones']:
+        anterior = anteriores.get((medicion['tamano'], medicion['nivel'], medicion['etapa']))
+        if anterior is None:
+            continue
+        
+        escala = anterior['calibracion_ms'] / medicion['calibracion_ms']
+        mediana = medicion['mediana_ms'] * escala
+        
+        diferencia = mediana - anterior['mediana_ms']
+        ruido = FACTOR_MAD * math.hypot(medicion['mad_ms'] * escala, anterior['mad_ms'])
+        cambio = diferencia / anterior['mediana_ms'] if anterior['mediana_ms'] else 0.0
+        
+        comparaciones.append({
+            'tamano': medicion['tamano'],
+            'nivel': medicion['nivel'],
+            'etapa': medicion['etapa'],
+            'base_ms': anterior['mediana_ms'],
+            'actual_ms': mediana,
+            'cambio': cambio,
+            'ruido_ms': ruido,
+            'regresion': cambio > tolerancia and diferencia > umbral_ruido * ruido,
+        })
+    
+    return comparaciones
+
+
+def confirmar(base, comparaciones, repeticiones, calentamiento, tolerancia=TOLERANCIA,
+              umbral_ruido=UMBRAL_RUIDO):
+    """
+    Vuelve a medir los grupos de etapas con regresiones y las descarta si no se repiten
+    
+    Args:
+        base: Resultados de la línea base
+        comparaciones: Resultado de comparar
+        repeticiones, calentamiento: Parámetros de la nueva medición
+        tolerancia, umbral_ruido: Criterio de comparar
+    
+    Returns:
+        Las comparaciones, con las regresiones que no se repiten sustituidas
+        por las de la nueva medición
+    """
+    grupos = list(dict.fromkeys((c['tamano'], c['nivel']) for c in comparaciones if c['regresion']))
+    nuevas = {}
+    for tamano, nivel in grupos:
+        medicion = medir([tamano], [nivel], base['mezcla'], base['semilla'], repeticiones, calentamiento)
+        for c in comparar(base, medicion, tolerancia, umbral_ruido):
+            nuevas[(c['tamano'], c['nivel'], c['etapa'])] = c
+    
+    return [nuevas.get((c['tamano'], c['nivel'], c['etapa']), c) if c['regresion'] else c
+            for c in comparaciones]
+
+
+def imprimir(comparaciones):
+    """Imprime una tabla con el cambio de cada medición respecto a la línea base"""
+    print(f"{'tamaño':>10} {'nivel':>5} {'etapa':<10} {'base (ms)':>10} {'corregido (ms)':>14} "
+          f"{'cambio':>8} {'ruido (ms)':>11}")
+    for c in comparaciones:
+        marca = "  REGRESIÓN" if c['regresion'] else ""
+        print(f"{c['tamano']:>10} {c['nivel']:>5} {c['etapa']:<10} {c['base_ms']:>10.2f} {c['actual_ms']:>14.2f} "
+              f"{c['cambio']:>+8.1%} {c['ruido_ms']:>11.2f}{marca}")
+
+
+def main():
+    """Función principal del comparador"""
+    parser = argparse.ArgumentParser(description='Compara el rendimiento de cada etapa con una línea base')
+    parser.add_argument('base', help='Resultados JSON de benchmarks.etapas que sirven de línea base')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help=f'Aumento relativo de la mediana que se tolera (por defecto {TOLERANCIA}; en una '
+                             'máquina dedicada puede bajarse a 0.1)')
+    parser.add_argument('--umbral-ruido', type=float, default=UMBRAL_RUIDO,
+                        help='Desviaciones típicas (estimadas con la MAD) que debe superar la diferencia')
+    parser.add_argument('--repeticiones', type=int, help='Repeticiones por etapa (por defecto, las de la base)')
+    parser.add_argument('--calentamiento', type=int, help='Ejecuciones previas no medidas (por defecto, las de la base)')
+    parser.add_argument('--confirmaciones', type=int, default=2,
+                        help='Veces que se vuelven a medir las etapas que empeoran antes de darlas por regresiones')
+    parser.add_argument('--json', metavar='ARCHIVO', help='Guardar la medición actual en JSON')
+    parser.add_argument('--actualizar', action='store_true',
+                        help='Sobrescribir la línea base con la medición actual en lugar de comparar')
+    args = parser.parse_args()
+    
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    
+    if base.get('formato') != FORMATO:
+        print(f"Formato de línea base no admitido: {base.get('formato')}", file=sys.stderr)
+        return 2
+    
+    tamanos = list(dict.fromkeys(m['tamano'] for m in base['mediciones']))
+    niveles = list(dict.fromkeys(m['nivel'] for m in base['mediciones']))
+    repeticiones = args.repeticiones or base['repeticiones']
+    calentamiento = base['calentamiento'] if args.calentamiento is None else args.calentamiento
+    actual = medir(tamanos, niveles, base['mezcla'], base['semilla'], repeticiones, calentamiento)
+    
+    for ruta in filter(None, [args.json, args.base if args.actualizar else None]):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(actual, f, indent=2)
+            f.write("\n")
+    if args.actualizar:
+        print(f"Línea base actualizada: {args.base}")
+        return 0
+    
+    comparaciones = comparar(base, actual, args.tolerancia, args.umbral_ruido)
+    for _ in range(args.confirmaciones):
+        comparaciones = confirmar(base, comparaciones, repeticiones, calentamiento, args.tolerancia,
+                                  args.umbral_ruido)
+    print(f"Línea base {base.get('commit')} frente a {actual.get('commit')}")
+    imprimir(comparaciones)
+    
+    regresiones = [c for c in comparaciones if c['regresion']]
+    if regresiones:
+        print(f"{len(regresiones)} regresiones de rendimiento", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Generación de documentos SimpleDoc sintéticos para las pruebas de rendimiento
+
+Los documentos son reproducibles: la misma semilla y la misma mezcla
+producen siempre el mismo texto. También puede usarse desde la línea de
+comandos para escribir un documento grande en disco sin mantenerlo en
+memoria:
+
+    python -m benchmarks.corpus --tamano 1G --mezcla formato --salida doc.sd
+"""
+
+import argparse
+import random
+import re
+
+
+PALABRAS = (
+    "compilador documento lenguaje marcado simple texto párrafo lista "
+    "enlace imagen código título análisis léxico sintáctico validación "
+    "generación árbol nodo token línea columna nivel complejidad"
+).split()
+
+# Tamaño de cada trozo al escribir documentos en disco
+TAMANO_TROZO = 1024 * 1024
+
+_UNIDADES = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+class Mezcla:
+    """
+    Proporción de cada construcción en los documentos generados
+    
+    Las probabilidades de bloque se aplican a cada bloque del documento y
+    el resto son párrafos; las de formato se aplican a cada parte de una
+    línea de párrafo y el resto es texto sin formato. Los valores por
+    defecto reproducen los documentos de las versiones anteriores.
+    """
+    
+    __slots__ = ('titulos', 'listas', 'listas_numeradas', 'codigo', 'negrita', 'cursiva', 'enlaces',
+                 'imagenes', 'partes_por_linea', 'palabras_por_parte', 'lineas_por_bloque')
+    
+    def __init__(self, titulos=0.1, listas=0.15, listas_numeradas=0.1, codigo=0.05, negrita=0.15,
+                 cursiva=0.15, enlaces=0.08, imagenes=0.04, partes_por_linea=(3, 8),
+                 palabras_por_parte=(4, 12), lineas_por_bloque=(1, 4)):
+        """
+        Args:
+            titulos, listas, listas_numeradas, codigo: Probabilidad de cada tipo de bloque
+            negrita, cursiva, enlaces, imagenes: Probabilidad de cada formato en una parte de línea
+            partes_por_linea: Intervalo del número de partes de una línea de párrafo,
+                que determina la longitud de las líneas
+            palabras_por_parte: Intervalo de palabras de una parte sin formato
+            lineas_por_bloque: Intervalo de líneas de un párrafo
+        """
+        if titulos + listas + listas_numeradas + codigo > 1 or negrita + cursiva + enlaces + imagenes > 1:
+            raise ValueError("Las probabilidades de una mezcla no pueden sumar más de 1")
+        
+        self.titulos = titulos
+        self.listas = listas
+        self.listas_numeradas = listas_numeradas
+        self.codigo = codigo
+        self.negrita = negrita
+        self.cursiva = cursiva
+        self.enlaces = enlaces
+        self.imagenes = imagenes
+        self.partes_por_linea = partes_por_linea
+        self.palabras_por_parte = palabras_por_parte
+        self.lineas_por_bloque = lineas_por_bloque
+    
+    def a_diccionario(self):
+        """Devuelve la mezcla como diccionario serializable a JSON"""
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+
+# Mezclas predefinidas, por nombre
+MEZCLAS = {
+    'equilibrada': Mezcla(),
+    'texto': Mezcla(titulos=0.05, listas=0, listas_numeradas=0, codigo=0, negrita=0, cursiva=0,
+                    enlaces=0, imagenes=0),
+    'formato': Mezcla(negrita=0.35, cursiva=0.35, enlaces=0.1, imagenes=0.05),
+    'listas': Mezcla(titulos=0.05, listas=0.5, listas_numeradas=0.4, codigo=0),
+    'enlaces': Mezcla(negrita=0.05, cursiva=0.05, enlaces=0.4, imagenes=0.3),
+    'codigo': Mezcla(codigo=0.5),
+    'lineas_largas': Mezcla(partes_por_linea=(40, 80), lineas_por_bloque=(1, 2)),
+}
+
+
+def interpretar_tamano(texto):
+    """
+    Convierte un tamaño como ``512``, ``64K``, ``10M`` o ``1G`` en bytes
+    
+    Raises:
+        ValueError: Si el texto no es un tamaño válido
+    """
+    coincidencia = re.fullmatch(r'(\d+(?:\.\d+)?)\s*([KMG]?)B?', texto.strip().upper())
+    if coincidencia is None:
+        raise ValueError(f"Tamaño no válido: {texto}")
+    return int(float(coincidencia.group(1)) * _UNIDADES[coincidencia.group(2)])
+
+
+def _frase(rng, palabras):
+    """Genera una frase de longitud aleatoria"""
+    return " ".join(rng.choice(PALABRAS) for _ in range(rng.randint(*palabras)))
+
+
+def _parrafo(rng, mezcla):
+    """Genera una línea de párrafo con formato, enlaces e imágenes intercalados"""
+    negrita = mezcla.negrita
+    cursiva = negrita + mezcla.cursiva
+    enlace = cursiva + mezcla.enlaces
+    imagen = enlace + mezcla.imagenes
+    
+    partes = []
+    for _ in range(rng.randint(*mezcla.partes_por_linea)):
+        eleccion = rng.random()
+        if eleccion < negrita:
+            partes.append(f"**{_frase(rng, (1, 3))}**")
+        elif eleccion < cursiva:
+            partes.append(f"*{_frase(rng, (1, 3))}*")
+        elif eleccion < enlace:
+            partes.append(f"[{_frase(rng, (1, 2))}](https://ejemplo.com/{rng.randint(1, 999)})")
+        elif eleccion < imagen:
+            partes.append(f"![{_frase(rng, (1, 2))}](/img/{rng.randint(1, 99)}.png)")
+        else:
+            partes.append(_frase(rng, mezcla.palabras_por_parte))
+    return " ".join(partes)
+
+
+def generar_documento(tamano, semilla=0, mezcla=None):
+    """
+    Genera un documento SimpleDoc de nivel 3 de aproximadamente ``tamano`` caracteres
+    
+    Args:
+        tamano: Tamaño aproximado del documento en caracteres
+        semilla: Semilla del generador aleatorio, para obtener documentos reproducibles
+        mezcla: Mezcla de construcciones, o el nombre de una de MEZCLAS.
+            Si es None, se usa la mezcla equilibrada.
+    
+    Returns:
+        Texto del documento
+    """
+    if mezcla is None or isinstance(mezcla, str):
+        mezcla = MEZCLAS[mezcla or 'equilibrada']
+    
+    titulo = mezcla.titulos
+    lista = titulo + mezcla.listas
+    numerada = lista + mezcla.listas_numeradas
+    codigo = numerada + mezcla.codigo
+    
+    rng = random.Random(semilla)
+    lineas = []
+    total = 0
+    
+    while total < tamano:
+        eleccion = rng.random()
+        if eleccion < titulo:
+            bloque = [f"{'#' * rng.randint(1, 3)} {_frase(rng, (2, 6))}", ""]
+        elif eleccion < lista:
+            bloque = [f"- {_frase(rng, (2, 8))}" for _ in range(rng.randint(2, 6))] + [""]
+        elif eleccion < numerada:
+            bloque = [f"{n}. {_frase(rng, (2, 8))}" for n in range(1, rng.randint(3, 7))] + [""]
+        elif eleccion < codigo:
+            bloque = [f"```{_frase(rng, (3, 10))}```", ""]
+        else:
+            bloque = [_parrafo(rng, mezcla) for _ in range(rng.randint(*mezcla.lineas_por_bloque))] + [""]
+        
+        lineas.extend(bloque)
+        total += sum(len(linea) + 1 for linea in bloque)
+    
+    return "\n".join(lineas)
+
+
+def escribir_documento(ruta, tamano, semilla=0, mezcla=None):
+    """
+    Escribe en disco un documento de aproximadamente ``tamano`` caracteres
+    
+    El documento se genera por trozos de TAMANO_TROZO caracteres, cada uno
+    con su propia semilla derivada de ``semilla``, de modo que la memoria no
+    depende del tamaño y pueden generarse documentos de varios GB.
+    
+    Args:
+        ruta: Ruta del archivo de salida
+        tamano: Tamaño aproximado del documento en caracteres
+        semilla: Semilla del generador aleatorio
+        mezcla: Mezcla de construcciones, o el nombre de una de MEZCLAS
+    """
+    with open(ruta, 'w', encoding='utf-8') as f:
+        escritos = 0
+        trozo = 0
+        while escritos < tamano:
+            texto = generar_documento(min(TAMANO_TROZO, tamano - escritos), f"{semilla}:{trozo}", mezcla)
+            f.write(texto)
+            f.write("\n\n")
+            escritos += len(texto) + 2
+            trozo += 1
+
+
+def main():
+    """Escribe un documento sintético en disco"""
+    parser = argparse.ArgumentParser(description='Genera un documento SimpleDoc sintético')
+    parser.add_argument('--tamano', type=interpretar_tamano, default='1M',
+                        help='Tamaño aproximado, por ejemplo 1K, 10M o 1G')
+    parser.add_argument('--semilla', type=int, default=0, help='Semilla del generador')
+    parser.add_argument('--mezcla', choices=sorted(MEZCLAS), default='equilibrada', help='Mezcla de construcciones')
+    parser.add_argument('--salida', required=True, help='Archivo de salida')
+    args = parser.parse_args()
+    
+    escribir_documento(args.salida, args.tamano, args.semilla, args.mezcla)
+
+
+if __name__ == "__main__":
+    main()
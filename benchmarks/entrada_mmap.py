@@ -0,0 +1,94 @@
+"""
+Tiempo y memoria máxima de compilar_archivo leyendo el archivo o con mmap
+
+Compara la lectura completa del archivo como texto (``read()`` y
+decodificación) con la proyección en memoria, en la que el lexer analiza
+directamente los bytes. Cada compilación se ejecuta en un proceso
+independiente para medir su RSS máximo. Con ``--ascii`` el corpus se
+translitera a ASCII, de modo que todas las líneas pasan por el escáner
+binario en lugar de decodificarse. Uso:
+
+    python -m benchmarks.entrada_mmap --tamanos 100 1024
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import unicodedata
+
+from benchmarks.corpus import generar_documento
+
+
+MODOS = ("read", "mmap")
+
+
+def generar_archivo(ruta, megas, ascii_=False):
+    """Escribe un documento sintético de ``megas`` MB sin mantenerlo en memoria"""
+    with open(ruta, 'w', encoding='utf-8') as f:
+        for semilla in range(int(megas)):
+            texto = generar_documento(1024 * 1024, semilla)
+            if ascii_:
+                texto = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+            f.write(texto)
+            f.write("\n\n")
+
+
+def medir_hijo(ruta_entrada, modo):
+    """Compila el archivo en el proceso actual e imprime las medidas en JSON"""
+    from simpledoc.compiler import Compiler
+    
+    compiler = Compiler(nivel_complejidad=3)
+    inicio = time.perf_counter()
+    compiler.compilar_archivo(ruta_entrada, ruta_entrada + '.html', mapear=(modo == "mmap"))
+    
+    print(json.dumps({
+        'segundos': time.perf_counter() - inicio,
+        'rss_max_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(description='compilar_archivo con read() frente a mmap')
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[100, 1024], help='Tamaños de entrada en MB')
+    parser.add_argument('--modos', nargs='+', choices=MODOS, default=list(MODOS), help='Modos a medir')
+    parser.add_argument('--ascii', action='store_true', help='Transliterar el corpus a ASCII')
+    parser.add_argument('--json', metavar='ARCHIVO', help='Guardar los resultados en JSON')
+    parser.add_argument('--hijo', nargs=2, metavar=('ENTRADA', 'MODO'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.hijo:
+        medir_hijo(*args.hijo)
+        return
+    
+    resultados = []
+    with tempfile.TemporaryDirectory() as directorio:
+        print(f"{'MB':>6} {'modo':>6} {'segundos':>9} {'RSS máx (MB)':>13}")
+        for megas in args.tamanos:
+            ruta = os.path.join(directorio, f"doc_{megas}.sd")
+            generar_archivo(ruta, megas, args.ascii)
+            
+            for modo in args.modos:
+                resultado = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.entrada_mmap', '--hijo', ruta, modo],
+                    capture_output=True, text=True, check=True
+                )
+                datos = json.loads(resultado.stdout)
+                resultados.append(dict(datos, megas=megas, modo=modo))
+                print(f"{megas:>6} {modo:>6} {datos['segundos']:>9.2f} {datos['rss_max_mb']:>13.1f}")
+                os.remove(ruta + '.html')
+            
+            os.remove(ruta)
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
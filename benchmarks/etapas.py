@@ -0,0 +1,256 @@
+"""
+Tiempo de cada etapa del compilador por nivel de complejidad
+
+Mide por separado Lexer.tokenizar, Parser.parsear, Validator.validar y
+HTMLGenerator.generar sobre documentos sintéticos reproducibles (ver
+benchmarks.corpus), tras unas ejecuciones de calentamiento y con varias
+repeticiones. Cada etapa recibe la salida ya calculada de la anterior, de
+modo que solo se mide su propio trabajo. Los resultados pueden guardarse en
+JSON para compararlos entre commits. Con ``--comparar-con REF`` se miden
+también las etapas tal como estaban en esa referencia de git (en un
+worktree temporal):
+
+    python -m benchmarks.etapas --tamanos 1K 64K 1M --mezcla formato --json etapas.json
+    python -m benchmarks.etapas --tamanos 1M --comparar-con HEAD~1
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import MEZCLAS, generar_documento, interpretar_tamano
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ETAPAS = ("lexer", "parser", "validador", "generador")
+
+# Versión del formato de los resultados en JSON
+FORMATO = 2
+
+
+def cronometrar(funcion, repeticiones, calentamiento=1):
+    """
+    Ejecuta ``funcion`` varias veces tras unas ejecuciones de calentamiento
+    
+    Returns:
+        Lista con el tiempo en segundos de cada repetición
+    """
+    for _ in range(calentamiento):
+        funcion()
+    
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def _carga_calibracion():
+    """Trabajo fijo de Python puro con el que se estima la velocidad de la máquina"""
+    palabras = " ".join(str(i) for i in range(50000)).split()
+    return sum(len(palabra) for palabra in palabras)
+
+
+def calibrar(repeticiones=5):
+    """
+    Mide el trabajo de calibración, para corregir los cambios de velocidad de la máquina
+    
+    Returns:
+        Mediana en milisegundos
+    """
+    return statistics.median(cronometrar(_carga_calibracion, repeticiones)) * 1000
+
+
+def desviacion_mediana(valores):
+    """Devuelve la mediana de las desviaciones absolutas respecto a la mediana (MAD)"""
+    mediana = statistics.median(valores)
+    return statistics.median(abs(valor - mediana) for valor in valores)
+
+
+def medir_etapas(texto, nivel, repeticiones, calentamiento=1):
+    """
+    Mide cada etapa del compilador de un nivel sobre un texto
+    
+    Returns:
+        Diccionario {etapa: lista de tiempos en segundos}
+    """
+    from simpledoc.compiler import Compiler
+    
+    compiler = Compiler(nivel_complejidad=nivel)
+    tokens = compiler.lexer.tokenizar(texto)
+    ast = compiler.parser.parsear(tokens)
+    
+    funciones = {
+        "lexer": lambda: compiler.lexer.tokenizar(texto),
+        "parser": lambda: compiler.parser.parsear(tokens),
+        "validador": lambda: compiler.validator.validar(ast, collect=True),
+        "generador": lambda: compiler.html_generator.generar(ast),
+    }
+    return {etapa: cronometrar(funciones[etapa], repeticiones, calentamiento) for etapa in ETAPAS}
+
+
+def medir(tamanos, niveles=(1, 2, 3), mezcla='equilibrada', semilla=0, repeticiones=7, calentamiento=1):
+    """
+    Mide todas las etapas de los niveles indicados sobre documentos de cada tamaño
+    
+    Args:
+        tamanos: Tamaños aproximados de los documentos, en caracteres
+        niveles: Niveles de complejidad a medir
+        mezcla: Nombre de la mezcla de construcciones (ver benchmarks.corpus)
+        semilla: Semilla del generador de documentos
+        repeticiones: Repeticiones medidas de cada etapa
+        calentamiento: Ejecuciones previas de cada etapa que no se miden
+    
+    Returns:
+        Diccionario serializable a JSON con el entorno y una medición por
+        tamaño, nivel y etapa. Cada medición incluye el tiempo del trabajo de
+        calibración medido justo antes (ver calibrar).
+    """
+    mediciones = []
+    for tamano in tamanos:
+        texto = generar_documento(tamano, semilla, mezcla)
+        megas = len(texto.encode('utf-8')) / (1024 * 1024)
+        
+        for nivel in niveles:
+            # La calibración se repite junto a cada grupo de etapas para seguir
+            # las variaciones de velocidad durante la medición
+            calibracion = calibrar()
+            for etapa, tiempos in medir_etapas(texto, nivel, repeticiones, calentamiento).items():
+                mediana = statistics.median(tiempos)
+                mediciones.append({
+                    'tamano': tamano,
+                    'nivel': nivel,
+                    'etapa': etapa,
+                    'calibracion_ms': calibracion,
+                    'tiempos_ms': [t * 1000 for t in tiempos],
+                    'mediana_ms': mediana * 1000,
+                    'mad_ms': desviacion_mediana(tiempos) * 1000,
+                    'mb_s': megas / max(mediana, 1e-9),
+                })
+    
+    return {
+        'formato': FORMATO,
+        'commit': _commit(RAIZ),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'mezcla': mezcla,
+        'semilla': semilla,
+        'repeticiones': repeticiones,
+        'calentamiento': calentamiento,
+        'mediciones': mediciones,
+    }
+
+
+def _commit(directorio):
+    """Devuelve el commit actual del repositorio, o None si no se puede obtener"""
+    try:
+        return subprocess.run(["git", "-C", directorio, "rev-parse", "--short", "HEAD"], check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def medir_referencia(referencia, argumentos):
+    """
+    Mide las etapas del código de una referencia de git en otro proceso
+    
+    El proceso importa simpledoc desde el worktree de la referencia, pero los
+    benchmarks y el generador de documentos desde el árbol actual, de modo
+    que ambas mediciones usan los mismos documentos.
+    
+    Args:
+        referencia: Referencia de git (commit, rama o etiqueta)
+        argumentos: Argumentos de línea de comandos que se pasan al proceso
+    """
+    worktree = tempfile.mkdtemp(prefix="simpledoc-")
+    subprocess.run(["git", "-C", RAIZ, "worktree", "add", "--detach", worktree, referencia],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with tempfile.TemporaryDirectory() as paquete, tempfile.NamedTemporaryFile(suffix=".json") as salida:
+            os.symlink(os.path.join(worktree, "simpledoc"), os.path.join(paquete, "simpledoc"))
+            entorno = dict(os.environ, PYTHONPATH=os.pathsep.join([paquete, RAIZ]))
+            subprocess.run([sys.executable, "-m", "benchmarks.etapas", *argumentos, "--json", salida.name,
+                            "--silencioso"], cwd=paquete, env=entorno, check=True)
+            with open(salida.name, encoding='utf-8') as f:
+                resultados = json.load(f)
+        resultados['commit'] = _commit(worktree)
+        return resultados
+    finally:
+        subprocess.run(["git", "-C", RAIZ, "worktree", "remove", "--force", worktree], check=False)
+
+
+def imprimir(nombre, resultados, referencia=None):
+    """Imprime una tabla con la mediana de cada etapa por tamaño y nivel"""
+    anteriores = {}
+    if referencia is not None:
+        anteriores = {(m['tamano'], m['nivel'], m['etapa']): m['mediana_ms'] for m in referencia['mediciones']}
+    
+    filas = {}
+    for medicion in resultados['mediciones']:
+        filas.setdefault((medicion['tamano'], medicion['nivel']), {})[medicion['etapa']] = medicion
+    
+    print(f"{nombre}")
+    print(f"    {'tamaño':>10} {'nivel':<6}" + "".join(f"{etapa:>18}" for etapa in ETAPAS))
+    for (tamano, nivel), etapas in filas.items():
+        celdas = []
+        for etapa in ETAPAS:
+            mediana = etapas[etapa]['mediana_ms']
+            celda = f"{mediana:.2f} ms"
+            anterior = anteriores.get((tamano, nivel, etapa))
+            if anterior:
+                celda += f" ({mediana / anterior - 1:+.0%})"
+            celdas.append(f"{celda:>18}")
+        print(f"    {tamano:>10} {nivel:<6}" + "".join(celdas))
+
+
+def argumentos_medicion(parser):
+    """Añade al parser los argumentos que determinan qué se mide"""
+    parser.add_argument('--tamanos', type=interpretar_tamano, nargs='+', default=[256 * 1024], metavar='TAMAÑO',
+                        help='Tamaños de los documentos, por ejemplo 1K 64K 1M (por defecto 256K)')
+    parser.add_argument('--niveles', type=int, nargs='+', choices=[1, 2, 3], default=[1, 2, 3],
+                        help='Niveles de complejidad a medir')
+    parser.add_argument('--mezcla', choices=sorted(MEZCLAS), default='equilibrada',
+                        help='Mezcla de construcciones de los documentos')
+    parser.add_argument('--semilla', type=int, default=0, help='Semilla del generador de documentos')
+    parser.add_argument('--repeticiones', type=int, default=7, help='Repeticiones medidas por etapa')
+    parser.add_argument('--calentamiento', type=int, default=1, help='Ejecuciones previas no medidas por etapa')
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(description='Tiempo de cada etapa del compilador')
+    argumentos_medicion(parser)
+    parser.add_argument('--comparar-con', metavar='REF', help='Referencia de git con la que comparar')
+    parser.add_argument('--json', metavar='ARCHIVO', help='Guardar los resultados en JSON')
+    parser.add_argument('--silencioso', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    resultados = medir(args.tamanos, args.niveles, args.mezcla, args.semilla, args.repeticiones,
+                       args.calentamiento)
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+    if args.silencioso:
+        return
+    
+    if args.comparar_con:
+        argumentos = ["--tamanos", *map(str, args.tamanos), "--niveles", *map(str, args.niveles),
+                      "--mezcla", args.mezcla, "--semilla", str(args.semilla),
+                      "--repeticiones", str(args.repeticiones), "--calentamiento", str(args.calentamiento)]
+        referencia = medir_referencia(args.comparar_con, argumentos)
+        imprimir(args.comparar_con, referencia)
+        imprimir("actual (diferencia)", resultados, referencia)
+    else:
+        imprimir(f"Mezcla {args.mezcla}, semilla {args.semilla}", resultados)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Memoria del AST por cada 1000 líneas de documento
+
+Compara el ASTNode con ``__slots__`` y tupla de hijos compartida con una
+réplica de la representación anterior (``__dict__``, una lista de hijos por
+nodo y ``url``/``numero`` añadidos solo a los nodos que los usan) y con la
+ArenaAST en arrays paralelos, y los relaciona con el tamaño del texto
+fuente. Uso:
+    
+    python -m benchmarks.memoria_ast --tamano 10
+"""
+
+import argparse
+import sys
+
+from simpledoc import parser as modulo_parser
+from simpledoc.arena import ArenaAST
+from simpledoc.lexer import Lexer
+from simpledoc.parser import Parser, TipoNodo
+from benchmarks.corpus import generar_documento
+from benchmarks.memoria_tokens import medir
+
+
+class NodoConDict:
+    """Réplica del ASTNode anterior, sin ``__slots__``"""
+    
+    def __init__(self, tipo, valor=None, hijos=None, linea=None, url=None, numero=None):
+        self.tipo = tipo if tipo.__class__ is TipoNodo else TipoNodo(tipo)
+        self.valor = valor
+        self.hijos = hijos or []
+        self.linea = linea
+        if url is not None:
+            self.url = url
+        if numero is not None:
+            self.numero = numero
+    
+    def add_hijo(self, hijo):
+        self.hijos.append(hijo)
+
+
+def parsear_con_dict(parser, tokens):
+    """Parsea sustituyendo temporalmente ASTNode por la réplica con ``__dict__``"""
+    original = modulo_parser.ASTNode
+    modulo_parser.ASTNode = NodoConDict
+    try:
+        return parser.parsear(tokens)
+    finally:
+        modulo_parser.ASTNode = original
+
+
+def contar_nodos(raiz):
+    """Cuenta los nodos del árbol sin recursión"""
+    if isinstance(raiz, ArenaAST):
+        return len(raiz)
+    
+    total = 0
+    pila = [raiz]
+    while pila:
+        nodo = pila.pop()
+        total += 1
+        pila.extend(nodo.hijos)
+    return total
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(description='Memoria del AST por cada 1000 líneas')
+    parser.add_argument('--tamano', type=float, default=2, help='Tamaño del documento en MB')
+    parser.add_argument('--semilla', type=int, default=0, help='Semilla del generador de documentos')
+    args = parser.parse_args()
+    
+    texto = generar_documento(int(args.tamano * 1024 * 1024), args.semilla)
+    miles_de_lineas = (texto.count("\n") + 1) / 1000
+    fuente = sys.getsizeof(texto)
+    tokens = Lexer(nivel_complejidad=3).tokenizar(texto)
+    buffer = Lexer(nivel_complejidad=3).tokenizar_compacto(texto)
+    analizador = Parser(nivel_complejidad=3)
+    
+    casos = [
+        ("ASTNode con __dict__", lambda: parsear_con_dict(analizador, tokens)),
+        ("ASTNode con __slots__", lambda: analizador.parsear(tokens)),
+        ("ArenaAST", lambda: analizador.parsear(buffer, arena=True)),
+    ]
+    
+    print(f"Documento: {len(texto) / (1024 * 1024):.1f} MB, {miles_de_lineas * 1000:.0f} líneas, "
+          f"{fuente / miles_de_lineas / 1024:.1f} KB de texto por 1000 líneas")
+    for nombre, funcion in casos:
+        ast, retenidos = medir(funcion)
+        print(f"{nombre:<22} {contar_nodos(ast):>9} nodos  {retenidos / miles_de_lineas / 1024:8.1f} KB/1000 líneas  "
+              f"{retenidos / fuente:5.2f}x el texto")
+        del ast
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Memoria por token de las distintas representaciones de la salida del lexer
+
+Compara la clase Token con ``__dict__`` y el valor copiado (representación
+original), la clase Token con ``__slots__`` que referencia el texto y el
+TokenBuffer por columnas sobre un documento sintético grande. Uso:
+
+    python -m benchmarks.memoria_tokens --tamano 10
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from simpledoc import lexer as modulo_lexer
+from simpledoc.lexer import Lexer
+from benchmarks.corpus import generar_documento
+
+
+class TokenConDict:
+    """Réplica de la clase Token original, sin ``__slots__`` y con una copia de su valor"""
+    
+    def __init__(self, tipo, valor, linea, columna, inicio=None, fin=None):
+        if fin is not None:
+            valor = modulo_lexer._valor_token(tipo, valor, inicio, fin)
+        self.tipo = tipo
+        self.valor = valor
+        self.linea = linea
+        self.columna = columna
+
+
+def medir(funcion):
+    """
+    Mide la memoria que retiene el resultado de una función
+    
+    Returns:
+        Tupla (resultado, bytes retenidos)
+    """
+    gc.collect()
+    tracemalloc.start()
+    resultado = funcion()
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, actual
+
+
+def tokenizar_con_dict(lexer, texto):
+    """Tokeniza sustituyendo temporalmente Token por la réplica con ``__dict__``"""
+    original = modulo_lexer.Token
+    modulo_lexer.Token = TokenConDict
+    try:
+        return lexer.tokenizar(texto)
+    finally:
+        modulo_lexer.Token = original
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(description='Memoria por token de la salida del lexer')
+    parser.add_argument('--tamano', type=float, default=2, help='Tamaño del documento en MB')
+    parser.add_argument('--semilla', type=int, default=0, help='Semilla del generador de documentos')
+    args = parser.parse_args()
+    
+    texto = generar_documento(int(args.tamano * 1024 * 1024), args.semilla)
+    lexer = Lexer(nivel_complejidad=3)
+    
+    casos = [
+        ("Token con __dict__", lambda: tokenizar_con_dict(lexer, texto)),
+        ("Token con __slots__", lambda: lexer.tokenizar(texto)),
+        ("TokenBuffer", lambda: lexer.tokenizar_compacto(texto)),
+    ]
+    
+    print(f"Documento: {len(texto) / (1024 * 1024):.1f} MB")
+    for nombre, funcion in casos:
+        tokens, retenidos = medir(funcion)
+        print(f"{nombre:<22} {len(tokens):>10} tokens  {retenidos / len(tokens):8.1f} bytes/token")
+        del tokens
+
+
+if __name__ == "__main__":
+    main()
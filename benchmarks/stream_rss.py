@@ -0,0 +1,104 @@
+"""
+Memoria máxima y tiempo hasta el primer byte de la compilación en streaming
+
+Genera documentos sintéticos de varios tamaños y compila cada uno en un
+proceso independiente, para medir el RSS máximo de ese proceso. Con
+``--comparar`` también mide Compiler.compilar_archivo, que carga el documento
+completo en memoria. Uso:
+
+    python -m benchmarks.stream_rss --tamanos 1 10 100 500
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generar_documento
+
+
+class SalidaCronometrada:
+    """Archivo de salida que registra el instante de la primera escritura"""
+    
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.primera_escritura = None
+    
+    def write(self, texto):
+        if self.primera_escritura is None:
+            self.primera_escritura = time.perf_counter()
+        return self.archivo.write(texto)
+
+
+def generar_archivo(ruta, megas):
+    """Escribe un documento sintético de ``megas`` MB sin mantenerlo en memoria"""
+    with open(ruta, 'w', encoding='utf-8') as f:
+        for semilla in range(int(megas)):
+            f.write(generar_documento(1024 * 1024, semilla))
+            f.write("\n\n")
+
+
+def medir_hijo(ruta_entrada, modo):
+    """Compila el archivo en el proceso actual e imprime las medidas en JSON"""
+    from simpledoc.compiler import Compiler
+    
+    compiler = Compiler(nivel_complejidad=3)
+    ruta_salida = ruta_entrada + '.html'
+    inicio = time.perf_counter()
+    primer_byte = None
+    
+    if modo == "stream":
+        with open(ruta_entrada, 'r', encoding='utf-8') as entrada, \
+                open(ruta_salida, 'w', encoding='utf-8') as archivo:
+            salida = SalidaCronometrada(archivo)
+            compiler.compilar_stream(entrada, salida)
+            primer_byte = salida.primera_escritura - inicio
+    else:
+        compiler.compilar_archivo(ruta_entrada, ruta_salida, mapear=False)
+    
+    print(json.dumps({
+        'segundos': time.perf_counter() - inicio,
+        'primer_byte': primer_byte,
+        'rss_max_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(description='RSS máximo de la compilación en streaming')
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[1, 10, 50], help='Tamaños de entrada en MB')
+    parser.add_argument('--comparar', action='store_true', help='Mide también compilar_archivo')
+    parser.add_argument('--hijo', nargs=2, metavar=('ENTRADA', 'MODO'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.hijo:
+        medir_hijo(*args.hijo)
+        return
+    
+    modos = ["stream", "completo"] if args.comparar else ["stream"]
+    
+    with tempfile.TemporaryDirectory() as directorio:
+        print(f"{'MB':>6} {'modo':>9} {'segundos':>9} {'1er byte':>9} {'RSS máx (MB)':>13}")
+        for megas in args.tamanos:
+            ruta = os.path.join(directorio, f"doc_{megas}.sd")
+            generar_archivo(ruta, megas)
+            
+            for modo in modos:
+                resultado = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.stream_rss', '--hijo', ruta, modo],
+                    capture_output=True, text=True, check=True
+                )
+                datos = json.loads(resultado.stdout)
+                primer_byte = f"{datos['primer_byte'] * 1000:7.1f}ms" if datos['primer_byte'] is not None else "-"
+                print(f"{megas:>6} {modo:>9} {datos['segundos']:>9.2f} {primer_byte:>9} {datos['rss_max_mb']:>13.1f}")
+                os.remove(ruta + '.html')
+            
+            os.remove(ruta)
+
+
+if __name__ == "__main__":
+    main()
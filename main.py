@@ -8,20 +8,33 @@ También inicia una interfaz web para usar el compilador de manera interactiva.
 """
 
 import argparse
+import json
 import logging
 import os
 import sys
-from simpledoc.compiler import Compiler
 from simpledoc.exceptions import SimpleDocError
 
 # Configurar el logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger('simpledoc')
 
-# Importar la aplicación Flask para que Gunicorn pueda encontrarla
-from web_interface import app
 
-def compilar_archivo(archivo_entrada, archivo_salida=None, nivel_complejidad=3, modo_debug=False):
+def __getattr__(nombre):
+    """
+    Importa la aplicación Flask solo cuando se pide ``main.app``
+    
+    Así Gunicorn puede seguir usando ``main:app`` sin que la línea de comandos
+    cargue Flask, Werkzeug y Jinja en cada compilación.
+    """
+    if nombre == 'app':
+        from web_interface import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+
+def compilar_archivo(archivo_entrada, archivo_salida=None, nivel_complejidad=3, modo_debug=False,
+                     directorio_cache=None, estadisticas=False, ruta_perfil=None, memoria=False,
+                     ruta_json_memoria=None):
     """
     Compila un archivo SimpleDoc a HTML
     
@@ -30,20 +43,63 @@ def compilar_archivo(archivo_entrada, archivo_salida=None, nivel_complejidad=3,
         archivo_salida: Ruta del archivo de salida (opcional)
         nivel_complejidad: Nivel de complejidad del compilador (1-3)
         modo_debug: Activa el modo de depuración
-        
+        directorio_cache: Directorio de la caché de compilaciones en disco (opcional)
+        estadisticas: Muestra el tiempo de cada etapa y los contadores de la compilación
+        ruta_perfil: Ruta donde guardar el perfil de cProfile de la compilación,
+            junto con sus pilas colapsadas (opcional)
+        memoria: Muestra la memoria de cada etapa según tracemalloc
+        ruta_json_memoria: Ruta donde guardar el informe de memoria en JSON
+            (opcional; implica ``memoria``)
+    
     Returns:
         True si la compilación fue exitosa, False en caso contrario
     """
+    from simpledoc.compiler import Compiler
+    from simpledoc.estadisticas import CompileStats
+    
     try:
         # Crear compilador
-        compiler = Compiler(nivel_complejidad, modo_debug)
+        cache = None
+        if directorio_cache:
+            from simpledoc.cache import CacheDisco
+            cache = CacheDisco(directorio_cache)
+        # El perfil y el informe de memoria se toman siempre de la compilación completa, sin caché
+        observador = None
+        if ruta_perfil:
+            from simpledoc.perfilado import PerfilEtapas
+            observador = PerfilEtapas()
+        elif memoria or ruta_json_memoria:
+            from simpledoc.memoria import InformeMemoria
+            observador = InformeMemoria()
+        
+        if observador is not None:
+            compiler = Compiler(nivel_complejidad, modo_debug, al_iniciar_etapa=observador.al_iniciar_etapa,
+                                al_completar_etapa=observador.al_completar_etapa)
+            observador.iniciar()
+        else:
+            compiler = Compiler(nivel_complejidad, modo_debug, cache=cache)
         
         # Compilar archivo
-        ruta_salida = compiler.compilar_archivo(archivo_entrada, archivo_salida)
+        medidas = CompileStats() if estadisticas else None
+        try:
+            ruta_salida = compiler.compilar_archivo(archivo_entrada, archivo_salida, estadisticas=medidas)
+        finally:
+            if observador is not None:
+                observador.detener()
         
         logger.info(f"Archivo compilado exitosamente: {ruta_salida}")
+        if medidas is not None:
+            logger.info(f"Estadísticas de la compilación:\n{medidas.resumen()}")
+        if ruta_perfil:
+            guardar_perfil(observador, ruta_perfil)
+        elif observador is not None:
+            logger.info(f"Memoria de la compilación:\n{observador.resumen()}")
+            if ruta_json_memoria:
+                with open(ruta_json_memoria, 'w', encoding='utf-8') as f:
+                    json.dump(observador.a_diccionario(), f, indent=2)
+                logger.info(f"Informe de memoria guardado en {ruta_json_memoria}")
         return True
-        
+    
     except SimpleDocError as e:
         logger.error(f"Error al compilar: {e}")
         return False
@@ -52,21 +108,171 @@ def compilar_archivo(archivo_entrada, archivo_salida=None, nivel_complejidad=3,
         return False
 
 
+def compilar_varios(entradas, directorio_salida=None, nivel_complejidad=3, recursivo=False, jobs=1,
+                    directorio_cache=None, incremental=False, forzar=False, ruta_perfil=None):
+    """
+    Compila por lotes varios archivos, directorios o patrones glob
+    
+    Los errores de cada archivo se registran sin interrumpir el lote, y al
+    final se muestra un resumen del rendimiento.
+    
+    Args:
+        entradas: Lista de archivos, directorios o patrones glob
+        directorio_salida: Directorio de salida del HTML (opcional)
+        nivel_complejidad: Nivel de complejidad del compilador (1-3)
+        recursivo: Recorrer los subdirectorios
+        jobs: Número de procesos (0 para usar todas las CPUs)
+        directorio_cache: Directorio de la caché de compilaciones en disco (opcional)
+        incremental: Compilar solo los archivos que cambiaron desde la última
+            compilación, según el manifiesto junto al directorio de salida
+        forzar: En modo incremental, compilar todos los archivos igualmente
+        ruta_perfil: Ruta donde guardar el perfil de cProfile de todas las
+            compilaciones, junto con sus pilas colapsadas (opcional)
+    
+    Returns:
+        True si todos los archivos se compilaron, False en caso contrario
+    """
+    from simpledoc.lote import Manifiesto, expandir_entradas, compilar_lote, compilar_lote_incremental
+    
+    try:
+        trabajos = expandir_entradas(entradas, recursivo, directorio_salida)
+    except ValueError as e:
+        logger.error(str(e))
+        return False
+    
+    if not trabajos:
+        logger.error("No se encontraron archivos SimpleDoc en las entradas indicadas")
+        return False
+    
+    def al_completar(resultado):
+        if resultado.error is not None:
+            logger.error(f"{resultado.entrada}: {resultado.error}")
+        else:
+            logger.debug(f"Archivo compilado exitosamente: {resultado.salida}")
+    
+    perfil = None
+    if ruta_perfil:
+        from simpledoc.perfilado import PerfilEtapas
+        perfil = PerfilEtapas()
+    
+    if incremental:
+        resultado = compilar_lote_incremental(
+            trabajos,
+            Manifiesto.ruta_por_defecto(directorio_salida),
+            nivel_complejidad,
+            forzar,
+            jobs=jobs,
+            directorio_cache=directorio_cache,
+            al_completar=al_completar,
+            perfil=perfil
+        )
+    else:
+        resultado = compilar_lote(trabajos, nivel_complejidad, jobs, directorio_cache=directorio_cache,
+                                  al_completar=al_completar, perfil=perfil)
+    
+    logger.info(resultado.resumen())
+    if perfil is not None:
+        guardar_perfil(perfil, ruta_perfil)
+    return not resultado.errores
+
+
+def guardar_perfil(perfil, ruta):
+    """Guarda un PerfilEtapas en formato pstats y como pilas colapsadas"""
+    ruta_pstats, ruta_pilas = perfil.guardar(ruta)
+    logger.info(f"Perfil guardado en {ruta_pstats} (pstats) y {ruta_pilas} (pilas colapsadas)")
+
+
+def vigilar(directorio, directorio_salida=None, nivel_complejidad=3, recursivo=False):
+    """
+    Recompila los archivos de un directorio cada vez que se guardan
+    
+    Args:
+        directorio: Directorio a vigilar
+        directorio_salida: Directorio de salida del HTML (opcional)
+        nivel_complejidad: Nivel de complejidad del compilador (1-3)
+        recursivo: Vigilar también los subdirectorios
+    
+    Returns:
+        True al terminar con Ctrl+C
+    """
+    from simpledoc.vigilancia import Vigilante
+    
+    def al_recompilar(resultado):
+        if resultado.error is not None:
+            logger.error(f"{resultado.entrada}: {resultado.error}")
+        else:
+            logger.info(f"{resultado.entrada} -> {resultado.salida}: {resultado.segundos * 1000:.1f} ms "
+                        f"({resultado.latencia * 1000:.0f} ms desde el guardado)")
+    
+    vigilante = Vigilante(directorio, directorio_salida, nivel_complejidad, recursivo,
+                          al_recompilar=al_recompilar)
+    logger.info(f"Vigilando {directorio} ({vigilante.modo}); Ctrl+C para terminar")
+    
+    try:
+        vigilante.ejecutar()
+    except KeyboardInterrupt:
+        pass
+    
+    return True
+
+
+def _procesos(valor):
+    """Tipo de argparse para --jobs: un entero no negativo"""
+    try:
+        jobs = int(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"número de procesos no válido: {valor!r}")
+    if jobs < 0:
+        raise argparse.ArgumentTypeError(f"el número de procesos no puede ser negativo: {jobs}")
+    return jobs
+
+
+def _es_patron(ruta):
+    """Indica si una ruta contiene comodines de glob (como glob.has_magic, sin importar glob)"""
+    return any(caracter in ruta for caracter in '*?[')
+
+
 def main():
     """Función principal del script"""
     # Configurar el parser de argumentos
     parser = argparse.ArgumentParser(
         description='Compilador de SimpleDoc a HTML',
-        epilog='Ejemplo: python main.py archivo.sd -o archivo.html -c 2'
+        epilog='Ejemplos: python main.py archivo.sd -o archivo.html -c 2\n'
+               '          python main.py docs/ -r --jobs 4 --out-dir build/',
+        formatter_class=argparse.RawDescriptionHelpFormatter
     )
     
     # Agregar argumentos
-    parser.add_argument('archivo', nargs='?', help='Archivo de entrada SimpleDoc a compilar')
-    parser.add_argument('-o', '--output', help='Archivo de salida HTML')
+    parser.add_argument('archivos', nargs='*', metavar='archivo',
+                        help='Archivos, directorios o patrones glob de entrada SimpleDoc a compilar')
+    parser.add_argument('-o', '--output', help='Archivo de salida HTML (solo con un archivo de entrada)')
     parser.add_argument('-c', '--complejidad', type=int, choices=[1, 2, 3], default=3,
                         help='Nivel de complejidad (1: básico, 2: intermedio, 3: avanzado)')
     parser.add_argument('-d', '--debug', action='store_true', help='Activa el modo de depuración')
     parser.add_argument('-w', '--web', action='store_true', help='Inicia la interfaz web')
+    parser.add_argument('--cache', metavar='DIR', help='Directorio de la caché de compilaciones en disco')
+    parser.add_argument('-r', '--recursivo', action='store_true',
+                        help='Recorre los subdirectorios de los directorios de entrada')
+    parser.add_argument('-j', '--jobs', type=_procesos, default=1, metavar='N',
+                        help='Número de procesos para compilar en paralelo (0: uno por CPU)')
+    parser.add_argument('--out-dir', metavar='DIR',
+                        help='Directorio de salida; conserva la estructura relativa de cada entrada')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Compila solo los archivos que cambiaron desde la última compilación')
+    parser.add_argument('--force', action='store_true',
+                        help='Con --incremental, vuelve a compilar todos los archivos')
+    parser.add_argument('--watch', metavar='DIR',
+                        help='Vigila DIR y recompila cada archivo SimpleDoc al guardarlo')
+    parser.add_argument('--stats', action='store_true',
+                        help='Muestra el tiempo de cada etapa y los contadores de la compilación')
+    parser.add_argument('--profile', metavar='ARCHIVO',
+                        help='Perfila la compilación con cProfile y guarda el resultado en ARCHIVO (pstats) '
+                             'y en ARCHIVO con extensión .collapsed (pilas colapsadas para flame graphs)')
+    parser.add_argument('--memory-report', action='store_true',
+                        help='Muestra el pico y la memoria retenida de cada etapa, los sitios que más memoria '
+                             'reservan y los objetos Token y ASTNode vivos (con tracemalloc)')
+    parser.add_argument('--memory-json', metavar='ARCHIVO',
+                        help='Guarda el informe de memoria en ARCHIVO en formato JSON (implica --memory-report)')
     
     # Parsear argumentos
     args = parser.parse_args()
@@ -78,6 +284,9 @@ def main():
     # Iniciar interfaz web si se especifica
     if args.web:
         try:
+            # Importar la interfaz web solo cuando se va a usar
+            from web_interface import app
+            
             # Ejecutar la aplicación Flask directamente
             logger.info("Iniciando interfaz web en http://0.0.0.0:5000")
             app.run(host='0.0.0.0', port=5000)
@@ -86,22 +295,71 @@ def main():
             logger.error("No se pudo iniciar la interfaz web. Asegúrate de tener Flask instalado.")
             return 1
     
+    # Vigilar un directorio si se especifica
+    if args.watch:
+        if not os.path.isdir(args.watch):
+            logger.error(f"El directorio {args.watch} no existe")
+            return 1
+        vigilar(args.watch, args.out_dir, args.complejidad, args.recursivo)
+        return 0
+    
     # Verificar si se especificó un archivo
-    if not args.archivo:
+    if not args.archivos:
         parser.print_help()
         return 1
     
-    # Verificar si el archivo existe
-    if not os.path.isfile(args.archivo):
-        logger.error(f"El archivo {args.archivo} no existe")
+    memoria = args.memory_report or bool(args.memory_json)
+    if args.profile and memoria:
+        logger.error("Las opciones --profile y --memory-report no se pueden combinar")
+        return 1
+    
+    # Un único archivo sin opciones de lote: compilación clásica
+    unico = args.archivos[0]
+    if (len(args.archivos) == 1 and not _es_patron(unico) and not os.path.isdir(unico)
+            and not args.out_dir and args.jobs == 1 and not args.incremental):
+        # Verificar si el archivo existe
+        if not os.path.isfile(unico):
+            logger.error(f"El archivo {unico} no existe")
+            return 1
+        
+        # Compilar archivo
+        exito = compilar_archivo(
+            unico,
+            args.output,
+            args.complejidad,
+            args.debug,
+            args.cache,
+            args.stats,
+            args.profile,
+            memoria,
+            args.memory_json
+        )
+        
+        return 0 if exito else 1
+    
+    if args.output:
+        logger.error("La opción -o solo admite un archivo de entrada; usa --out-dir para varios")
+        return 1
+    
+    if args.stats:
+        logger.error("La opción --stats solo admite un archivo de entrada")
+        return 1
+    
+    if memoria:
+        logger.error("La opción --memory-report solo admite un archivo de entrada")
         return 1
     
-    # Compilar archivo
-    exito = compilar_archivo(
-        args.archivo,
-        args.output,
+    # Compilar por lotes
+    exito = compilar_varios(
+        args.archivos,
+        args.out_dir,
         args.complejidad,
-        args.debug
+        args.recursivo,
+        args.jobs,
+        args.cache,
+        args.incremental,
+        args.force,
+        args.profile
     )
     
     return 0 if exito else 1
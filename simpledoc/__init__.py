@@ -3,6 +3,65 @@ SimpleDoc - Un compilador para un lenguaje de marcado simplificado
 
 Este módulo implementa un compilador para un lenguaje de marcado simplificado
 que analiza documentos, valida su sintaxis y los transforma a HTML.
+
+Las clases principales pueden importarse directamente desde el paquete
+(``from simpledoc import Compiler``). Cada submódulo se carga la primera vez
+que se usa uno de sus nombres, de modo que ``import simpledoc`` no importa
+nada más.
 """
 
-__version__ = '1.0.0'
+import importlib
+
+# La versión forma parte de la clave de la caché de compilaciones y del
+# manifiesto de las compilaciones incrementales: debe subirse en cada cambio
+# del HTML generado (tests/test_cache.py lo comprueba)
+__version__ = '1.1.1'
+
+# Nombres exportados por el paquete y el submódulo que define cada uno
+_EXPORTACIONES = {
+    'Compiler': 'compiler',
+    'RegistroCompiladores': 'compiler',
+    'Lexer': 'lexer',
+    'Token': 'lexer',
+    'TokenType': 'lexer',
+    'TokenBuffer': 'lexer',
+    'Parser': 'parser',
+    'ASTNode': 'parser',
+    'TipoNodo': 'parser',
+    'ArenaAST': 'arena',
+    'VistaNodo': 'arena',
+    'Validator': 'validator',
+    'Diagnostico': 'validator',
+    'ASTGenerator': 'ast_generator',
+    'HTMLGenerator': 'html_generator',
+    'CompileStats': 'estadisticas',
+    'PerfilEtapas': 'perfilado',
+    'InformeMemoria': 'memoria',
+    'EstadoCompilacion': 'incremental',
+    'CacheLRU': 'cache',
+    'CacheDisco': 'cache',
+    'compilar_lote': 'lote',
+    'expandir_entradas': 'lote',
+    'SimpleDocError': 'exceptions',
+    'LexerError': 'exceptions',
+    'ParserError': 'exceptions',
+    'ValidationError': 'exceptions',
+    'GenerationError': 'exceptions',
+}
+
+__all__ = list(_EXPORTACIONES)
+
+
+def __getattr__(nombre):
+    """Importa el submódulo que define ``nombre`` la primera vez que se usa"""
+    modulo = _EXPORTACIONES.get(nombre)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    
+    valor = getattr(importlib.import_module(f".{modulo}", __name__), nombre)
+    globals()[nombre] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTACIONES))
@@ -0,0 +1,418 @@
+"""
+Representación compacta del AST en arrays paralelos
+
+Para documentos con millones de nodos, el AST puede guardarse como una
+``ArenaAST``: cada nodo es un índice en varios arrays (tipo, padre, primer
+hijo, siguiente hermano, línea e intervalo del valor en el texto original)
+en lugar de un objeto de Python. El Validator y el HTMLGenerator la recorren
+directamente a través de una VistaNodo reutilizable que apunta a un índice
+cada vez.
+"""
+
+from array import array
+from functools import lru_cache
+from .exceptions import ParserError
+from .lexer import TokenBuffer, TokenType
+from .parser import _MANEJADORES, _NODO_POR_TOKEN, TipoNodo
+
+
+# Tipos de nodo indexados por su código
+_TIPOS = sorted(TipoNodo, key=lambda tipo: tipo.codigo)
+
+# Códigos de los tipos de nodo sin valor propio
+_SIN_VALOR = frozenset(tipo.codigo for tipo in
+                       (TipoNodo.DOCUMENTO, TipoNodo.SALTO_LINEA, TipoNodo.NEGRITA, TipoNodo.CURSIVA))
+
+_LISTA_NUM_ITEM = TipoNodo.LISTA_NUM_ITEM.codigo
+_REFERENCIAS = frozenset((TipoNodo.ENLACE.codigo, TipoNodo.IMAGEN.codigo))
+
+# Mayor valor que cabe en el array de extras; los números de lista mayores
+# se guardan aparte
+_MAXIMO_EXTRA = 2 ** 32 - 1
+
+
+class ArenaAST:
+    """
+    AST almacenado por columnas
+    
+    El nodo 0 es la raíz del documento. ``extras`` guarda el número de los
+    elementos de lista numerada y, en enlaces e imágenes, el final de la URL,
+    que empieza dos caracteres después del final del texto (tras ``](``).
+    Los números de lista que no caben en el array se guardan en
+    ``numeros_grandes``, por índice de nodo.
+    """
+    
+    __slots__ = ('fuente', 'tipos', 'padres', 'primeros_hijos', 'siguientes',
+                 'lineas', 'inicios', 'fines', 'extras', 'numeros_grandes', '_ultimos')
+    
+    def __init__(self, fuente):
+        """
+        Inicializa una arena con solo el nodo raíz
+        
+        Args:
+            fuente: Texto original al que hacen referencia los valores de los nodos
+        """
+        self.fuente = fuente
+        self.tipos = array('B')
+        self.padres = array('i')
+        self.primeros_hijos = array('i')
+        self.siguientes = array('i')
+        self.lineas = array('I')
+        self.inicios = array('I')
+        self.fines = array('I')
+        self.extras = array('I')
+        self.numeros_grandes = {}
+        
+        # Último hijo de cada nodo, solo mientras se construye la arena
+        self._ultimos = array('i')
+        self.agregar(TipoNodo.DOCUMENTO.codigo, -1, 0)
+    
+    def agregar(self, codigo, padre, linea, inicio=0, fin=0, extra=0):
+        """
+        Añade un nodo como último hijo de ``padre``
+        
+        Args:
+            codigo: Código del tipo de nodo (TipoNodo.codigo)
+            padre: Índice del nodo padre (-1 para la raíz)
+            linea: Línea del nodo (0 si no tiene)
+            inicio: Desplazamiento inicial del valor en el texto original
+            fin: Desplazamiento final del valor en el texto original
+            extra: Número de lista o final de la URL, según el tipo
+        
+        Returns:
+            Índice del nuevo nodo
+        """
+        indice = len(self.tipos)
+        self.tipos.append(codigo)
+        self.padres.append(padre)
+        self.primeros_hijos.append(-1)
+        self.siguientes.append(-1)
+        self.lineas.append(linea)
+        self.inicios.append(inicio)
+        self.fines.append(fin)
+        if extra > _MAXIMO_EXTRA:
+            self.numeros_grandes[indice] = extra
+            extra = _MAXIMO_EXTRA
+        self.extras.append(extra)
+        self._ultimos.append(-1)
+        
+        if padre >= 0:
+            ultimo = self._ultimos[padre]
+            if ultimo < 0:
+                self.primeros_hijos[padre] = indice
+            else:
+                self.siguientes[ultimo] = indice
+            self._ultimos[padre] = indice
+        
+        return indice
+    
+    def cerrar(self):
+        """Libera las estructuras que solo se usan durante la construcción"""
+        self._ultimos = None
+    
+    @property
+    def raiz(self):
+        """Vista del nodo raíz"""
+        return VistaNodo(self, 0)
+    
+    def tipo(self, indice):
+        """Devuelve el tipo de un nodo"""
+        return _TIPOS[self.tipos[indice]]
+    
+    def valor(self, indice):
+        """Devuelve el valor de un nodo copiándolo del texto original, o None si no tiene"""
+        if self.tipos[indice] in _SIN_VALOR:
+            return None
+        return self.fuente[self.inicios[indice]:self.fines[indice]]
+    
+    def url(self, indice):
+        """Devuelve la URL de un enlace o imagen, o None en los demás nodos"""
+        if self.tipos[indice] not in _REFERENCIAS:
+            return None
+        return self.fuente[self.fines[indice] + 2:self.extras[indice]]
+    
+    def numero(self, indice):
+        """Devuelve el número de un elemento de lista numerada, o None en los demás nodos"""
+        if self.tipos[indice] != _LISTA_NUM_ITEM:
+            return None
+        numero = self.extras[indice]
+        if numero == _MAXIMO_EXTRA:
+            return self.numeros_grandes.get(indice, numero)
+        return numero
+    
+    def linea(self, indice):
+        """Devuelve la línea de un nodo, o None si no tiene"""
+        return self.lineas[indice] or None
+    
+    def hijos(self, indice):
+        """Genera los índices de los hijos de un nodo, en orden"""
+        hijo = self.primeros_hijos[indice]
+        siguientes = self.siguientes
+        while hijo >= 0:
+            yield hijo
+            hijo = siguientes[hijo]
+    
+    def nbytes(self):
+        """Devuelve el tamaño en bytes de los arrays de la arena"""
+        return sum(columna.itemsize * len(columna) for columna in
+                   (self.tipos, self.padres, self.primeros_hijos, self.siguientes,
+                    self.lineas, self.inicios, self.fines, self.extras))
+    
+    def __len__(self):
+        return len(self.tipos)
+
+
+class VistaNodo:
+    """
+    Vista de un nodo de una ArenaAST con la interfaz de ASTNode
+    
+    Una misma vista se reutiliza cambiando ``indice``, de modo que recorrer
+    la arena no crea un objeto por nodo. ``hijos`` devuelve los índices de
+    los hijos, no vistas.
+    """
+    
+    __slots__ = ('arena', 'indice')
+    
+    def __init__(self, arena, indice=0):
+        self.arena = arena
+        self.indice = indice
+    
+    @property
+    def tipo(self):
+        return _TIPOS[self.arena.tipos[self.indice]]
+    
+    @property
+    def valor(self):
+        arena, indice = self.arena, self.indice
+        if arena.tipos[indice] in _SIN_VALOR:
+            return None
+        return arena.fuente[arena.inicios[indice]:arena.fines[indice]]
+    
+    @property
+    def url(self):
+        return self.arena.url(self.indice)
+    
+    @property
+    def numero(self):
+        return self.arena.numero(self.indice)
+    
+    @property
+    def linea(self):
+        return self.arena.lineas[self.indice] or None
+    
+    @property
+    def hijos(self):
+        return HijosArena(self.arena, self.indice)
+    
+    def __repr__(self):
+        return f"VistaNodo(indice={self.indice}, tipo={self.tipo}, valor={self.valor}, linea={self.linea})"
+
+
+class HijosArena:
+    """Índices de los hijos de un nodo de la arena, sin copiarlos a una lista"""
+    
+    __slots__ = ('arena', 'indice')
+    
+    def __init__(self, arena, indice):
+        self.arena = arena
+        self.indice = indice
+    
+    def __bool__(self):
+        return self.arena.primeros_hijos[self.indice] >= 0
+    
+    def __iter__(self):
+        return self.arena.hijos(self.indice)
+    
+    def __reversed__(self):
+        return reversed(list(self.arena.hijos(self.indice)))
+    
+    def __len__(self):
+        return sum(1 for _ in self.arena.hijos(self.indice))
+
+
+def vistas(arena, indices):
+    """
+    Genera una única vista que apunta sucesivamente a cada índice
+    
+    Args:
+        arena: ArenaAST de los nodos
+        indices: Iterable de índices de nodo
+    
+    Yields:
+        La misma VistaNodo, apuntando cada vez al siguiente índice
+    """
+    vista = VistaNodo(arena)
+    for indice in indices:
+        vista.indice = indice
+        yield vista
+
+
+def construir_arena(nivel_complejidad, tokens):
+    """
+    Parsea una secuencia de tokens y guarda el AST en una ArenaAST
+    
+    Produce el mismo árbol que Parser.parsear. Los valores de los nodos son
+    intervalos del texto original de los tokens; solo se copian a un texto
+    nuevo si los tokens proceden de textos distintos.
+    
+    Args:
+        nivel_complejidad: Nivel de complejidad del parser
+        tokens: TokenBuffer o iterable de tokens
+    
+    Returns:
+        ArenaAST con el documento
+    
+    Raises:
+        ParserError: Si falta el cierre de una negrita o una cursiva
+    """
+    if not isinstance(tokens, TokenBuffer):
+        tokens = _buffer_de_tokens(tokens)
+    
+    analisis = _AnalisisArena(_manejadores(nivel_complejidad), tokens)
+    while not analisis._es_fin():
+        analisis._parsear_elemento(0)
+    
+    analisis.arena.cerrar()
+    return analisis.arena
+
+
+def _buffer_de_tokens(tokens):
+    """
+    Construye un TokenBuffer a partir de tokens sueltos
+    
+    Si todos los tokens proceden del mismo texto (como los de
+    Lexer.tokenizar), el buffer reutiliza sus intervalos sin copiar nada; si
+    no, los valores se copian a un texto nuevo.
+    """
+    tokens = list(tokens)
+    fuente = tokens[0].fuente if tokens else ""
+    
+    if all(token.fuente is fuente for token in tokens):
+        buffer = TokenBuffer(fuente)
+        for token in tokens:
+            buffer.agregar(token.tipo, token.linea, token.columna, token.inicio, token.fin)
+        return buffer
+    
+    partes = []
+    posiciones = []
+    longitud = 0
+    
+    for token in tokens:
+        # El intervalo de enlaces e imágenes ya tiene la forma "texto](url"
+        valor = token.fuente[token.inicio:token.fin]
+        partes.append(valor)
+        posiciones.append((token.tipo, token.linea, token.columna, longitud, longitud + len(valor)))
+        longitud += len(valor)
+    
+    buffer = TokenBuffer("".join(partes))
+    for posicion in posiciones:
+        buffer.agregar(*posicion)
+    return buffer
+
+
+class _AnalisisArena:
+    """
+    Estado de un análisis sintáctico que escribe en una ArenaAST
+    
+    Sigue la misma gramática que el parser de objetos, pero recorre el
+    TokenBuffer por índices y sin crear objetos Token.
+    """
+    
+    def __init__(self, manejadores, buffer):
+        self.manejadores = manejadores
+        self.buffer = buffer
+        self.tipos = buffer.tipos
+        self.total = len(buffer)
+        self.posicion = 0
+        self.arena = ArenaAST(buffer.fuente)
+    
+    def _es_fin(self):
+        """Comprueba si hemos llegado al final de los tokens"""
+        return self.posicion >= self.total or self.tipos[self.posicion] == TokenType.EOF
+    
+    def _parsear_elemento(self, padre):
+        """Parsea un elemento como hijo de ``padre`` y devuelve su índice, o None"""
+        if self._es_fin():
+            return None
+        return self.manejadores[self.tipos[self.posicion]](self, padre)
+    
+    def _agregar(self, tipo, padre, inicio=0, fin=0, extra=0):
+        """Añade un nodo en la línea del token actual y avanza"""
+        posicion = self.posicion
+        self.posicion += 1
+        return self.arena.agregar(tipo.codigo, padre, self.buffer.lineas[posicion], inicio, fin, extra)
+    
+    def _saltar(self, padre):
+        """Salta un token no reconocido"""
+        self.posicion += 1
+        return None
+    
+    def _parsear_simple(self, padre):
+        """Parsea un elemento cuyo valor es el del token"""
+        posicion = self.posicion
+        tipo = _NODO_POR_TOKEN[self.tipos[posicion]]
+        return self._agregar(tipo, padre, self.buffer.inicios[posicion], self.buffer.fines[posicion])
+    
+    def _parsear_salto_linea(self, padre):
+        """Parsea un salto de línea"""
+        return self._agregar(TipoNodo.SALTO_LINEA, padre)
+    
+    def _parsear_lista_num_item(self, padre):
+        """Parsea un elemento de lista numerada: el valor del token es 'N. contenido'"""
+        inicio, fin = self.buffer.inicios[self.posicion], self.buffer.fines[self.posicion]
+        fuente = self.buffer.fuente
+        separador = fuente.index('. ', inicio, fin)
+        numero = int(fuente[inicio:separador])
+        return self._agregar(TipoNodo.LISTA_NUM_ITEM, padre, separador + 2, fin, numero)
+    
+    def _parsear_referencia(self, padre):
+        """Parsea un enlace o una imagen: el valor del token es 'texto](url'"""
+        posicion = self.posicion
+        inicio, fin = self.buffer.inicios[posicion], self.buffer.fines[posicion]
+        separador = self.buffer.fuente.index('](', inicio, fin)
+        tipo = _NODO_POR_TOKEN[self.tipos[posicion]]
+        return self._agregar(tipo, padre, inicio, separador, fin)
+    
+    def _parsear_negrita(self, padre):
+        """Parsea un texto en negrita"""
+        return self._parsear_formato(padre, TipoNodo.NEGRITA, TokenType.NEGRITA_FIN,
+                                     "Falta el cierre de negrita (**)")
+    
+    def _parsear_cursiva(self, padre):
+        """Parsea un texto en cursiva"""
+        return self._parsear_formato(padre, TipoNodo.CURSIVA, TokenType.CURSIVA_FIN,
+                                     "Falta el cierre de cursiva (*)")
+    
+    def _parsear_formato(self, padre, tipo, cierre, mensaje):
+        """
+        Parsea una negrita o cursiva y sus elementos hasta el token de cierre
+        
+        Raises:
+            ParserError: Si el documento termina antes del cierre
+        """
+        apertura = self.posicion
+        nodo = self._agregar(tipo, padre)
+        
+        while not self._es_fin() and self.tipos[self.posicion] != cierre:
+            if self._parsear_elemento(nodo) is None:
+                # Como en el parser de objetos, tras un token no reconocido se avanza otra vez
+                self.posicion += 1
+        
+        if self._es_fin():
+            raise ParserError(mensaje, self.buffer.lineas[apertura], self.buffer.valor(apertura))
+        
+        self.posicion += 1
+        return nodo
+
+
+@lru_cache(maxsize=None)
+def _manejadores(nivel_complejidad):
+    """Tabla de despacho del parser de arena para un nivel, indexada por TokenType"""
+    tabla = [_AnalisisArena._saltar] * (max(TokenType) + 1)
+    # Se usa la tabla del parser de objetos: cada manejador tiene aquí un
+    # método con el mismo nombre
+    for nivel, tipos, manejador in _MANEJADORES:
+        if nivel <= nivel_complejidad:
+            for tipo in tipos:
+                tabla[tipo] = getattr(_AnalisisArena, manejador.__name__)
+    return tuple(tabla)
@@ -33,7 +33,7 @@ class ASTGenerator:
         
         Args:
             texto: Texto a analizar
-            
+        
         Returns:
             Nodo raíz del AST
         """
@@ -41,26 +41,27 @@ class ASTGenerator:
         ast = self.parser.parsear(tokens)
         return ast
     
-    def imprimir_ast(self, nodo, nivel=0):
+    def imprimir_ast(self, nodo, nivel=0, salida=None):
         """
         Imprime el AST con formato legible
         
         Args:
             nodo: Nodo a imprimir
             nivel: Nivel de indentación
+            salida: Archivo donde escribir (por defecto, la salida estándar)
         """
         indent = "  " * nivel
         
         # Imprimir información del nodo
-        if hasattr(nodo, 'url'):
-            print(f"{indent}- {nodo.tipo}: {nodo.valor} (URL: {nodo.url})")
-        elif hasattr(nodo, 'numero'):
-            print(f"{indent}- {nodo.tipo}: {nodo.valor} (Número: {nodo.numero})")
+        if nodo.url is not None:
+            print(f"{indent}- {nodo.tipo}: {nodo.valor} (URL: {nodo.url})", file=salida)
+        elif nodo.numero is not None:
+            print(f"{indent}- {nodo.tipo}: {nodo.valor} (Número: {nodo.numero})", file=salida)
         elif nodo.valor:
-            print(f"{indent}- {nodo.tipo}: {nodo.valor}")
+            print(f"{indent}- {nodo.tipo}: {nodo.valor}", file=salida)
         else:
-            print(f"{indent}- {nodo.tipo}")
+            print(f"{indent}- {nodo.tipo}", file=salida)
         
         # Imprimir hijos recursivamente
         for hijo in nodo.hijos:
-            self.imprimir_ast(hijo, nivel + 1)
+            self.imprimir_ast(hijo, nivel + 1, salida)
@@ -0,0 +1,199 @@
+"""
+Caché de compilaciones direccionada por contenido
+
+La clave de cada entrada es un hash del texto de entrada, el nivel de
+complejidad y la versión del compilador, por lo que un cambio en cualquiera
+de ellos produce una entrada distinta y nunca se devuelve HTML obsoleto.
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+
+from . import __version__
+
+
+def clave_compilacion(texto, nivel_complejidad):
+    """
+    Calcula la clave de caché de una compilación
+    
+    Args:
+        texto: Texto de entrada
+        nivel_complejidad: Nivel de complejidad del compilador
+        
+    Returns:
+        Hash hexadecimal que identifica la compilación
+    """
+    resumen = hashlib.sha256(f"{__version__}\0{nivel_complejidad}\0".encode('utf-8'))
+    resumen.update(texto.encode('utf-8', 'surrogatepass'))
+    return resumen.hexdigest()
+
+
+class CacheLRU:
+    """
+    Caché en memoria con desalojo LRU limitado por tamaño en bytes
+    
+    Es segura para su uso desde varios hilos.
+    """
+    
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        Inicializa la caché
+        
+        Args:
+            max_bytes: Tamaño máximo aproximado de los valores almacenados
+        """
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self._entradas = OrderedDict()
+        self._cerrojo = threading.Lock()
+    
+    def obtener(self, clave):
+        """
+        Busca una entrada y la marca como usada recientemente
+        
+        Args:
+            clave: Clave de la compilación
+            
+        Returns:
+            HTML almacenado, o None si no está en la caché
+        """
+        with self._cerrojo:
+            html = self._entradas.get(clave)
+            if html is None:
+                self.fallos += 1
+                return None
+            
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return html
+    
+    def guardar(self, clave, html):
+        """
+        Almacena una entrada, desalojando las menos usadas si es necesario
+        
+        Las entradas mayores que el tamaño máximo de la caché no se almacenan.
+        
+        Args:
+            clave: Clave de la compilación
+            html: HTML generado
+        """
+        tamano = sys.getsizeof(html)
+        if tamano > self.max_bytes:
+            return
+        
+        with self._cerrojo:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self.bytes -= sys.getsizeof(anterior)
+            
+            self._entradas[clave] = html
+            self.bytes += tamano
+            
+            while self.bytes > self.max_bytes:
+                _, desalojado = self._entradas.popitem(last=False)
+                self.bytes -= sys.getsizeof(desalojado)
+                self.desalojos += 1
+    
+    def limpiar(self):
+        """Elimina todas las entradas sin reiniciar los contadores"""
+        with self._cerrojo:
+            self._entradas.clear()
+            self.bytes = 0
+    
+    def estadisticas(self):
+        """Devuelve los contadores de la caché como diccionario"""
+        with self._cerrojo:
+            return {
+                'entradas': len(self._entradas),
+                'bytes': self.bytes,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'desalojos': self.desalojos
+            }
+    
+    def __len__(self):
+        return len(self._entradas)
+
+
+class CacheDisco:
+    """
+    Caché persistente en disco, pensada para compilaciones por lotes desde la CLI
+    
+    Cada entrada se guarda como un archivo cuyo nombre es la clave. Las
+    escrituras son atómicas, por lo que varios procesos pueden compartir
+    el mismo directorio.
+    """
+    
+    def __init__(self, directorio):
+        """
+        Inicializa la caché, creando el directorio si no existe
+        
+        Args:
+            directorio: Directorio donde se guardan las entradas
+        """
+        self.directorio = directorio
+        self.aciertos = 0
+        self.fallos = 0
+        os.makedirs(directorio, exist_ok=True)
+    
+    def _ruta(self, clave):
+        """Devuelve la ruta del archivo de una entrada"""
+        return os.path.join(self.directorio, clave + '.html')
+    
+    def obtener(self, clave):
+        """
+        Busca una entrada en el disco
+        
+        Args:
+            clave: Clave de la compilación
+            
+        Returns:
+            HTML almacenado, o None si no está en la caché
+        """
+        try:
+            with open(self._ruta(clave), 'r', encoding='utf-8', newline='') as f:
+                html = f.read()
+        except FileNotFoundError:
+            self.fallos += 1
+            return None
+        
+        self.aciertos += 1
+        return html
+    
+    def guardar(self, clave, html):
+        """
+        Almacena una entrada en el disco
+        
+        Args:
+            clave: Clave de la compilación
+            html: HTML generado
+        """
+        descriptor, temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8', newline='') as f:
+                f.write(html)
+            os.replace(temporal, self._ruta(clave))
+        except BaseException:
+            os.unlink(temporal)
+            raise
+    
+    def limpiar(self):
+        """Elimina todas las entradas del directorio"""
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith('.html'):
+                os.unlink(os.path.join(self.directorio, nombre))
+    
+    def estadisticas(self):
+        """Devuelve los contadores de la caché como diccionario"""
+        return {
+            'directorio': self.directorio,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos
+        }
@@ -2,23 +2,34 @@
 Módulo principal que coordina todo el proceso de compilación
 """
 
+import mmap
+import os
+import threading
 from .lexer import Lexer
 from .parser import Parser
-from .validator import Validator
+from .validator import Validator, LIMITE_DIAGNOSTICOS
 from .ast_generator import ASTGenerator
 from .html_generator import HTMLGenerator
+from .estadisticas import CompileStats, contar_nodos
+from .incremental import EstadoCompilacion
 from .exceptions import SimpleDocError
 
 
+# Tamaño a partir del cual compilar_archivo proyecta la entrada en memoria
+UMBRAL_MAPEO = 64 * 1024 * 1024
+
+
 class Compiler:
     """
     Compilador principal para el lenguaje SimpleDoc
     
     Coordina todo el proceso de compilación desde el texto de entrada
-    hasta la generación del código HTML.
+    hasta la generación del código HTML. Ninguna etapa guarda estado entre
+    llamadas, así que una instancia puede compartirse entre hilos.
     """
     
-    def __init__(self, nivel_complejidad=3, modo_debug=False):
+    def __init__(self, nivel_complejidad=3, modo_debug=False, cache=None, al_completar_etapa=None,
+                 al_iniciar_etapa=None):
         """
         Inicializa el compilador con un nivel de complejidad específico
         
@@ -28,9 +39,21 @@ class Compiler:
                 2 - Intermedio: Básico + formateo (negrita, cursiva) y listas
                 3 - Avanzado: Intermedio + enlaces, imágenes y bloques de código
             modo_debug: Indica si el compilador debe imprimir información de depuración
+            cache: Caché de compilaciones opcional (CacheLRU, CacheDisco o cualquier
+                objeto con métodos obtener y guardar). Se ignora en modo debug.
+            al_completar_etapa: Función opcional que recibe el nombre de cada etapa
+                y su MedidaEtapa al terminarla. Si se indica, todas las
+                compilaciones se miden como en compilar_con_estadisticas.
+            al_iniciar_etapa: Función opcional que recibe el nombre de cada etapa
+                justo antes de empezarla (por ejemplo, para perfilarlas por
+                separado). Como al_completar_etapa, hace que se midan todas
+                las compilaciones.
         """
         self.nivel_complejidad = min(max(nivel_complejidad, 1), 3)
         self.modo_debug = modo_debug
+        self.cache = cache
+        self.al_completar_etapa = al_completar_etapa
+        self.al_iniciar_etapa = al_iniciar_etapa
         
         # Inicializar componentes
         self.lexer = Lexer(nivel_complejidad)
@@ -39,12 +62,14 @@ class Compiler:
         self.ast_generator = ASTGenerator(nivel_complejidad)
         self.html_generator = HTMLGenerator(nivel_complejidad)
     
-    def compilar(self, texto_entrada):
+    def compilar(self, texto_entrada, estadisticas=None):
         """
         Compila un texto de entrada en SimpleDoc a HTML
         
         Args:
             texto_entrada: Texto a compilar
+            estadisticas: CompileStats opcional que se rellena con las medidas
+                de cada etapa (ver compilar_con_estadisticas)
             
         Returns:
             Código HTML generado
@@ -52,11 +77,22 @@ class Compiler:
         Raises:
             SimpleDocError: Si ocurre algún error durante la compilación
         """
+        if estadisticas is not None or self._con_etapas():
+            return self._compilar_medido(texto_entrada, estadisticas or CompileStats())[0]
+        
+        clave = self._clave_cache(texto_entrada)
+        if clave is not None:
+            html = self.cache.obtener(clave)
+            if html is not None:
+                return html
+        
         try:
-            # Paso 1: Análisis léxico
-            tokens = self.lexer.tokenizar(texto_entrada)
+            # Paso 1: Análisis léxico. Los tokens se generan a medida que el
+            # parser los consume, sin conservar la lista completa
+            tokens = self.lexer.iter_tokens(texto_entrada)
             
             if self.modo_debug:
+                tokens = list(tokens)
                 print("--- Tokens generados ---")
                 for token in tokens:
                     print(token)
@@ -81,6 +117,9 @@ class Compiler:
                 print("\n--- HTML generado ---")
                 print(html[:200] + "..." if len(html) > 200 else html)
             
+            if clave is not None:
+                self.cache.guardar(clave, html)
+            
             return html
             
         except SimpleDocError as e:
@@ -88,7 +127,252 @@ class Compiler:
                 print(f"\n--- Error de compilación ---\n{str(e)}")
             raise
     
-    def compilar_archivo(self, ruta_entrada, ruta_salida=None):
+    def compilar_con_diagnosticos(self, texto_entrada, limite=LIMITE_DIAGNOSTICOS, estadisticas=None):
+        """
+        Compila un texto recogiendo todos los problemas de validación
+        
+        A diferencia de compilar, la validación no se detiene en el primer
+        error, de modo que un editor puede mostrar todos los problemas del
+        documento con una sola compilación.
+        
+        Args:
+            texto_entrada: Texto a compilar
+            limite: Número máximo de diagnósticos a recoger
+            estadisticas: CompileStats opcional que se rellena con las medidas
+                de cada etapa (ver compilar_con_estadisticas)
+            
+        Returns:
+            Tupla (html, diagnosticos); html es None si hay diagnósticos
+            
+        Raises:
+            SimpleDocError: Si ocurre un error léxico o sintáctico
+        """
+        if estadisticas is not None or self._con_etapas():
+            return self._compilar_medido(texto_entrada, estadisticas or CompileStats(), limite)
+        
+        # Solo se almacenan documentos válidos, así que un acierto no tiene diagnósticos
+        clave = self._clave_cache(texto_entrada)
+        if clave is not None:
+            html = self.cache.obtener(clave)
+            if html is not None:
+                return html, []
+        
+        ast = self.parser.parsear(self.lexer.iter_tokens(texto_entrada))
+        
+        diagnosticos = self.validator.validar(ast, collect=True, limite=limite)
+        if diagnosticos:
+            return None, diagnosticos
+        
+        html = self.html_generator.generar(ast)
+        if clave is not None:
+            self.cache.guardar(clave, html)
+        
+        return html, diagnosticos
+    
+    def compilar_con_estadisticas(self, texto_entrada):
+        """
+        Compila un texto midiendo cada etapa de la compilación
+        
+        Para medir el análisis léxico por separado, los tokens se generan
+        completos (en un TokenBuffer) antes del análisis sintáctico en lugar de
+        consumirse a medida que se producen.
+        
+        Args:
+            texto_entrada: Texto a compilar
+            
+        Returns:
+            Tupla (html, estadisticas) con el CompileStats de la compilación
+            
+        Raises:
+            SimpleDocError: Si ocurre algún error durante la compilación
+        """
+        estadisticas = CompileStats()
+        html = self.compilar(texto_entrada, estadisticas)
+        return html, estadisticas
+    
+    def compilar_con_memoria(self, texto_entrada, limite_sitios=None):
+        """
+        Compila un texto registrando la memoria de cada etapa con tracemalloc
+        
+        Para cada etapa se obtienen el pico y la memoria retenida, los sitios
+        del código que más memoria reservaron y los tokens y objetos ASTNode
+        vivos al terminarla (ver simpledoc.memoria). No se consulta la caché,
+        para medir siempre la compilación completa. Las funciones
+        al_iniciar_etapa y al_completar_etapa del compilador no se llaman.
+        
+        Args:
+            texto_entrada: Texto a compilar
+            limite_sitios: Número de sitios de reserva por etapa (por defecto, memoria.SITIOS)
+            
+        Returns:
+            Tupla (html, InformeMemoria)
+            
+        Raises:
+            SimpleDocError: Si ocurre algún error durante la compilación
+        """
+        from .memoria import SITIOS, InformeMemoria
+        
+        informe = InformeMemoria(SITIOS if limite_sitios is None else limite_sitios)
+        informe.iniciar()
+        try:
+            html, _ = self._compilar_medido(texto_entrada, CompileStats(), usar_cache=False,
+                                            observadores=(informe.al_completar_etapa, informe.al_iniciar_etapa))
+        finally:
+            informe.detener()
+        return html, informe
+    
+    def _compilar_medido(self, texto_entrada, estadisticas, limite=None, usar_cache=True, observadores=None):
+        """
+        Compila un texto rellenando sus estadísticas
+        
+        Args:
+            texto_entrada: Texto a compilar
+            estadisticas: CompileStats que se rellena
+            limite: Si es None, la validación se detiene en el primer error;
+                si no, se recogen hasta ese número de diagnósticos
+            usar_cache: Si es False, no se consulta ni se actualiza la caché
+            observadores: Tupla (al_completar_etapa, al_iniciar_etapa) que
+                sustituye a las funciones del compilador
+            
+        Returns:
+            Tupla (html, diagnosticos); html es None si hay diagnósticos
+        """
+        if observadores is None:
+            observadores = (self.al_completar_etapa, self.al_iniciar_etapa)
+        estadisticas.bytes_entrada = len(texto_entrada.encode('utf-8'))
+        
+        clave = self._clave_cache(texto_entrada) if usar_cache else None
+        if clave is not None:
+            html = self.cache.obtener(clave)
+            estadisticas.acierto_cache = html is not None
+            if html is not None:
+                estadisticas.bytes_salida = len(html.encode('utf-8'))
+                return html, []
+        
+        # La salida de depuración se imprime fuera de las etapas para no medirla
+        try:
+            with estadisticas.medir('lexico', *observadores):
+                tokens = self.lexer.tokenizar_compacto(texto_entrada)
+            estadisticas.tokens = len(tokens)
+            
+            if self.modo_debug:
+                print("--- Tokens generados ---")
+                for token in tokens:
+                    print(token)
+            
+            with estadisticas.medir('sintactico', *observadores):
+                ast = self.parser.parsear(tokens)
+            estadisticas.nodos = contar_nodos(ast)
+            
+            if self.modo_debug:
+                print("\n--- AST generado ---")
+                self.ast_generator.imprimir_ast(ast)
+            
+            with estadisticas.medir('validacion', *observadores):
+                if limite is None:
+                    diagnosticos = []
+                    self.validator.validar(ast)
+                else:
+                    diagnosticos = self.validator.validar(ast, collect=True, limite=limite)
+            if diagnosticos:
+                if self.modo_debug:
+                    print("\n--- Diagnósticos de validación ---")
+                    for diagnostico in diagnosticos:
+                        print(diagnostico)
+                return None, diagnosticos
+            
+            if self.modo_debug:
+                print("\n--- Validación exitosa ---")
+            
+            with estadisticas.medir('generacion', *observadores):
+                html = self.html_generator.generar(ast)
+            estadisticas.bytes_salida = len(html.encode('utf-8'))
+            
+            if self.modo_debug:
+                print("\n--- HTML generado ---")
+                print(html[:200] + "..." if len(html) > 200 else html)
+            
+        except SimpleDocError as e:
+            if self.modo_debug:
+                print(f"\n--- Error de compilación ---\n{str(e)}")
+            raise
+        
+        if clave is not None:
+            self.cache.guardar(clave, html)
+        
+        return html, diagnosticos
+    
+    def compilar_stream(self, entrada, salida):
+        """
+        Compila un documento SimpleDoc a HTML de forma incremental
+        
+        Encadena el lexer, el parser, el validador y el generador bloque a
+        bloque: cada línea se lee, se analiza y se escribe como HTML en cuanto
+        su bloque se cierra, por lo que la memoria utilizada no depende del
+        tamaño del documento. Si se produce un error, el HTML escrito hasta ese
+        momento queda incompleto.
+        
+        Args:
+            entrada: Iterable de texto, por ejemplo un archivo abierto en modo texto
+            salida: Objeto con método write() donde se escribe el HTML
+            
+        Raises:
+            SimpleDocError: Si ocurre algún error durante la compilación
+        """
+        tokens = self.lexer.iter_tokens(entrada)
+        nodos = self.validator.validar_bloques(self.parser.iter_nodos(tokens))
+        self.html_generator.generar_stream(nodos, salida)
+    
+    def compilar_incremental(self, texto_entrada):
+        """
+        Compila un texto conservando el estado necesario para recompilarlo por partes
+        
+        Args:
+            texto_entrada: Texto a compilar
+            
+        Returns:
+            EstadoCompilacion; su método html() devuelve el mismo HTML que compilar
+            
+        Raises:
+            SimpleDocError: Si ocurre algún error durante la compilación
+        """
+        return EstadoCompilacion.desde_texto(self, texto_entrada)
+    
+    def recompilar(self, estado_previo, ediciones):
+        """
+        Recompila un documento tras editar rangos de líneas
+        
+        Solo se analizan las líneas editadas y solo se regenera el HTML de los
+        bloques afectados, por lo que el coste depende del tamaño de la edición
+        y no del documento. El estado se actualiza en el sitio.
+        
+        Args:
+            estado_previo: EstadoCompilacion devuelto por compilar_incremental
+            ediciones: Iterable de tuplas (inicio, fin, nuevas_lineas) que
+                sustituyen las líneas [inicio, fin) (índices desde 0)
+            
+        Returns:
+            Lista de cambios en los fragmentos de HTML, uno por edición
+            
+        Raises:
+            SimpleDocError: Si ocurre algún error durante la compilación
+        """
+        return estado_previo.aplicar(self, ediciones)
+    
+    def _con_etapas(self):
+        """Indica si hay funciones que observan las etapas de cada compilación"""
+        return self.al_completar_etapa is not None or self.al_iniciar_etapa is not None
+    
+    def _clave_cache(self, texto_entrada):
+        """Devuelve la clave de caché del texto, o None si no se usa caché"""
+        if self.cache is None or self.modo_debug:
+            return None
+        
+        # La caché (y hashlib) solo se importa si el compilador la usa
+        from .cache import clave_compilacion
+        return clave_compilacion(texto_entrada, self.nivel_complejidad)
+    
+    def compilar_archivo(self, ruta_entrada, ruta_salida=None, mapear=None, estadisticas=None):
         """
         Compila un archivo de entrada en SimpleDoc a HTML
         
@@ -96,6 +380,16 @@ class Compiler:
             ruta_entrada: Ruta del archivo de entrada
             ruta_salida: Ruta del archivo de salida. Si es None, se usa el nombre
                          del archivo de entrada con extensión .html
+            mapear: Si es True, el archivo se proyecta en memoria con mmap y se
+                compila sin cargarlo como texto (ver _compilar_mapeado), sin
+                caché ni salida de depuración; si es None, solo se hace con
+                archivos de al menos UMBRAL_MAPEO bytes y si el compilador no
+                tiene caché ni modo de depuración, no se piden estadísticas y
+                no se observan las etapas, de modo que el resultado no depende
+                del tamaño del archivo
+            estadisticas: CompileStats opcional que se rellena con las medidas
+                de cada etapa. No es compatible con mapear=True, porque
+                entonces las etapas se ejecutan entrelazadas.
             
         Returns:
             Ruta del archivo de salida
@@ -103,7 +397,11 @@ class Compiler:
         Raises:
             SimpleDocError: Si ocurre algún error durante la compilación
             IOError: Si ocurre un error de E/S al leer o escribir archivos
+            ValueError: Si se piden estadísticas con mapear=True
         """
+        if mapear and estadisticas is not None:
+            raise ValueError("Las estadísticas por etapa no están disponibles al compilar con mmap")
+        
         if not ruta_salida:
             # Cambiar la extensión a .html
             if ruta_entrada.endswith(('.sd', '.simpledoc')):
@@ -112,12 +410,19 @@ class Compiler:
                 ruta_salida = ruta_entrada + '.html'
         
         try:
+            if mapear is None:
+                mapear = (estadisticas is None and self.cache is None and not self.modo_debug
+                          and not self._con_etapas() and os.path.getsize(ruta_entrada) >= UMBRAL_MAPEO)
+            if mapear:
+                self._compilar_mapeado(ruta_entrada, ruta_salida)
+                return ruta_salida
+            
             # Leer archivo de entrada
             with open(ruta_entrada, 'r', encoding='utf-8') as f:
                 texto_entrada = f.read()
             
             # Compilar
-            html = self.compilar(texto_entrada)
+            html = self.compilar(texto_entrada, estadisticas)
             
             # Escribir archivo de salida
             with open(ruta_salida, 'w', encoding='utf-8') as f:
@@ -129,3 +434,82 @@ class Compiler:
             raise IOError(f"Error de E/S: {str(e)}")
         except SimpleDocError:
             raise
+    
+    def _compilar_mapeado(self, ruta_entrada, ruta_salida):
+        """
+        Compila un archivo proyectado en memoria, sin cargarlo como texto
+        
+        El lexer analiza directamente los bytes del archivo y el documento se
+        compila bloque a bloque como en compilar_stream, de modo que la memoria
+        no depende del tamaño de la entrada. El HTML se escribe en un archivo
+        temporal que solo sustituye a la salida si la compilación termina sin
+        errores. No se usan la caché ni el modo de depuración.
+        """
+        with open(ruta_entrada, 'rb') as f:
+            # mmap no admite archivos vacíos
+            datos = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+        
+        temporal = f"{ruta_salida}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if hasattr(datos, 'madvise'):
+                datos.madvise(mmap.MADV_SEQUENTIAL)
+            
+            with open(temporal, 'w', encoding='utf-8') as salida:
+                tokens = self.lexer.iter_tokens_binario(datos)
+                nodos = self.validator.validar_bloques(self.parser.iter_nodos(tokens))
+                self.html_generator.generar_stream(nodos, salida)
+            os.replace(temporal, ruta_salida)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.unlink(temporal)
+            raise
+        finally:
+            if isinstance(datos, mmap.mmap):
+                try:
+                    datos.close()
+                except BufferError:
+                    # La traza de un error aún referencia los bytes; se cierra al liberarla
+                    pass
+
+
+class RegistroCompiladores:
+    """
+    Registro de compiladores compartidos, uno por nivel de complejidad
+    
+    Evita construir un compilador completo (lexer, parser, validador y
+    generadores) en cada petición. Los compiladores se crean la primera vez
+    que se piden y después se reutilizan desde cualquier hilo.
+    """
+    
+    def __init__(self, cache=None):
+        """
+        Inicializa un registro vacío
+        
+        Args:
+            cache: Caché de compilaciones compartida por todos los compiladores
+        """
+        self.cache = cache
+        self._compiladores = {}
+        self._cerrojo = threading.Lock()
+    
+    def obtener(self, nivel_complejidad=3):
+        """
+        Devuelve el compilador de un nivel de complejidad, creándolo si no existe
+        
+        Args:
+            nivel_complejidad: Nivel de complejidad del compilador (1-3)
+            
+        Returns:
+            Compiler compartido para ese nivel
+        """
+        nivel = min(max(nivel_complejidad, 1), 3)
+        compiler = self._compiladores.get(nivel)
+        
+        if compiler is None:
+            with self._cerrojo:
+                compiler = self._compiladores.get(nivel)
+                if compiler is None:
+                    compiler = Compiler(nivel, cache=self.cache)
+                    self._compiladores[nivel] = compiler
+        
+        return compiler
@@ -0,0 +1,142 @@
+"""
+Estadísticas de compilación de SimpleDoc
+
+Mide el tiempo de pared y de CPU de cada etapa de la compilación (análisis
+léxico, análisis sintáctico, validación y generación de HTML), el número de
+tokens y de nodos, los bytes de entrada y de salida y el uso de la caché.
+Solo se recogen cuando se piden, de modo que la compilación normal no paga
+ningún coste por ellas.
+"""
+
+import time
+from contextlib import contextmanager
+
+
+# Etapas de la compilación, en el orden en que se ejecutan
+ETAPAS = ('lexico', 'sintactico', 'validacion', 'generacion')
+
+
+class MedidaEtapa:
+    """Tiempo empleado en una etapa de la compilación"""
+    
+    __slots__ = ('segundos', 'segundos_cpu')
+    
+    def __init__(self, segundos, segundos_cpu):
+        self.segundos = segundos
+        self.segundos_cpu = segundos_cpu
+    
+    def __repr__(self):
+        return f"MedidaEtapa(segundos={self.segundos:.6f}, segundos_cpu={self.segundos_cpu:.6f})"
+
+
+class CompileStats:
+    """
+    Estadísticas de una compilación
+    
+    Se pasa vacía a Compiler.compilar o Compiler.compilar_con_diagnosticos,
+    que la rellenan etapa a etapa; Compiler.compilar_con_estadisticas la crea
+    y la devuelve junto al HTML. Si la compilación falla, conserva las etapas
+    que llegaron a completarse.
+    """
+    
+    __slots__ = ('etapas', 'tokens', 'nodos', 'bytes_entrada', 'bytes_salida', 'acierto_cache')
+    
+    def __init__(self):
+        # Medidas por nombre de etapa, en el orden en que se completaron
+        self.etapas = {}
+        self.tokens = 0
+        self.nodos = 0
+        self.bytes_entrada = 0
+        self.bytes_salida = 0
+        # None si el compilador no usa caché
+        self.acierto_cache = None
+    
+    @property
+    def segundos(self):
+        """Tiempo de pared total de las etapas medidas"""
+        return sum(medida.segundos for medida in self.etapas.values())
+    
+    @property
+    def segundos_cpu(self):
+        """Tiempo de CPU total de las etapas medidas"""
+        return sum(medida.segundos_cpu for medida in self.etapas.values())
+    
+    @contextmanager
+    def medir(self, etapa, al_completar_etapa=None, al_iniciar_etapa=None):
+        """
+        Mide el bloque de código de una etapa
+        
+        El tiempo de CPU es el del hilo actual, así que no incluye el de otras
+        compilaciones que se ejecuten en paralelo en el mismo proceso.
+        
+        Args:
+            etapa: Nombre de la etapa (uno de ETAPAS)
+            al_completar_etapa: Función opcional que recibe el nombre de la
+                etapa y su MedidaEtapa cuando termina sin errores
+            al_iniciar_etapa: Función opcional que recibe el nombre de la
+                etapa justo antes de empezar a medirla
+        """
+        if al_iniciar_etapa is not None:
+            al_iniciar_etapa(etapa)
+        
+        inicio_cpu = time.thread_time()
+        inicio = time.perf_counter()
+        yield
+        medida = MedidaEtapa(time.perf_counter() - inicio, time.thread_time() - inicio_cpu)
+        self.etapas[etapa] = medida
+        
+        if al_completar_etapa is not None:
+            al_completar_etapa(etapa, medida)
+    
+    def a_diccionario(self):
+        """Devuelve las estadísticas como diccionario serializable a JSON"""
+        return {
+            'etapas': {
+                etapa: {'segundos': medida.segundos, 'segundos_cpu': medida.segundos_cpu}
+                for etapa, medida in self.etapas.items()
+            },
+            'segundos': self.segundos,
+            'segundos_cpu': self.segundos_cpu,
+            'tokens': self.tokens,
+            'nodos': self.nodos,
+            'bytes_entrada': self.bytes_entrada,
+            'bytes_salida': self.bytes_salida,
+            'acierto_cache': self.acierto_cache
+        }
+    
+    def resumen(self):
+        """Devuelve una tabla legible con el tiempo de cada etapa y los contadores"""
+        lineas = [f"{'etapa':<12} {'pared (ms)':>11} {'CPU (ms)':>10}"]
+        for etapa, medida in self.etapas.items():
+            lineas.append(f"{etapa:<12} {medida.segundos * 1000:>11.2f} {medida.segundos_cpu * 1000:>10.2f}")
+        lineas.append(f"{'total':<12} {self.segundos * 1000:>11.2f} {self.segundos_cpu * 1000:>10.2f}")
+        
+        cache = {None: "sin caché", True: "acierto", False: "fallo"}[self.acierto_cache]
+        lineas.append(f"{self.tokens} tokens, {self.nodos} nodos, {self.bytes_entrada} bytes de entrada, "
+                      f"{self.bytes_salida} bytes de salida, caché: {cache}")
+        return "\n".join(lineas)
+    
+    def __repr__(self):
+        return (f"CompileStats(segundos={self.segundos:.6f}, tokens={self.tokens}, nodos={self.nodos}, "
+                f"acierto_cache={self.acierto_cache})")
+
+
+def contar_nodos(ast):
+    """
+    Cuenta los nodos de un AST, incluida la raíz
+    
+    Args:
+        ast: Nodo raíz del AST
+    
+    Returns:
+        Número de nodos
+    """
+    total = 0
+    pendientes = [ast]
+    
+    while pendientes:
+        nodo = pendientes.pop()
+        total += 1
+        pendientes.extend(nodo.hijos)
+    
+    return total
@@ -41,6 +41,7 @@ class ValidationError(SimpleDocError):
     def __init__(self, message, element=None, line_number=None):
         self.element = element
         self.line_number = line_number
+        self.detail = message
         
         if element is not None and line_number is not None:
             message = f"Error de validación en línea {line_number}, elemento '{element}': {message}"
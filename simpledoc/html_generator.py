@@ -3,13 +3,25 @@ Módulo para la generación de código HTML a partir del AST
 """
 
 import html
+from .arena import ArenaAST, VistaNodo, vistas
+from .parser import TipoNodo, tabla_por_tipo
+
+
+CABECERA_HTML = '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="UTF-8">\n<title>Documento SimpleDoc</title>\n</head>\n<body>\n'
+PIE_HTML = '</body>\n</html>'
+
+# Elementos de bloque que cierran un párrafo abierto
+BLOQUES = ("TITULO1", "TITULO2", "TITULO3", "LISTA_ITEM", "LISTA_NUM_ITEM", "CODIGO_BLOQUE")
 
 
 class HTMLGenerator:
     """
     Generador de código HTML a partir del AST
     
-    Transforma un árbol de sintaxis abstracta en código HTML.
+    Transforma un árbol de sintaxis abstracta en código HTML. El árbol se
+    recorre con una pila explícita, sin recursión, y cada nodo escribe su
+    HTML en un único destino, de modo que el formato anidado no crea cadenas
+    intermedias ni está limitado por la profundidad de recursión.
     """
     
     def __init__(self, nivel_complejidad=3):
@@ -23,178 +35,281 @@ class HTMLGenerator:
                 3 - Avanzado: Intermedio + enlaces y bloques de código
         """
         self.nivel_complejidad = min(max(nivel_complejidad, 1), 3)
+        
+        # Visitante de cada tipo de nodo permitido en este nivel; los demás no generan HTML
+        visitantes = {
+            "TEXTO": self._visitar_texto,
+            "SALTO_LINEA": self._visitar_salto_linea,
+            "TITULO1": self._visitar_titulo,
+            "TITULO2": self._visitar_titulo,
+            "TITULO3": self._visitar_titulo,
+        }
+        
+        if self.nivel_complejidad >= 2:
+            visitantes.update({
+                "NEGRITA": self._visitar_negrita,
+                "CURSIVA": self._visitar_cursiva,
+                "LISTA_ITEM": self._visitar_lista_item,
+                "LISTA_NUM_ITEM": self._visitar_lista_num_item,
+            })
+        
+        if self.nivel_complejidad >= 3:
+            visitantes.update({
+                "CODIGO_BLOQUE": self._visitar_codigo_bloque,
+                "ENLACE": self._visitar_enlace,
+                "IMAGEN": self._visitar_imagen,
+            })
+        
+        # Tabla densa indexada por TipoNodo.codigo
+        self.visitantes = tabla_por_tipo(visitantes)
     
-    def generar(self, ast):
+    def generar(self, ast, salida=None):
         """
         Genera código HTML a partir del AST
         
         Args:
-            ast: Árbol de sintaxis abstracta
-            
+            ast: Árbol de sintaxis abstracta o ArenaAST
+            salida: Objeto con método write() donde escribir el HTML (opcional)
+        
         Returns:
-            Código HTML generado
+            Código HTML generado, o None si se escribió en ``salida``
         """
-        return self._generar_nodo(ast)
+        partes = []
+        escribir = salida.write if salida is not None else partes.append
+        
+        if ast.__class__ is ArenaAST:
+            self._escribir_documento(vistas(ast, ast.hijos(0)), escribir)
+        elif ast.tipo is TipoNodo.DOCUMENTO:
+            self._escribir_documento(ast.hijos, escribir)
+        else:
+            self.escribir_nodo(ast, escribir)
+        
+        return "".join(partes) if salida is None else None
     
-    def _generar_nodo(self, nodo, dentro_de_parrafo=False):
+    def escribir_nodo(self, nodo, escribir):
         """
-        Genera código HTML para un nodo específico del AST
+        Escribe el HTML de un nodo y sus descendientes
+        
+        Cada visitante devuelve el HTML que precede a los hijos del nodo y
+        apila la etiqueta de cierre y los hijos. La pila contiene nodos
+        pendientes de visitar y cadenas que se escriben tal cual al sacarlas.
         
         Args:
-            nodo: Nodo a procesar
-            dentro_de_parrafo: Indica si el nodo está dentro de un párrafo
-            
-        Returns:
-            Código HTML para el nodo
+            nodo: Nodo a procesar (ASTNode o VistaNodo de una ArenaAST)
+            escribir: Función que recibe cada fragmento de HTML
         """
-        if nodo.tipo == "DOCUMENTO":
-            return self._generar_documento(nodo)
-        
-        elif nodo.tipo == "TEXTO":
-            return html.escape(nodo.valor)
+        visitante = self.visitantes[nodo.tipo.codigo]
+        if visitante is None:
+            return
         
-        elif nodo.tipo == "SALTO_LINEA":
-            return "\n"
+        pila = []
+        escribir(visitante(nodo, pila))
+        if pila:
+            self._recorrer(pila, escribir, nodo if nodo.__class__ is VistaNodo else None)
+    
+    def _recorrer(self, pila, escribir, vista=None):
+        """
+        Visita los nodos de la pila hasta vaciarla
         
-        # Nivel de complejidad 1
-        elif nodo.tipo == "TITULO1":
-            return f"<h1>{html.escape(nodo.valor)}</h1>\n"
+        Con una ``vista``, los hijos apilados son índices de su ArenaAST y la
+        misma vista se apunta a cada uno antes de visitarlo.
+        """
+        visitantes = self.visitantes
+        while pila:
+            actual = pila.pop()
+            if actual.__class__ is str:
+                escribir(actual)
+                continue
+            
+            if vista is not None:
+                vista.indice = actual
+                actual = vista
+            
+            visitante = visitantes[actual.tipo.codigo]
+            if visitante is not None:
+                escribir(visitante(actual, pila))
+    
+    def generar_stream(self, nodos, salida):
+        """
+        Genera el documento HTML de forma incremental
         
-        elif nodo.tipo == "TITULO2":
-            return f"<h2>{html.escape(nodo.valor)}</h2>\n"
+        Escribe la cabecera de inmediato y cada bloque (título, lista, párrafo,
+        bloque de código) en cuanto se cierra, sin construir la cadena completa.
         
-        elif nodo.tipo == "TITULO3":
-            return f"<h3>{html.escape(nodo.valor)}</h3>\n"
+        Args:
+            nodos: Iterable de nodos de primer nivel del documento
+            salida: Objeto con método write() donde se escribe el HTML
+        """
+        self._escribir_documento(nodos, salida.write)
+    
+    def _escribir_documento(self, nodos, escribir):
+        """Escribe la cabecera, los bloques de los nodos de primer nivel y el pie"""
+        escribir(CABECERA_HTML)
         
-        # Nivel de complejidad 2
-        elif self.nivel_complejidad >= 2:
-            if nodo.tipo == "NEGRITA":
-                contenido = self._generar_hijos(nodo, True)
-                return f"<strong>{contenido}</strong>"
-            
-            elif nodo.tipo == "CURSIVA":
-                contenido = self._generar_hijos(nodo, True)
-                return f"<em>{contenido}</em>"
-            
-            elif nodo.tipo == "LISTA_ITEM":
-                return f"<li>{html.escape(nodo.valor)}</li>\n"
-            
-            elif nodo.tipo == "LISTA_NUM_ITEM":
-                return f'<li value="{nodo.numero}">{html.escape(nodo.valor)}</li>\n'
+        bloques = GeneradorBloques(self, escribir)
+        for nodo in nodos:
+            bloques.agregar(nodo)
         
-        # Nivel de complejidad 3
-        elif self.nivel_complejidad >= 3:
-            if nodo.tipo == "CODIGO_BLOQUE":
-                return f'<pre><code>{html.escape(nodo.valor)}</code></pre>\n'
-            
-            elif nodo.tipo == "ENLACE":
-                url = html.escape(nodo.url)
-                texto = html.escape(nodo.valor)
-                return f'<a href="{url}">{texto}</a>'
-            
-            elif nodo.tipo == "IMAGEN":
-                url = html.escape(nodo.url)
-                alt = html.escape(nodo.valor)
-                return f'<img src="{url}" alt="{alt}">'
+        bloques.cerrar()
+        escribir(PIE_HTML)
+    
+    def _visitar_texto(self, nodo, pila):
+        return html.escape(nodo.valor)
+    
+    def _visitar_salto_linea(self, nodo, pila):
+        return "\n"
+    
+    def _visitar_titulo(self, nodo, pila):
+        etiqueta = "h" + nodo.tipo[-1]
+        return f"<{etiqueta}>{html.escape(nodo.valor)}</{etiqueta}>\n"
+    
+    def _visitar_negrita(self, nodo, pila):
+        pila.append("</strong>")
+        pila.extend(reversed(nodo.hijos))
+        return "<strong>"
+    
+    def _visitar_cursiva(self, nodo, pila):
+        pila.append("</em>")
+        pila.extend(reversed(nodo.hijos))
+        return "<em>"
+    
+    def _visitar_lista_item(self, nodo, pila):
+        return f"<li>{html.escape(nodo.valor)}</li>\n"
+    
+    def _visitar_lista_num_item(self, nodo, pila):
+        return f'<li value="{nodo.numero}">{html.escape(nodo.valor)}</li>\n'
+    
+    def _visitar_codigo_bloque(self, nodo, pila):
+        return f'<pre><code>{html.escape(nodo.valor)}</code></pre>\n'
+    
+    def _visitar_enlace(self, nodo, pila):
+        return f'<a href="{html.escape(nodo.url)}">{html.escape(nodo.valor)}</a>'
+    
+    def _visitar_imagen(self, nodo, pila):
+        return f'<img src="{html.escape(nodo.url)}" alt="{html.escape(nodo.valor)}">'
+
+
+class GeneradorBloques:
+    """
+    Agrupa los nodos de primer nivel en bloques HTML de forma incremental
+    
+    Recibe los hijos del documento de uno en uno y escribe el HTML de cada
+    bloque en cuanto se puede cerrar: los elementos contiguos de una lista
+    forman un único <ul> u <ol>, y los elementos de línea se agrupan en
+    párrafos que terminan con un elemento de bloque o con dos saltos de
+    línea consecutivos.
+    """
+    
+    def __init__(self, generador, escribir):
+        """
+        Inicializa el agrupador
         
-        # Tipo de nodo no reconocido
-        return ""
+        Args:
+            generador: HTMLGenerator que produce el HTML de cada nodo
+            escribir: Función que recibe cada fragmento de HTML
+        """
+        self.generador = generador
+        self.escribir = escribir
+        self.modo = None  # None, "ul", "ol" o "p"
+        self.parrafo_partes = []
+        self.salto_pendiente = False
     
-    def _generar_documento(self, nodo):
+    def agregar(self, nodo):
         """
-        Genera código HTML para el documento completo
+        Procesa el siguiente nodo de primer nivel y escribe los bloques que quedan cerrados
         
         Args:
-            nodo: Nodo raíz del AST
-            
-        Returns:
-            Código HTML para el documento
+            nodo: Nodo hijo del documento
         """
-        html_partes = ['<!DOCTYPE html>\n<html>\n<head>\n<meta charset="UTF-8">\n<title>Documento SimpleDoc</title>\n</head>\n<body>\n']
+        escribir = self.escribir
+        tipo = nodo.tipo
+        modo = self.modo
         
-        # Procesar cada hijo del documento
-        i = 0
-        while i < len(nodo.hijos):
-            hijo = nodo.hijos[i]
-            
-            # Manejar elementos de bloque (títulos, listas, código)
-            if hijo.tipo in ["TITULO1", "TITULO2", "TITULO3", "CODIGO_BLOQUE"]:
-                html_partes.append(self._generar_nodo(hijo))
-            
-            # Manejar listas
-            elif hijo.tipo == "LISTA_ITEM" and self.nivel_complejidad >= 2:
-                html_partes.append("<ul>\n")
-                
-                # Añadir todos los elementos de lista contiguos
-                while i < len(nodo.hijos) and nodo.hijos[i].tipo == "LISTA_ITEM":
-                    html_partes.append(self._generar_nodo(nodo.hijos[i]))
-                    i += 1
+        if modo == "p":
+            if self.salto_pendiente:
+                self.salto_pendiente = False
                 
-                html_partes.append("</ul>\n")
-                i -= 1  # Compensar el incremento extra en el bucle principal
+                # Dos saltos de línea consecutivos terminan el párrafo; el segundo
+                # salto comienza el siguiente
+                if tipo == "SALTO_LINEA":
+                    self._cerrar_parrafo()
             
-            elif hijo.tipo == "LISTA_NUM_ITEM" and self.nivel_complejidad >= 2:
-                html_partes.append("<ol>\n")
-                
-                # Añadir todos los elementos de lista numerada contiguos
-                while i < len(nodo.hijos) and nodo.hijos[i].tipo == "LISTA_NUM_ITEM":
-                    html_partes.append(self._generar_nodo(nodo.hijos[i]))
-                    i += 1
-                
-                html_partes.append("</ol>\n")
-                i -= 1  # Compensar el incremento extra en el bucle principal
+            if tipo in BLOQUES:
+                self._cerrar_parrafo()
+            modo = self.modo
+        
+        elif modo == "ul" and tipo != "LISTA_ITEM":
+            escribir("</ul>\n")
+            modo = self.modo = None
+        
+        elif modo == "ol" and tipo != "LISTA_NUM_ITEM":
+            escribir("</ol>\n")
+            modo = self.modo = None
+        
+        if modo is None:
+            nivel = self.generador.nivel_complejidad
             
-            # Manejar elementos de línea (texto, formateo, enlaces, imágenes)
+            # Manejar elementos de bloque (títulos, código)
+            if tipo in ("TITULO1", "TITULO2", "TITULO3", "CODIGO_BLOQUE"):
+                self.generador.escribir_nodo(nodo, escribir)
+                return
+            
+            # Manejar listas
+            if tipo == "LISTA_ITEM" and nivel >= 2:
+                escribir("<ul>\n")
+                modo = self.modo = "ul"
+            elif tipo == "LISTA_NUM_ITEM" and nivel >= 2:
+                escribir("<ol>\n")
+                modo = self.modo = "ol"
             else:
-                # Agrupar elementos de línea en párrafos
-                en_parrafo = False
-                parrafo_partes = []
-                
-                while i < len(nodo.hijos):
-                    hijo_actual = nodo.hijos[i]
-                    
-                    # Si encontramos un elemento de bloque, terminamos el párrafo
-                    if hijo_actual.tipo in ["TITULO1", "TITULO2", "TITULO3", "LISTA_ITEM", "LISTA_NUM_ITEM", "CODIGO_BLOQUE"]:
-                        break
-                    
-                    # Si encontramos varios saltos de línea consecutivos, terminamos el párrafo
-                    if hijo_actual.tipo == "SALTO_LINEA":
-                        if i + 1 < len(nodo.hijos) and nodo.hijos[i + 1].tipo == "SALTO_LINEA":
-                            i += 1  # Consumimos un salto de línea
-                            break
-                    
-                    # Añadir elemento al párrafo
-                    contenido = self._generar_nodo(hijo_actual, True)
-                    if contenido.strip():
-                        parrafo_partes.append(contenido)
-                        en_parrafo = True
-                    
-                    i += 1
-                
-                # Cerrar el párrafo si hay contenido
-                if en_parrafo:
-                    parrafo = "".join(parrafo_partes).strip()
-                    html_partes.append(f"<p>{parrafo}</p>\n")
-                
-                i -= 1  # Compensar el incremento extra en el bucle principal
+                modo = self.modo = "p"
+                self.parrafo_partes = []
+        
+        if modo != "p":
+            self.generador.escribir_nodo(nodo, escribir)
+        
+        # Un salto de línea solo se resuelve al conocer el nodo siguiente
+        elif tipo == "SALTO_LINEA":
+            self.salto_pendiente = True
+        
+        else:
+            visitante = self.generador.visitantes[tipo.codigo]
+            if visitante is None:
+                return
+            
+            pila = []
+            contenido = visitante(nodo, pila)
+            partes = self.parrafo_partes
+            antes = len(partes)
+            partes.append(contenido)
+            if pila:
+                self.generador._recorrer(pila, partes.append, nodo if nodo.__class__ is VistaNodo else None)
             
-            i += 1
+            # Los nodos que solo generan espacios no forman parte del párrafo
+            if not contenido.strip() and not any(parte.strip() for parte in partes[antes + 1:]):
+                del partes[antes:]
+    
+    def cerrar(self):
+        """Escribe el cierre del bloque abierto al final del documento"""
+        if self.modo == "p":
+            self._cerrar_parrafo()
+            return
         
-        html_partes.append('</body>\n</html>')
-        return "".join(html_partes)
+        modo, self.modo = self.modo, None
+        if modo == "ul":
+            self.escribir("</ul>\n")
+        elif modo == "ol":
+            self.escribir("</ol>\n")
     
-    def _generar_hijos(self, nodo, dentro_de_parrafo=False):
-        """
-        Genera código HTML para los hijos de un nodo
+    def _cerrar_parrafo(self):
+        """Cierra el párrafo abierto y escribe su HTML si tiene contenido"""
+        self.modo = None
+        self.salto_pendiente = False
         
-        Args:
-            nodo: Nodo cuyos hijos se procesarán
-            dentro_de_parrafo: Indica si los hijos están dentro de un párrafo
-            
-        Returns:
-            Código HTML para los hijos
-        """
-        resultado = []
-        for hijo in nodo.hijos:
-            resultado.append(self._generar_nodo(hijo, dentro_de_parrafo))
-        return "".join(resultado)
+        if not self.parrafo_partes:
+            return
+        
+        # Cada párrafo se escribe de una vez, como el resto de los bloques
+        parrafo = "".join(self.parrafo_partes).strip()
+        self.parrafo_partes = []
+        self.escribir(f"<p>{parrafo}</p>\n")
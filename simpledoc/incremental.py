@@ -0,0 +1,294 @@
+"""
+Recompilación incremental de documentos SimpleDoc
+
+El análisis léxico y sintáctico de SimpleDoc es local a cada línea, por lo
+que un documento puede mantenerse como una lista de líneas con sus nodos de
+primer nivel y el HTML que emite cada una. Al editar un rango de líneas solo
+se vuelven a analizar esas líneas, y el HTML se regenera desde el inicio del
+bloque afectado hasta el primer punto en que la agrupación en bloques vuelve
+a coincidir con la de la compilación anterior.
+"""
+
+from .exceptions import ValidationError
+from .html_generator import CABECERA_HTML, PIE_HTML, GeneradorBloques
+from .validator import LIMITE_DIAGNOSTICOS
+
+
+class EstadoCompilacion:
+    """
+    Estado de una compilación que puede actualizarse por rangos de líneas
+    
+    Para cada línea guarda sus nodos de primer nivel, el fragmento de HTML
+    emitido al procesarla y el estado del agrupador de bloques tras ella.
+    Ese estado solo se guarda cuando no hay un párrafo con contenido
+    pendiente (None en caso contrario), y marca los puntos desde los que se
+    puede reanudar la generación.
+    
+    Los nodos conservan el número de línea con el que se analizaron y no se
+    renumeran al insertar o borrar líneas antes de ellos, para que el coste
+    de una edición no dependa del resto del documento; la línea actual de un
+    nodo es la posición de su lista en ``nodos`` más uno.
+    """
+    
+    def __init__(self, nivel_complejidad):
+        """
+        Inicializa un estado vacío
+        
+        Args:
+            nivel_complejidad: Nivel de complejidad del compilador que lo produce
+        """
+        self.nivel_complejidad = nivel_complejidad
+        self.lineas = []
+        self.nodos = []
+        self.fragmentos = []
+        self.estados = []
+        self.cierre = ""
+    
+    @classmethod
+    def desde_texto(cls, compiler, texto):
+        """
+        Compila un documento completo conservando el estado por líneas
+        
+        Args:
+            compiler: Compilador que realiza el análisis
+            texto: Texto del documento
+        
+        Returns:
+            EstadoCompilacion del documento
+        
+        Raises:
+            SimpleDocError: Si ocurre algún error durante la compilación
+        """
+        estado = cls(compiler.nivel_complejidad)
+        lineas = texto.split('\n')
+        ultima = len(lineas) - 1
+        nodos = [_analizar_linea(compiler, linea, i + 1, i < ultima) for i, linea in enumerate(lineas)]
+        
+        anterior = None
+        for nodos_linea in nodos:
+            for nodo in nodos_linea:
+                compiler.validator.validar_bloque(nodo, anterior)
+                anterior = nodo
+        
+        if anterior is None:
+            raise ValidationError("El documento está vacío")
+        
+        estado.lineas = lineas
+        estado.nodos = nodos
+        estado._regenerar(compiler, 0, len(lineas), 0)
+        return estado
+    
+    def html(self):
+        """Devuelve el HTML completo del documento"""
+        return CABECERA_HTML + "".join(self.fragmentos) + self.cierre + PIE_HTML
+    
+    def tamano(self):
+        """Tamaño aproximado, en caracteres, del texto y el HTML que conserva el estado"""
+        return (sum(map(len, self.lineas)) + len(self.lineas)
+                + sum(map(len, self.fragmentos)) + len(self.cierre))
+    
+    def texto(self):
+        """Devuelve el texto actual del documento"""
+        return "\n".join(self.lineas)
+    
+    def aplicar(self, compiler, ediciones):
+        """
+        Aplica una secuencia de ediciones y regenera solo el HTML afectado
+        
+        El estado se modifica en el sitio. Si una edición produce un error,
+        el estado queda como tras la última edición aplicada con éxito.
+        
+        Args:
+            compiler: Compilador con el mismo nivel de complejidad que el estado
+            ediciones: Iterable de tuplas (inicio, fin, nuevas_lineas) que
+                sustituyen las líneas [inicio, fin) (índices desde 0) por
+                nuevas_lineas
+        
+        Returns:
+            Lista con un cambio por edición, cada uno un diccionario con las
+            claves 'inicio', 'fin', 'fragmentos' y 'cierre': los fragmentos
+            [inicio, fin) anteriores se sustituyen por 'fragmentos' y el
+            cierre del documento pasa a ser 'cierre'
+        
+        Raises:
+            SimpleDocError: Si ocurre algún error durante la compilación
+            ValueError: Si una edición está fuera de rango o el nivel no
+                coincide; en ese caso no se aplica ninguna edición
+        """
+        if compiler.nivel_complejidad != self.nivel_complejidad:
+            raise ValueError("El compilador no tiene el nivel de complejidad del estado")
+        
+        ediciones = list(ediciones)
+        self.comprobar_ediciones(ediciones)
+        
+        return [self._aplicar_edicion(compiler, inicio, fin, list(nuevas))
+                for inicio, fin, nuevas in ediciones]
+    
+    def comprobar_ediciones(self, ediciones):
+        """
+        Comprueba que cada edición está dentro del documento que dejan las anteriores
+        
+        Args:
+            ediciones: Lista de ediciones con el formato de aplicar
+        
+        Raises:
+            ValueError: Si una edición está fuera de rango
+        """
+        total = len(self.lineas)
+        for inicio, fin, nuevas in ediciones:
+            if not 0 <= inicio <= fin <= total:
+                raise ValueError(f"Rango de edición fuera del documento: [{inicio}, {fin})")
+            # Un documento sin líneas conserva siempre una línea vacía
+            total = max(total - (fin - inicio) + len(nuevas), 1)
+    
+    def diagnosticos(self, compiler, ediciones=(), limite=LIMITE_DIAGNOSTICOS):
+        """
+        Recoge todos los problemas de validación del documento tras unas ediciones
+        
+        aplicar se detiene en el primer error; este método valida el documento
+        completo que resultaría de las ediciones, sin modificar el estado, para
+        mostrar todos los problemas a la vez.
+        
+        Args:
+            compiler: Compilador con el que se valida
+            ediciones: Ediciones con el formato de aplicar
+            limite: Número máximo de diagnósticos
+        
+        Returns:
+            Lista de Diagnostico, vacía si el documento es válido
+        
+        Raises:
+            SimpleDocError: Si ocurre un error léxico o sintáctico
+            ValueError: Si una edición está fuera de rango
+        """
+        lineas = list(self.lineas)
+        for inicio, fin, nuevas in ediciones:
+            if not 0 <= inicio <= fin <= len(lineas):
+                raise ValueError(f"Rango de edición fuera del documento: [{inicio}, {fin})")
+            lineas[inicio:fin] = list(nuevas)
+        
+        return compiler.compilar_con_diagnosticos("\n".join(lineas), limite)[1]
+    
+    def _aplicar_edicion(self, compiler, inicio, fin, nuevas):
+        """Aplica una única edición y devuelve el cambio en los fragmentos"""
+        total = len(self.lineas)
+        if not 0 <= inicio <= fin <= total:
+            raise ValueError(f"Rango de edición fuera del documento: [{inicio}, {fin})")
+        
+        # La última línea no lleva salto final, así que si la edición llega al
+        # final del documento la línea anterior también cambia
+        if fin == total and inicio > 0:
+            inicio -= 1
+            nuevas.insert(0, self.lineas[inicio])
+        
+        if inicio == 0 and fin == total and not nuevas:
+            nuevas = [""]
+        
+        nuevo_total = total - (fin - inicio) + len(nuevas)
+        desplazamiento = len(nuevas) - (fin - inicio)
+        
+        # Analizar solo las líneas nuevas
+        nodos_nuevos = [
+            _analizar_linea(compiler, linea, inicio + i + 1, inicio + i < nuevo_total - 1)
+            for i, linea in enumerate(nuevas)
+        ]
+        
+        # Validar antes de modificar el estado
+        anterior = _ultimo_nodo(self.nodos, inicio)
+        for nodos_linea in nodos_nuevos:
+            for nodo in nodos_linea:
+                compiler.validator.validar_bloque(nodo, anterior)
+                anterior = nodo
+        
+        linea_siguiente, siguiente = _primer_nodo(self.nodos, fin)
+        if anterior is None and siguiente is None:
+            raise ValidationError("El documento está vacío")
+        
+        if siguiente is not None:
+            try:
+                compiler.validator.validar_bloque(siguiente, anterior)
+            except ValidationError as error:
+                # El número de línea guardado en el nodo puede estar desfasado
+                raise ValidationError(error.detail, error.element, linea_siguiente + desplazamiento + 1) from None
+        
+        self.lineas[inicio:fin] = nuevas
+        self.nodos[inicio:fin] = nodos_nuevos
+        
+        return self._regenerar(compiler, inicio, inicio + len(nuevas), desplazamiento)
+    
+    def _regenerar(self, compiler, inicio, fin_nuevo, desplazamiento):
+        """
+        Regenera los fragmentos de HTML a partir de un rango de líneas modificado
+        
+        Args:
+            compiler: Compilador que genera el HTML
+            inicio: Primera línea modificada
+            fin_nuevo: Línea siguiente a la última modificada, ya en la nueva numeración
+            desplazamiento: Diferencia entre el número de líneas nuevo y el anterior
+        
+        Returns:
+            Cambio en los fragmentos, con el formato descrito en aplicar
+        """
+        # Reanudar desde el último punto sin párrafo pendiente anterior a la edición
+        desde = inicio
+        while desde > 0 and self.estados[desde - 1] is None:
+            desde -= 1
+        
+        partes = []
+        bloques = GeneradorBloques(compiler.html_generator, partes.append)
+        if desde > 0:
+            bloques.modo, bloques.salto_pendiente = self.estados[desde - 1]
+        
+        fragmentos = []
+        estados = []
+        fin_anterior = len(self.estados)
+        resincronizado = False
+        
+        for linea in range(desde, len(self.lineas)):
+            for nodo in self.nodos[linea]:
+                bloques.agregar(nodo)
+            fragmentos.append("".join(partes))
+            partes.clear()
+            estado = None if bloques.parrafo_partes else (bloques.modo, bloques.salto_pendiente)
+            estados.append(estado)
+            
+            # A partir de aquí el resultado coincide con el de la compilación anterior
+            if linea >= fin_nuevo and estado is not None and estado == self.estados[linea - desplazamiento]:
+                fin_anterior = linea - desplazamiento + 1
+                resincronizado = True
+                break
+        
+        self.fragmentos[desde:fin_anterior] = fragmentos
+        self.estados[desde:fin_anterior] = estados
+        if not resincronizado:
+            bloques.cerrar()
+            self.cierre = "".join(partes)
+        
+        return {
+            'inicio': desde,
+            'fin': fin_anterior,
+            'fragmentos': fragmentos,
+            'cierre': self.cierre
+        }
+
+
+def _analizar_linea(compiler, linea, numero, hay_mas):
+    """Devuelve los nodos de primer nivel de una línea"""
+    tokens = compiler.lexer.tokenizar_linea(linea, numero, hay_mas)
+    return list(compiler.parser.iter_nodos(tokens))
+
+
+def _ultimo_nodo(nodos, linea):
+    """Devuelve el último nodo de primer nivel anterior a una línea"""
+    for indice in range(linea - 1, -1, -1):
+        if nodos[indice]:
+            return nodos[indice][-1]
+    return None
+
+
+def _primer_nodo(nodos, linea):
+    """Devuelve el índice de línea y el primer nodo de primer nivel a partir de una línea"""
+    for indice in range(linea, len(nodos)):
+        if nodos[indice]:
+            return indice, nodos[indice][0]
+    return None, None
@@ -3,12 +3,26 @@ Módulo para el análisis léxico de documentos SimpleDoc
 """
 
 import re
-from enum import Enum, auto
+from array import array
+from enum import Enum, IntEnum, auto
+from functools import lru_cache
 from .exceptions import LexerError
 
 
-class TokenType(Enum):
-    """Tipos de tokens reconocidos por el lexer"""
+# Motores de análisis disponibles: el escáner de alternancia única (por defecto)
+# y la implementación clásica patrón a patrón, conservada para comparar resultados
+MOTORES = ("escaner", "clasico")
+
+
+class TokenType(IntEnum):
+    """
+    Tipos de tokens reconocidos por el lexer
+    
+    Cada tipo es un entero pequeño, de modo que el parser puede usarlo
+    directamente como índice de su tabla de despacho. Se muestran igual que
+    los miembros de un Enum normal (``TokenType.TITULO1``).
+    """
+    
     TITULO1 = auto()       # # Título
     TITULO2 = auto()       # ## Título
     TITULO3 = auto()       # ### Título
@@ -24,29 +38,246 @@ class TokenType(Enum):
     TEXTO = auto()         # Texto normal
     SALTO_LINEA = auto()   # \n
     EOF = auto()           # Fin de archivo
+    
+    __str__ = Enum.__str__
+    __format__ = Enum.__format__
 
 
 class Token:
-    """Representa un token identificado en el documento"""
+    """
+    Representa un token identificado en el documento
+    
+    El token no copia su valor: guarda el texto del que procede y el
+    intervalo (inicio, fin) que ocupa en él, y el valor y los campos
+    estructurados (texto, url, numero) se extraen al consultarlos. En enlaces
+    e imágenes el intervalo cubre "texto](url", como en el documento original.
+    """
     
-    def __init__(self, tipo, valor, linea, columna):
+    __slots__ = ('tipo', 'linea', 'columna', 'fuente', 'inicio', 'fin')
+    
+    def __init__(self, tipo, valor, linea, columna, inicio=None, fin=None):
+        """
+        Inicializa un token
+        
+        Args:
+            tipo: Tipo del token
+            valor: Valor del token ("texto](url" en enlaces e imágenes, como en
+                el documento), o el texto original si se indican ``inicio`` y ``fin``
+            linea: Línea del token
+            columna: Columna del token
+            inicio: Desplazamiento inicial del valor dentro de ``valor`` (opcional)
+            fin: Desplazamiento final del valor dentro de ``valor`` (opcional)
+        """
+        if fin is None:
+            inicio, fin = 0, len(valor)
+        
         self.tipo = tipo
-        self.valor = valor
         self.linea = linea
         self.columna = columna
+        self.fuente = valor
+        self.inicio = inicio
+        self.fin = fin
+    
+    @property
+    def valor(self):
+        """Valor del token, con el formato "texto|url" en enlaces e imágenes"""
+        return _valor_token(self.tipo, self.fuente, self.inicio, self.fin)
+    
+    @property
+    def texto(self):
+        """Texto del token: el de un enlace o imagen y el contenido de un elemento numerado"""
+        tipo = self.tipo
+        if tipo is TokenType.ENLACE or tipo is TokenType.IMAGEN:
+            return self.fuente[self.inicio:self.fuente.index('](', self.inicio, self.fin)]
+        if tipo is TokenType.LISTA_NUM_ITEM:
+            return self.fuente[self.fuente.index('. ', self.inicio, self.fin) + 2:self.fin]
+        if tipo is TokenType.SALTO_LINEA:
+            return '\n'
+        return self.fuente[self.inicio:self.fin]
+    
+    @property
+    def url(self):
+        """URL de un enlace o imagen, o None en los demás tokens"""
+        if self.tipo is not TokenType.ENLACE and self.tipo is not TokenType.IMAGEN:
+            return None
+        return self.fuente[self.fuente.index('](', self.inicio, self.fin) + 2:self.fin]
+    
+    @property
+    def numero(self):
+        """Número de un elemento de lista numerada, o None en los demás tokens"""
+        if self.tipo is not TokenType.LISTA_NUM_ITEM:
+            return None
+        return int(self.fuente[self.inicio:self.fuente.index('. ', self.inicio, self.fin)])
     
     def __repr__(self):
         return f"Token(tipo={self.tipo}, valor='{self.valor}', linea={self.linea}, columna={self.columna})"
 
 
+# Tipos de token indexados por su código numérico
+_TIPOS_POR_CODIGO = {tipo.value: tipo for tipo in TokenType}
+
+
+def _valor_token(tipo, fuente, inicio, fin):
+    """
+    Obtiene el valor de un token a partir de su posición en el texto original
+    
+    Args:
+        tipo: Tipo del token
+        fuente: Texto original
+        inicio: Desplazamiento inicial del valor
+        fin: Desplazamiento final del valor
+    
+    Returns:
+        Valor del token, igual al que produce el lexer para listas de tokens
+    """
+    if tipo is TokenType.SALTO_LINEA:
+        # Las líneas vacías al final del texto no tienen un '\n' que referenciar
+        return '\n'
+    
+    if tipo is TokenType.ENLACE or tipo is TokenType.IMAGEN:
+        # El intervalo cubre "texto](url"; el texto nunca contiene ']'
+        separador = fuente.index('](', inicio, fin)
+        return f"{fuente[inicio:separador]}|{fuente[separador + 2:fin]}"
+    
+    return fuente[inicio:fin]
+
+
+def _lineas(texto):
+    """Genera el intervalo (inicio, fin, hay_mas) de cada línea del texto sin copiarla"""
+    base = 0
+    while True:
+        fin = texto.find('\n', base)
+        if fin < 0:
+            yield base, len(texto), False
+            return
+        
+        yield base, fin, True
+        base = fin + 1
+
+
+def _lineas_binarias(datos):
+    """
+    Genera el intervalo (inicio, fin, hay_mas) de cada línea de un texto en bytes
+    
+    Como al leer un archivo en modo texto, '\r\n' y '\r' también terminan una línea.
+    """
+    base = 0
+    for salto in _RE_SALTO_BINARIO.finditer(datos):
+        yield base, salto.start(), True
+        base = salto.end()
+    
+    yield base, len(datos), False
+
+
+class FuenteBinaria:
+    """
+    Texto ASCII guardado en un objeto de bytes
+    
+    Permite que los tokens de las líneas ASCII de un archivo proyectado en
+    memoria referencien los bytes originales: cada fragmento se decodifica
+    solo al extraerlo.
+    """
+    
+    __slots__ = ('datos',)
+    
+    def __init__(self, datos):
+        self.datos = datos
+    
+    def __getitem__(self, intervalo):
+        return self.datos[intervalo].decode('ascii')
+    
+    def index(self, subcadena, inicio, fin):
+        posicion = self.datos.find(subcadena.encode('ascii'), inicio, fin)
+        if posicion < 0:
+            raise ValueError("subcadena no encontrada")
+        return posicion
+    
+    def __len__(self):
+        return len(self.datos)
+
+
+class TokenBuffer:
+    """
+    Secuencia compacta de tokens almacenada por columnas
+    
+    En lugar de un objeto por token, guarda arrays paralelos con el código
+    del tipo, la línea, la columna y el intervalo del valor dentro del texto
+    original. Los objetos Token solo se crean al acceder a ellos, por lo que
+    el Parser puede consumir el buffer directamente como si fuera una lista.
+    """
+    
+    __slots__ = ('fuente', 'tipos', 'lineas', 'columnas', 'inicios', 'fines')
+    
+    def __init__(self, fuente):
+        """
+        Inicializa un buffer vacío
+        
+        Args:
+            fuente: Texto original al que hacen referencia los tokens
+        """
+        self.fuente = fuente
+        self.tipos = array('B')
+        self.lineas = array('I')
+        self.columnas = array('I')
+        self.inicios = array('I')
+        self.fines = array('I')
+    
+    def agregar(self, tipo, linea, columna, inicio, fin):
+        """
+        Añade un token al buffer
+        
+        Args:
+            tipo: Tipo del token
+            linea: Línea del token
+            columna: Columna del token
+            inicio: Desplazamiento inicial del valor en el texto original
+            fin: Desplazamiento final del valor en el texto original
+        """
+        self.tipos.append(tipo.value)
+        self.lineas.append(linea)
+        self.columnas.append(columna)
+        self.inicios.append(inicio)
+        self.fines.append(fin)
+    
+    def tipo(self, indice):
+        """Devuelve el tipo del token sin materializarlo"""
+        return _TIPOS_POR_CODIGO[self.tipos[indice]]
+    
+    def valor(self, indice):
+        """Devuelve el valor del token copiándolo del texto original"""
+        return _valor_token(self.tipo(indice), self.fuente, self.inicios[indice], self.fines[indice])
+    
+    def nbytes(self):
+        """Devuelve el tamaño en bytes de los arrays del buffer"""
+        return sum(columna.itemsize * len(columna) for columna in
+                   (self.tipos, self.lineas, self.columnas, self.inicios, self.fines))
+    
+    def __len__(self):
+        return len(self.tipos)
+    
+    def __getitem__(self, indice):
+        if indice < 0:
+            indice += len(self.tipos)
+        return Token(self.tipo(indice), self.fuente, self.lineas[indice], self.columnas[indice],
+                     self.inicios[indice], self.fines[indice])
+    
+    def __iter__(self):
+        fuente = self.fuente
+        for codigo, linea, columna, inicio, fin in zip(self.tipos, self.lineas, self.columnas,
+                                                       self.inicios, self.fines):
+            yield Token(_TIPOS_POR_CODIGO[codigo], fuente, linea, columna, inicio, fin)
+
+
 class Lexer:
     """
     Analizador léxico para el lenguaje SimpleDoc
     
-    Convierte un texto de entrada en una secuencia de tokens.
+    Convierte un texto de entrada en una secuencia de tokens. El lexer solo
+    guarda su configuración, por lo que una misma instancia puede usarse
+    desde varios hilos a la vez.
     """
     
-    def __init__(self, nivel_complejidad=3):
+    def __init__(self, nivel_complejidad=3, engine="escaner"):
         """
         Inicializa el lexer con un nivel de complejidad específico
         
@@ -55,38 +286,43 @@ class Lexer:
                 1 - Básico: Solo títulos y texto plano
                 2 - Intermedio: Básico + formateo (negrita, cursiva) y listas
                 3 - Avanzado: Intermedio + enlaces, imágenes y bloques de código
+            engine: Motor de análisis a utilizar
+                "escaner" - Una única expresión regular precompilada por nivel (por defecto)
+                "clasico" - Prueba cada patrón por separado en cada posición
         """
-        self.texto = ""
-        self.posicion = 0
-        self.linea = 1
-        self.columna = 1
-        self.tokens = []
+        if engine not in MOTORES:
+            raise ValueError(f"Motor de lexer desconocido: {engine!r} (opciones: {', '.join(MOTORES)})")
+        
+        self.engine = engine
         self.nivel_complejidad = min(max(nivel_complejidad, 1), 3)
         
-        # Definir patrones según nivel de complejidad
+        # Definir patrones según nivel de complejidad. Los procesadores son métodos
+        # del estado de cada análisis, ya que el lexer no guarda estado propio
         self.patrones = [
             # Patrones básicos (nivel 1)
-            (r'^# (.+)$', self._procesar_titulo1),
-            (r'^## (.+)$', self._procesar_titulo2),
-            (r'^### (.+)$', self._procesar_titulo3),
+            (r'^# (.+)$', _AnalisisLexico._procesar_titulo1),
+            (r'^## (.+)$', _AnalisisLexico._procesar_titulo2),
+            (r'^### (.+)$', _AnalisisLexico._procesar_titulo3),
         ]
         
         if self.nivel_complejidad >= 2:
             # Patrones intermedios (nivel 2)
             self.patrones.extend([
-                (r'\*\*([^*]+)\*\*', self._procesar_negrita),
-                (r'\*([^*]+)\*', self._procesar_cursiva),
-                (r'^- (.+)$', self._procesar_lista_item),
-                (r'^(\d+)\. (.+)$', self._procesar_lista_num_item),
+                (r'\*\*([^*]+)\*\*', _AnalisisLexico._procesar_negrita),
+                (r'\*([^*]+)\*', _AnalisisLexico._procesar_cursiva),
+                (r'^- (.+)$', _AnalisisLexico._procesar_lista_item),
+                (r'^(\d+)\. (.+)$', _AnalisisLexico._procesar_lista_num_item),
             ])
-            
+        
         if self.nivel_complejidad >= 3:
             # Patrones avanzados (nivel 3)
             self.patrones.extend([
-                (r'```([^`]*)```', self._procesar_codigo_bloque),
-                (r'\[([^\]]+)\]\(([^)]+)\)', self._procesar_enlace),
-                (r'!\[([^\]]*)\]\(([^)]+)\)', self._procesar_imagen),
+                (r'```([^`]*)```', _AnalisisLexico._procesar_codigo_bloque),
+                (r'\[([^\]]+)\]\(([^)]+)\)', _AnalisisLexico._procesar_enlace),
+                (r'!\[([^\]]*)\]\(([^)]+)\)', _AnalisisLexico._procesar_imagen),
             ])
+        
+        self._re_linea, self._re_en_linea = _compilar_escaner(self.nivel_complejidad)
     
     def tokenizar(self, texto):
         """
@@ -94,16 +330,151 @@ class Lexer:
         
         Args:
             texto: Texto a analizar
-            
+        
         Returns:
             Lista de tokens
         """
+        analisis = _AnalisisLexico(self, texto)
+        
+        if self.engine == "escaner":
+            return analisis._tokenizar_escaner()
+        return analisis._tokenizar_clasico()
+    
+    def tokenizar_compacto(self, texto):
+        """
+        Convierte el texto de entrada en un TokenBuffer
+        
+        Los tokens se guardan por columnas y referencian el texto original
+        mediante desplazamientos, en lugar de copiar cada valor. Siempre se
+        utiliza el motor de escaneo, ya que el clásico no conserva posiciones.
+        
+        Args:
+            texto: Texto a analizar
+        
+        Returns:
+            TokenBuffer con los tokens del documento
+        """
+        buffer = TokenBuffer(texto)
+        _AnalisisLexico(self, texto)._escanear(texto, buffer.agregar)
+        return buffer
+    
+    def iter_tokens(self, lineas):
+        """
+        Genera los tokens de forma perezosa a partir de un iterable de líneas
+        
+        Produce la misma secuencia que ``tokenizar("".join(lineas))`` sin
+        mantener el documento completo en memoria: cada línea se analiza y se
+        descarta antes de leer la siguiente. Acepta objetos archivo, listas de
+        líneas con su salto de línea final o fragmentos arbitrarios de texto.
+        Con un texto completo, las líneas se analizan en su sitio y solo se
+        conservan los tokens de la línea actual. Siempre se utiliza el motor
+        de escaneo.
+        
+        Args:
+            lineas: Iterable de cadenas, por ejemplo un archivo abierto en modo
+                texto, o el texto completo del documento
+        
+        Yields:
+            Tokens del documento, terminando con el token EOF
+        """
+        if isinstance(lineas, str):
+            yield from _AnalisisLexico(self, lineas)._iter_escaner()
+            return
+        
+        analisis = _AnalisisLexico(self)
+        numero = 0
+        resto = ""
+        
+        for trozo in lineas:
+            partes = trozo.split('\n')
+            partes[0] = resto + partes[0]
+            resto = partes.pop()
+            
+            for linea in partes:
+                numero += 1
+                yield from analisis._tokenizar_linea(linea, numero)
+        
+        # Lo que queda tras el último '\n' es la última línea, aunque esté vacía
+        yield from analisis._tokenizar_linea(resto, numero + 1, hay_mas=False)
+        yield Token(TokenType.EOF, '', analisis.linea, analisis.columna)
+    
+    def iter_tokens_binario(self, datos):
+        """
+        Genera los tokens de un texto UTF-8 guardado en un objeto de bytes
+        
+        Pensado para archivos proyectados en memoria con mmap: el texto nunca
+        se decodifica completo. Las líneas ASCII se analizan directamente sobre
+        los bytes con las expresiones binarias del nivel, y sus tokens solo
+        decodifican los fragmentos que se consultan; las demás líneas se
+        decodifican una a una y se analizan como texto. Los saltos de línea se
+        interpretan como en un archivo abierto en modo texto, por lo que el
+        resultado es el mismo que el de ``iter_tokens`` sobre el texto leído.
+        
+        Args:
+            datos: Objeto de bytes (bytes, bytearray o mmap) con texto UTF-8
+        
+        Returns:
+            Iterador de tokens del documento, terminando con el token EOF
+        
+        Raises:
+            UnicodeDecodeError: Al llegar a una línea que no es UTF-8 válido
+        """
+        return _AnalisisLexico(self)._iter_binario(datos)
+    
+    def tokenizar_linea(self, linea, numero, hay_mas=True):
+        """
+        Tokeniza una única línea del documento
+        
+        Como el análisis léxico es local a cada línea, el resultado es el
+        mismo que produciría esa línea dentro del documento completo.
+        
+        Args:
+            linea: Texto de la línea, sin el salto de línea final
+            numero: Número de la línea dentro del documento
+            hay_mas: Indica si la línea va seguida de otra, en cuyo caso se
+                añade el token de salto de línea final
+        
+        Returns:
+            Lista de tokens de la línea, sin el token EOF
+        """
+        return _AnalisisLexico(self)._tokenizar_linea(linea, numero, hay_mas)
+
+
+class _AnalisisLexico:
+    """
+    Estado de un único análisis léxico
+    
+    El lexer solo guarda su configuración; la posición, la línea y los tokens
+    emitidos viven en un objeto de esta clase creado en cada llamada, de modo
+    que un mismo Lexer puede atender análisis concurrentes desde varios hilos.
+    """
+    
+    def __init__(self, lexer, texto=""):
+        """
+        Inicializa el estado de un análisis
+        
+        Args:
+            lexer: Lexer con la configuración del análisis
+            texto: Texto a analizar
+        """
         self.texto = texto
         self.posicion = 0
         self.linea = 1
         self.columna = 1
         self.tokens = []
+        self.patrones = lexer.patrones
+        self.nivel_complejidad = lexer.nivel_complejidad
+        self._re_linea = lexer._re_linea
+        self._re_en_linea = lexer._re_en_linea
+        self._re_blanco = _RE_BLANCO
+    
+    def _tokenizar_clasico(self):
+        """
+        Tokeniza el texto probando cada patrón por separado en cada posición
         
+        Returns:
+            Lista de tokens
+        """
         # Procesar línea por línea
         lineas = self.texto.split('\n')
         for i, linea in enumerate(lineas):
@@ -119,7 +490,7 @@ class Lexer:
             linea_procesada = False
             for patron, procesador in self.patrones:
                 if re.match(patron, linea):
-                    procesador(linea)
+                    procesador(self, linea)
                     linea_procesada = True
                     break
             
@@ -136,7 +507,7 @@ class Lexer:
                             match = re.search(patron, linea[pos:])
                             if match and match.start() == 0:
                                 nuevo_pos = pos + match.end()
-                                procesador(linea[pos:nuevo_pos])
+                                procesador(self, linea[pos:nuevo_pos])
                                 pos = nuevo_pos
                                 match_encontrado = True
                                 break
@@ -170,6 +541,203 @@ class Lexer:
         
         return self.tokens
     
+    def _tokenizar_linea(self, linea, numero, hay_mas=True):
+        """Tokeniza una única línea y devuelve la lista de sus tokens"""
+        tokens = []
+        
+        def agregar(tipo, linea_token, columna, inicio, fin):
+            tokens.append(Token(tipo, linea, linea_token, columna, inicio, fin))
+        
+        self.linea = numero - 1
+        self._escanear_linea_completa(linea, 0, len(linea), hay_mas, agregar)
+        return tokens
+    
+    def _escanear_linea_completa(self, texto, base, fin_linea, hay_mas, agregar):
+        """
+        Emite los tokens de la siguiente línea del documento, incluido su salto de línea
+        
+        Args:
+            texto: Texto que contiene la línea
+            base: Desplazamiento del inicio de la línea dentro del texto
+            fin_linea: Desplazamiento del final de la línea, sin el salto de línea
+            hay_mas: Indica si la línea va seguida de otra
+            agregar: Función de emisión de tokens
+        """
+        self.linea += 1
+        
+        # Si la línea está vacía, añadir un salto de línea
+        if self._re_blanco.fullmatch(texto, base, fin_linea):
+            self.columna = 1
+            agregar(TokenType.SALTO_LINEA, self.linea, self.columna, fin_linea, fin_linea)
+            return
+        
+        self.columna = self._escanear_linea(texto, base, fin_linea, agregar)
+        
+        # Añadir salto de línea al final de cada línea a menos que sea la última
+        if hay_mas:
+            agregar(TokenType.SALTO_LINEA, self.linea, self.columna, fin_linea, fin_linea + 1)
+    
+    def _tokenizar_escaner(self):
+        """
+        Tokeniza el texto con las expresiones combinadas del nivel actual
+        
+        Produce exactamente la misma secuencia de tokens que el motor clásico,
+        pero recorre cada línea una sola vez: un único ``match`` para los
+        patrones de línea completa y un ``finditer`` para los patrones en línea.
+        
+        Returns:
+            Lista de tokens
+        """
+        texto = self.texto
+        tokens = self.tokens
+        
+        def agregar(tipo, linea, columna, inicio, fin):
+            tokens.append(Token(tipo, texto, linea, columna, inicio, fin))
+        
+        self._escanear(texto, agregar)
+        return tokens
+    
+    def _iter_escaner(self):
+        """Genera los tokens del texto línea a línea, sin construir la lista completa"""
+        texto = self.texto
+        tokens = []
+        
+        def agregar(tipo, linea, columna, inicio, fin):
+            tokens.append(Token(tipo, texto, linea, columna, inicio, fin))
+        
+        self.linea = 0
+        for base, fin_linea, hay_mas in _lineas(texto):
+            self._escanear_linea_completa(texto, base, fin_linea, hay_mas, agregar)
+            yield from tokens
+            tokens.clear()
+        
+        yield Token(TokenType.EOF, texto, self.linea, self.columna, len(texto), len(texto))
+    
+    def _iter_binario(self, datos):
+        """Genera los tokens de un texto UTF-8 en bytes, analizando en binario las líneas ASCII"""
+        binaria = FuenteBinaria(datos)
+        textuales = (self._re_linea, self._re_en_linea, self._re_blanco)
+        binarias = _compilar_escaner(self.nivel_complejidad, binario=True) + (_RE_BLANCO_BINARIO,)
+        tokens = []
+        fuente = binaria
+        
+        def agregar(tipo, linea, columna, inicio, fin):
+            tokens.append(Token(tipo, fuente, linea, columna, inicio, fin))
+        
+        self.linea = 0
+        for base, fin_linea, hay_mas in _lineas_binarias(datos):
+            if _RE_NO_ASCII.search(datos, base, fin_linea) is None:
+                # Las posiciones en bytes coinciden con las de los caracteres
+                self._re_linea, self._re_en_linea, self._re_blanco = binarias
+                fuente = binaria
+                self._escanear_linea_completa(datos, base, fin_linea, hay_mas, agregar)
+            else:
+                self._re_linea, self._re_en_linea, self._re_blanco = textuales
+                fuente = datos[base:fin_linea].decode('utf-8')
+                self._escanear_linea_completa(fuente, 0, len(fuente), hay_mas, agregar)
+            
+            yield from tokens
+            tokens.clear()
+        
+        yield Token(TokenType.EOF, '', self.linea, self.columna)
+    
+    def _escanear(self, texto, agregar):
+        """
+        Recorre el texto línea a línea y emite cada token a través de ``agregar``
+        
+        Las líneas se analizan en su sitio, con las expresiones limitadas a su
+        intervalo, sin dividir el texto en una lista de líneas.
+        
+        Args:
+            texto: Texto a analizar
+            agregar: Función que recibe (tipo, linea, columna, inicio, fin), donde
+                inicio y fin delimitan el valor del token dentro del texto
+        """
+        self.linea = 0
+        
+        for base, fin_linea, hay_mas in _lineas(texto):
+            self._escanear_linea_completa(texto, base, fin_linea, hay_mas, agregar)
+        
+        # Añadir token de fin de archivo
+        agregar(TokenType.EOF, self.linea, self.columna, len(texto), len(texto))
+    
+    def _escanear_linea(self, texto, base, fin_linea, agregar):
+        """
+        Emite los tokens de una línea no vacía
+        
+        Como en el motor clásico, los patrones de formato reconocidos al inicio
+        de la línea solo emiten el fragmento reconocido; el resto de patrones de
+        línea completa consumen la línea entera.
+        
+        Args:
+            texto: Texto que contiene la línea
+            base: Desplazamiento del inicio de la línea dentro del texto
+            fin_linea: Desplazamiento del final de la línea
+            agregar: Función de emisión de tokens
+        
+        Returns:
+            Columna siguiente al último carácter consumido
+        """
+        numero = self.linea
+        match = self._re_linea.match(texto, base, fin_linea)
+        
+        if match:
+            tipo = match.lastgroup
+            grupo = match.lastindex + 1
+            
+            if tipo == "NEGRITA" or tipo == "CURSIVA":
+                self._emitir_formato(tipo, match, grupo, base, agregar)
+                return match.end() - base + 1
+            
+            if tipo == "LISTA_NUM_ITEM":
+                inicio, fin = base, fin_linea
+            elif tipo == "ENLACE" or tipo == "IMAGEN":
+                inicio, fin = match.start(grupo), match.end(grupo + 1)
+            else:
+                inicio, fin = match.span(grupo)
+            
+            agregar(TokenType[tipo], numero, 1, inicio, fin)
+            return fin_linea - base + 1
+        
+        pos = base
+        
+        if self._re_en_linea is not None:
+            for match in self._re_en_linea.finditer(texto, base, fin_linea):
+                inicio = match.start()
+                if inicio > pos:
+                    agregar(TokenType.TEXTO, numero, pos - base + 1, pos, inicio)
+                
+                tipo = match.lastgroup
+                grupo = match.lastindex + 1
+                
+                if tipo == "NEGRITA" or tipo == "CURSIVA":
+                    self._emitir_formato(tipo, match, grupo, base, agregar)
+                elif tipo == "CODIGO_BLOQUE":
+                    agregar(TokenType.CODIGO_BLOQUE, numero, inicio - base + 1, match.start(grupo), match.end(grupo))
+                else:
+                    agregar(TokenType[tipo], numero, inicio - base + 1, match.start(grupo), match.end(grupo + 1))
+                
+                pos = match.end()
+        
+        if pos < fin_linea:
+            agregar(TokenType.TEXTO, numero, pos - base + 1, pos, fin_linea)
+        
+        return fin_linea - base + 1
+    
+    def _emitir_formato(self, tipo, match, grupo, base, agregar):
+        """Emite los tokens de apertura, contenido y cierre de negrita o cursiva"""
+        if tipo == "NEGRITA":
+            apertura, cierre = TokenType.NEGRITA_INICIO, TokenType.NEGRITA_FIN
+        else:
+            apertura, cierre = TokenType.CURSIVA_INICIO, TokenType.CURSIVA_FIN
+        
+        inicio, fin = match.span()
+        contenido_inicio, contenido_fin = match.span(grupo)
+        
+        agregar(apertura, self.linea, inicio - base + 1, inicio, contenido_inicio)
+        agregar(TokenType.TEXTO, self.linea, contenido_inicio - base + 1, contenido_inicio, contenido_fin)
+        agregar(cierre, self.linea, contenido_fin - base + 1, contenido_fin, fin)
+    
     def _procesar_titulo1(self, linea):
         """Procesa un título de nivel 1"""
         match = re.match(r'^# (.+)$', linea)
@@ -247,16 +815,63 @@ class Lexer:
         """Procesa un enlace"""
         match = re.match(r'\[([^\]]+)\]\(([^)]+)\)', texto)
         if match:
-            texto_enlace = match.group(1)
-            url = match.group(2)
-            self.tokens.append(Token(TokenType.ENLACE, f"{texto_enlace}|{url}", self.linea, self.columna))
+            # Como en el escáner, el token referencia "texto](url" sin copiarlo
+            self.tokens.append(Token(TokenType.ENLACE, texto, self.linea, self.columna,
+                                     match.start(1), match.end(2)))
             self.columna += len(texto)
     
     def _procesar_imagen(self, texto):
         """Procesa una imagen"""
         match = re.match(r'!\[([^\]]*)\]\(([^)]+)\)', texto)
         if match:
-            alt_text = match.group(1)
-            url = match.group(2)
-            self.tokens.append(Token(TokenType.IMAGEN, f"{alt_text}|{url}", self.linea, self.columna))
+            self.tokens.append(Token(TokenType.IMAGEN, texto, self.linea, self.columna,
+                                     match.start(1), match.end(2)))
             self.columna += len(texto)
+
+
+# Línea vacía o solo con espacios (\s reconoce los mismos caracteres que str.strip)
+_RE_BLANCO = re.compile(r'\s*')
+
+# Equivalentes para líneas ASCII en bytes, donde \s no incluye los separadores \x1c-\x1f
+_RE_BLANCO_BINARIO = re.compile(rb'[ \t\n\r\x0b\x0c\x1c-\x1f]*')
+_RE_NO_ASCII = re.compile(rb'[^\x00-\x7f]')
+_RE_SALTO_BINARIO = re.compile(rb'\r\n?|\n')
+
+# Patrones del motor de escaneo, en el mismo orden de prioridad que el motor clásico.
+# Cada entrada indica el nivel mínimo, el nombre del grupo y si solo se reconoce
+# al inicio de la línea.
+_PATRONES_ESCANER = [
+    (1, "TITULO1", r'# (.+)$', True),
+    (1, "TITULO2", r'## (.+)$', True),
+    (1, "TITULO3", r'### (.+)$', True),
+    (2, "NEGRITA", r'\*\*([^*]+)\*\*', False),
+    (2, "CURSIVA", r'\*([^*]+)\*', False),
+    (2, "LISTA_ITEM", r'- (.+)$', True),
+    (2, "LISTA_NUM_ITEM", r'(\d+)\. (.+)$', True),
+    (3, "CODIGO_BLOQUE", r'```([^`]*)```', False),
+    (3, "ENLACE", r'\[([^\]]+)\]\(([^)]+)\)', False),
+    (3, "IMAGEN", r'!\[([^\]]*)\]\(([^)]+)\)', False),
+]
+
+
+@lru_cache(maxsize=None)
+def _compilar_escaner(nivel_complejidad, binario=False):
+    """
+    Construye las expresiones combinadas del motor de escaneo para un nivel
+    
+    Args:
+        nivel_complejidad: Nivel de complejidad (1-3)
+        binario: Si es True, las expresiones se compilan para bytes; solo dan
+            el mismo resultado que las de texto sobre líneas ASCII
+    
+    Returns:
+        Tupla (expresión de línea completa, expresión en línea o None)
+    """
+    activos = [p for p in _PATRONES_ESCANER if p[0] <= nivel_complejidad]
+    
+    linea = "|".join(f"(?P<{nombre}>{patron})" for _, nombre, patron, _ in activos)
+    en_linea = "|".join(f"(?P<{nombre}>{patron})" for _, nombre, patron, anclado in activos if not anclado)
+    
+    if binario:
+        linea, en_linea = linea.encode('ascii'), en_linea.encode('ascii')
+    return re.compile(linea), re.compile(en_linea) if en_linea else None
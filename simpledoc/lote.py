@@ -0,0 +1,559 @@
+"""
+Compilación por lotes de archivos SimpleDoc
+
+Expande listas de archivos, directorios y patrones glob en trabajos de
+compilación y los reparte en trozos entre varios procesos. Un error en un
+archivo se registra en su resultado sin interrumpir el resto del lote.
+
+En modo incremental, un manifiesto guarda la huella de cada archivo fuente
+(fecha de modificación, tamaño y hash del contenido) junto con el nivel de
+complejidad, la versión del compilador y el hash del HTML generado, y los
+archivos sin cambios no se vuelven a compilar.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import time
+from . import __version__
+from .cache import CacheDisco
+from .compiler import Compiler, RegistroCompiladores
+from .exceptions import SimpleDocError
+
+
+# Extensiones que se buscan al recorrer un directorio
+EXTENSIONES = ('.sd', '.simpledoc')
+
+# Nombre del manifiesto de las compilaciones incrementales
+NOMBRE_MANIFIESTO = '.simpledoc-manifiesto.json'
+
+# Registros de compiladores de cada proceso, por directorio de caché
+_registros = {}
+
+
+class ResultadoArchivo:
+    """Resultado de compilar un único archivo del lote"""
+    
+    __slots__ = ('entrada', 'salida', 'tamano', 'error', 'huella')
+    
+    def __init__(self, entrada, salida, tamano=0, error=None, huella=None):
+        self.entrada = entrada
+        self.salida = salida
+        self.tamano = tamano
+        self.error = error
+        self.huella = huella
+    
+    def __repr__(self):
+        return f"ResultadoArchivo(entrada={self.entrada}, salida={self.salida}, error={self.error})"
+
+
+class ResultadoLote:
+    """Resultados de un lote completo y su rendimiento"""
+    
+    def __init__(self, archivos, segundos, omitidos=0):
+        """
+        Args:
+            archivos: Lista de ResultadoArchivo, en el orden de los trabajos
+            segundos: Tiempo total de pared del lote
+            omitidos: Archivos sin cambios que no se compilaron
+        """
+        self.archivos = archivos
+        self.segundos = segundos
+        self.omitidos = omitidos
+    
+    @property
+    def errores(self):
+        """Resultados de los archivos que no se pudieron compilar"""
+        return [r for r in self.archivos if r.error is not None]
+    
+    @property
+    def compilados(self):
+        """Número de archivos compilados correctamente"""
+        return len(self.archivos) - len(self.errores)
+    
+    @property
+    def bytes(self):
+        """Bytes de entrada de los archivos compilados"""
+        return sum(r.tamano for r in self.archivos if r.error is None)
+    
+    def resumen(self):
+        """Devuelve una línea con el número de archivos y el rendimiento del lote"""
+        segundos = max(self.segundos, 1e-9)
+        omitidos = f", {self.omitidos} sin cambios" if self.omitidos else ""
+        return (f"{self.compilados} archivos compilados, {len(self.errores)} con errores{omitidos} "
+                f"en {self.segundos:.2f} s ({len(self.archivos) / segundos:.1f} archivos/s, "
+                f"{self.bytes / (1024 * 1024) / segundos:.2f} MB/s)")
+
+
+def expandir_entradas(entradas, recursivo=False, directorio_salida=None, comprobar_salidas=True):
+    """
+    Convierte archivos, directorios y patrones glob en trabajos de compilación
+    
+    Args:
+        entradas: Lista de rutas de archivo, directorios o patrones glob
+        recursivo: Recorrer también los subdirectorios de los directorios y
+            admitir ``**`` en los patrones
+        directorio_salida: Directorio donde escribir el HTML, conservando la
+            estructura relativa a cada entrada. Si es None, cada HTML se escribe
+            junto a su archivo de entrada.
+        comprobar_salidas: Comprobar que no hay dos entradas con la misma
+            ruta de salida (como ``a/x.sd`` y ``b/x.sd`` con un directorio de
+            salida, o ``x.sd`` junto a ``x.simpledoc``)
+    
+    Returns:
+        Lista de tuplas (ruta_entrada, ruta_salida) sin duplicados
+    
+    Raises:
+        ValueError: Si varias entradas generan la misma salida
+    """
+    trabajos = []
+    vistos = set()
+    salidas = {}
+    conflictos = []
+    
+    actual = os.getcwd()
+    
+    for entrada in entradas:
+        # Con la entrada normalizada, las rutas que se derivan de ella también
+        # lo están y pueden compararse sin volver a normalizarlas
+        entrada = os.path.normpath(entrada)
+        
+        if glob.has_magic(entrada):
+            raiz = _raiz_patron(entrada)
+            rutas = sorted(r for r in glob.glob(entrada, recursive=recursivo) if os.path.isfile(r))
+        elif os.path.isdir(entrada):
+            raiz = entrada
+            rutas = _archivos_directorio(entrada, recursivo)
+        else:
+            raiz = os.path.dirname(entrada)
+            rutas = [entrada]
+        
+        for ruta in rutas:
+            clave = _absoluta(ruta, actual)
+            if clave in vistos:
+                continue
+            vistos.add(clave)
+            salida = _ruta_salida(ruta, raiz, directorio_salida)
+            trabajos.append((ruta, salida))
+            
+            if comprobar_salidas:
+                clave_salida = os.path.normcase(_clave(salida, actual))
+                anterior = salidas.setdefault(clave_salida, ruta)
+                if anterior != ruta:
+                    conflictos.append(f"{anterior} y {ruta} -> {salida}")
+    
+    if conflictos:
+        raise ValueError("Varias entradas generan la misma salida: " + "; ".join(conflictos))
+    
+    return trabajos
+
+
+def compilar_lote(trabajos, nivel_complejidad=3, jobs=1, tam_trozo=None, directorio_cache=None,
+                  al_completar=None, con_huellas=False, perfil=None):
+    """
+    Compila una lista de trabajos, en paralelo si se indica más de un proceso
+    
+    Los trabajos se agrupan en trozos para que cada proceso reciba varios
+    archivos por mensaje y reutilice su compilador entre ellos.
+    
+    Args:
+        trabajos: Lista de tuplas (ruta_entrada, ruta_salida)
+        nivel_complejidad: Nivel de complejidad del compilador (1-3)
+        jobs: Número de procesos; 1 compila en el proceso actual y 0 usa
+            tantos procesos como CPUs
+        tam_trozo: Archivos por trozo (por defecto, unos cuatro trozos por proceso)
+        directorio_cache: Directorio de la caché de compilaciones en disco (opcional)
+        al_completar: Función opcional que recibe cada ResultadoArchivo en
+            cuanto termina su trozo
+        con_huellas: Calcular la huella de cada archivo compilado (para el
+            manifiesto de las compilaciones incrementales)
+        perfil: PerfilEtapas opcional donde se acumula el perfil de todas las
+            compilaciones, también las de los otros procesos
+    
+    Returns:
+        ResultadoLote con un resultado por trabajo, en el mismo orden
+    
+    Raises:
+        ValueError: Si el número de procesos es negativo
+    """
+    if jobs < 0:
+        raise ValueError(f"El número de procesos no puede ser negativo: {jobs}")
+    jobs = jobs or os.cpu_count() or 1
+    inicio = time.perf_counter()
+    resultados = []
+    
+    if jobs == 1 or len(trabajos) <= 1:
+        for trabajo in trabajos:
+            resultado = _compilar_trozo([trabajo], nivel_complejidad, directorio_cache, con_huellas, perfil)[0]
+            if al_completar:
+                al_completar(resultado)
+            resultados.append(resultado)
+        return ResultadoLote(resultados, time.perf_counter() - inicio)
+    
+    if not tam_trozo:
+        tam_trozo = max(1, min(64, -(-len(trabajos) // (jobs * 4))))
+    
+    # concurrent.futures.process importa multiprocessing, que solo se necesita aquí
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    
+    trozos = [trabajos[i:i + tam_trozo] for i in range(0, len(trabajos), tam_trozo)]
+    por_trozo = [None] * len(trozos)
+    
+    with ProcessPoolExecutor(max_workers=min(jobs, len(trozos))) as pool:
+        futuros = {
+            pool.submit(_compilar_trozo_perfilado if perfil is not None else _compilar_trozo,
+                        trozo, nivel_complejidad, directorio_cache, con_huellas): indice
+            for indice, trozo in enumerate(trozos)
+        }
+        for futuro in as_completed(futuros):
+            indice = futuros[futuro]
+            try:
+                resultado = futuro.result()
+                if perfil is not None:
+                    resultado, datos = resultado
+                    perfil.agregar(datos)
+                por_trozo[indice] = resultado
+            except Exception as e:
+                # El proceso que compilaba el trozo terminó de forma inesperada
+                por_trozo[indice] = [ResultadoArchivo(entrada, salida, error=str(e) or repr(e))
+                                     for entrada, salida in trozos[indice]]
+            if al_completar:
+                for resultado in por_trozo[indice]:
+                    al_completar(resultado)
+    
+    for trozo in por_trozo:
+        resultados.extend(trozo)
+    
+    return ResultadoLote(resultados, time.perf_counter() - inicio)
+
+
+class Manifiesto:
+    """
+    Manifiesto de una compilación incremental
+    
+    Para cada archivo fuente guarda su huella (fecha de modificación en ns,
+    tamaño y hash SHA-256 del contenido), el nivel de complejidad, la versión
+    del compilador, la ruta de salida y la huella del HTML generado. Un
+    archivo se considera sin cambios si coinciden el nivel, la versión y la
+    salida y, tanto para la fuente como para el HTML, coinciden la fecha y el
+    tamaño o, si no, el hash.
+    """
+    
+    VERSION_FORMATO = 1
+    
+    def __init__(self, ruta):
+        """
+        Carga el manifiesto de una ruta, o crea uno vacío si no existe o no es válido
+        
+        Args:
+            ruta: Ruta del archivo JSON del manifiesto
+        """
+        self.ruta = ruta
+        self.entradas = {}
+        self._modificado = False
+        self._vistos = set()
+        
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            if datos.get('formato') == self.VERSION_FORMATO:
+                self.entradas = datos.get('archivos', {})
+        except (OSError, ValueError, AttributeError):
+            pass
+    
+    @staticmethod
+    def ruta_por_defecto(directorio_salida=None):
+        """Devuelve la ruta del manifiesto junto al directorio de salida (o en el actual)"""
+        return os.path.join(directorio_salida or os.curdir, NOMBRE_MANIFIESTO)
+    
+    def pendientes(self, trabajos, nivel_complejidad):
+        """
+        Separa los trabajos que hay que compilar de los que no han cambiado
+        
+        Args:
+            trabajos: Lista de tuplas (ruta_entrada, ruta_salida)
+            nivel_complejidad: Nivel de complejidad de la compilación
+        
+        Returns:
+            Tupla (trabajos a compilar, número de trabajos sin cambios)
+        """
+        pendientes = []
+        omitidos = 0
+        actual = os.getcwd()
+        
+        for entrada, salida in trabajos:
+            clave = _clave(entrada, actual)
+            registro = self.entradas.get(clave)
+            self._vistos.add(clave)
+            
+            if registro is not None and self._sin_cambios(registro, entrada, _clave(salida, actual),
+                                                          nivel_complejidad):
+                omitidos += 1
+            else:
+                pendientes.append((entrada, salida))
+        
+        return pendientes, omitidos
+    
+    def registrar(self, resultados, nivel_complejidad):
+        """
+        Anota en el manifiesto los archivos compilados correctamente
+        
+        Los archivos con errores se eliminan del manifiesto para que se
+        vuelvan a compilar en la siguiente ejecución.
+        
+        Args:
+            resultados: Lista de ResultadoArchivo calculados con huella
+            nivel_complejidad: Nivel de complejidad de la compilación
+        """
+        actual = os.getcwd()
+        
+        for resultado in resultados:
+            clave = _clave(resultado.entrada, actual)
+            self._vistos.add(clave)
+            self._modificado = True
+            
+            if resultado.error is not None or resultado.huella is None:
+                self.entradas.pop(clave, None)
+                continue
+            
+            self.entradas[clave] = dict(
+                resultado.huella,
+                nivel=nivel_complejidad,
+                version=__version__,
+                salida=_clave(resultado.salida, actual),
+            )
+    
+    def guardar(self):
+        """
+        Escribe el manifiesto de forma atómica si ha cambiado
+        
+        Se descartan las fuentes que ya no existen entre las que no formaban
+        parte de esta compilación; las demás se acaban de comprobar.
+        """
+        for clave in [c for c in self.entradas if c not in self._vistos]:
+            if not os.path.exists(clave):
+                del self.entradas[clave]
+                self._modificado = True
+        
+        if not self._modificado and os.path.exists(self.ruta):
+            return
+        
+        directorio = os.path.dirname(os.path.abspath(self.ruta))
+        os.makedirs(directorio, exist_ok=True)
+        
+        # json.dumps usa el codificador en C; json.dump escribe por fragmentos en Python
+        contenido = json.dumps({'formato': self.VERSION_FORMATO, 'archivos': self.entradas})
+        descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+                f.write(contenido)
+            os.replace(temporal, self.ruta)
+        except BaseException:
+            os.unlink(temporal)
+            raise
+        
+        self._modificado = False
+    
+    def _sin_cambios(self, registro, entrada, salida, nivel_complejidad):
+        """Comprueba si un archivo fuente y su salida siguen como en el manifiesto"""
+        if (registro.get('nivel') != nivel_complejidad or registro.get('version') != __version__
+                or registro.get('salida') != salida):
+            return False
+        
+        # La salida puede haberse editado o truncado a mano desde la última compilación
+        return (self._coincide(registro, salida, 'mtime_ns_salida', 'tamano_salida', 'hash_salida')
+                and self._coincide(registro, entrada, 'mtime_ns', 'tamano', 'hash'))
+    
+    def _coincide(self, registro, ruta, clave_fecha, clave_tamano, clave_hash):
+        """
+        Comprueba si un archivo coincide con su huella del manifiesto
+        
+        Si coinciden la fecha y el tamaño no se lee el archivo; si solo
+        coincide el tamaño se decide por el hash y se actualiza la fecha.
+        """
+        try:
+            estado = os.stat(ruta)
+        except OSError:
+            return False
+        
+        if estado.st_size != registro.get(clave_tamano):
+            return False
+        if estado.st_mtime_ns == registro.get(clave_fecha):
+            return True
+        
+        # Misma longitud pero otra fecha: decidir por el contenido
+        if _hash_archivo(ruta) != registro.get(clave_hash):
+            return False
+        registro[clave_fecha] = estado.st_mtime_ns
+        self._modificado = True
+        return True
+
+
+def compilar_lote_incremental(trabajos, ruta_manifiesto, nivel_complejidad=3, forzar=False, **opciones):
+    """
+    Compila solo los trabajos cuyo archivo fuente o configuración han cambiado
+    
+    Args:
+        trabajos: Lista de tuplas (ruta_entrada, ruta_salida)
+        ruta_manifiesto: Ruta del manifiesto de la compilación
+        nivel_complejidad: Nivel de complejidad del compilador (1-3)
+        forzar: Compilar todos los trabajos aunque no hayan cambiado
+        **opciones: Argumentos adicionales de compilar_lote
+    
+    Returns:
+        ResultadoLote de los archivos compilados, con el número de omitidos
+    """
+    inicio = time.perf_counter()
+    manifiesto = Manifiesto(ruta_manifiesto)
+    
+    if forzar:
+        pendientes, omitidos = list(trabajos), 0
+    else:
+        pendientes, omitidos = manifiesto.pendientes(trabajos, nivel_complejidad)
+    
+    resultado = compilar_lote(pendientes, nivel_complejidad, con_huellas=True, **opciones)
+    resultado.omitidos = omitidos
+    
+    manifiesto.registrar(resultado.archivos, nivel_complejidad)
+    manifiesto.guardar()
+    
+    # El tiempo del lote incluye la comprobación de cambios y el manifiesto
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
+
+
+def _compilar_trozo(trozo, nivel_complejidad, directorio_cache, con_huellas=False, perfil=None):
+    """
+    Compila un trozo de trabajos con el compilador del proceso actual
+    
+    Con un PerfilEtapas se usa un compilador propio, sin caché, que lo
+    activa en cada etapa, de modo que el perfil refleja la compilación
+    completa de cada archivo.
+    """
+    if perfil is not None:
+        compiler = Compiler(nivel_complejidad, al_iniciar_etapa=perfil.al_iniciar_etapa,
+                            al_completar_etapa=perfil.al_completar_etapa)
+        perfil.iniciar()
+    else:
+        registro = _registros.get(directorio_cache)
+        if registro is None:
+            cache = CacheDisco(directorio_cache) if directorio_cache else None
+            registro = _registros[directorio_cache] = RegistroCompiladores(cache=cache)
+        compiler = registro.obtener(nivel_complejidad)
+    
+    resultados = []
+    for entrada, salida in trozo:
+        try:
+            directorio = os.path.dirname(salida)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            
+            # La fecha y el hash se toman antes de leer: si el archivo cambia
+            # durante la compilación, la huella es la del contenido anterior y
+            # la siguiente compilación incremental lo detecta
+            estado = os.stat(entrada)
+            hash_entrada = _hash_archivo(entrada) if con_huellas else None
+            compiler.compilar_archivo(entrada, salida)
+            
+            huella = None
+            if con_huellas:
+                estado_salida = os.stat(salida)
+                huella = {
+                    'mtime_ns': estado.st_mtime_ns,
+                    'tamano': estado.st_size,
+                    'hash': hash_entrada,
+                    'mtime_ns_salida': estado_salida.st_mtime_ns,
+                    'tamano_salida': estado_salida.st_size,
+                    'hash_salida': _hash_archivo(salida),
+                }
+            resultados.append(ResultadoArchivo(entrada, salida, estado.st_size, huella=huella))
+        except (SimpleDocError, IOError, UnicodeDecodeError) as e:
+            resultados.append(ResultadoArchivo(entrada, salida, error=str(e)))
+    
+    if perfil is not None:
+        perfil.detener()
+    
+    return resultados
+
+
+def _compilar_trozo_perfilado(trozo, nivel_complejidad, directorio_cache, con_huellas=False):
+    """
+    Compila un trozo en otro proceso perfilando sus etapas
+    
+    Returns:
+        Tupla (resultados, datos del perfil) para agregarlos en el proceso principal
+    """
+    from .perfilado import PerfilEtapas
+    
+    perfil = PerfilEtapas()
+    resultados = _compilar_trozo(trozo, nivel_complejidad, directorio_cache, con_huellas, perfil)
+    return resultados, perfil.datos()
+
+
+def _hash_archivo(ruta):
+    """Devuelve el hash SHA-256 del contenido de un archivo"""
+    with open(ruta, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+def _archivos_directorio(directorio, recursivo):
+    """Devuelve los archivos SimpleDoc de un directorio, ordenados"""
+    if not recursivo:
+        return sorted(
+            os.path.join(directorio, nombre) for nombre in os.listdir(directorio)
+            if nombre.endswith(EXTENSIONES) and os.path.isfile(os.path.join(directorio, nombre))
+        )
+    
+    rutas = []
+    for actual, subdirectorios, nombres in os.walk(directorio):
+        subdirectorios.sort()
+        prefijo = os.path.join(actual, '')
+        rutas.extend(prefijo + nombre for nombre in sorted(nombres) if nombre.endswith(EXTENSIONES))
+    return rutas
+
+
+def _raiz_patron(patron):
+    """Devuelve la parte inicial de un patrón glob que no contiene comodines"""
+    partes = []
+    for parte in patron.split(os.sep):
+        if glob.has_magic(parte):
+            break
+        partes.append(parte)
+    return os.sep.join(partes)
+
+
+def _ruta_salida(ruta, raiz, directorio_salida):
+    """Calcula la ruta del HTML de un archivo de entrada"""
+    if ruta.endswith(EXTENSIONES):
+        base = ruta.rsplit('.', 1)[0] + '.html'
+    else:
+        base = ruta + '.html'
+    
+    if directorio_salida is None:
+        return base
+    
+    if raiz in ('', os.curdir):
+        relativa = os.path.normpath(base)
+    elif base.startswith(raiz + os.sep):
+        relativa = base[len(raiz) + 1:]
+    else:
+        relativa = os.path.relpath(base, raiz)
+    
+    return os.path.join(directorio_salida, relativa)
+
+
+def _absoluta(ruta, actual):
+    """Versión rápida de os.path.abspath para rutas ya normalizadas"""
+    return ruta if os.path.isabs(ruta) else actual + os.sep + ruta
+
+
+def _clave(ruta, actual):
+    """
+    Ruta absoluta con la que se identifica un archivo en el manifiesto
+    
+    Las rutas de salida incluyen el directorio de salida tal como se indicó
+    (``./build``, ``../build``), así que se normalizan antes de compararlas.
+    """
+    return _absoluta(os.path.normpath(ruta), actual)
@@ -0,0 +1,245 @@
+"""
+Informe de memoria de la compilación con tracemalloc
+
+Un InformeMemoria observa las etapas de la compilación mediante las
+funciones al_iniciar_etapa y al_completar_etapa del compilador y registra,
+para cada una, el pico de memoria que alcanzó y la memoria que quedó
+retenida al terminar, los sitios del código que más memoria reservaron y
+cuántos tokens y objetos ASTNode seguían vivos. Sirve para averiguar si la
+memoria de un documento grande se va en los tokens, en el AST o en el HTML
+de salida.
+
+tracemalloc hace la compilación varias veces más lenta, así que el informe
+solo se obtiene cuando se pide (Compiler.compilar_con_memoria o la opción
+--memory-report de la línea de comandos).
+"""
+
+import gc
+import os
+import tracemalloc
+from .lexer import Token, TokenBuffer
+from .parser import ASTNode
+
+
+# Número de sitios de reserva que se registran por etapa
+SITIOS = 10
+
+# Tipos cuyos objetos vivos se cuentan al terminar cada etapa
+TIPOS_CONTADOS = (Token, ASTNode)
+
+# Contenedores compactos cuyos elementos se cuentan como objetos del tipo
+# indicado aunque no existan como objetos separados
+CONTENEDORES = {TokenBuffer: Token}
+
+# Las reservas del propio informe y de tracemalloc no se atribuyen a ninguna etapa
+_FILTROS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+)
+
+
+class SitioReserva:
+    """Línea de código que reservó memoria durante una etapa y la retenía al terminarla"""
+    
+    __slots__ = ('archivo', 'linea', 'bytes_retenidos', 'bloques')
+    
+    def __init__(self, archivo, linea, bytes_retenidos, bloques):
+        self.archivo = archivo
+        self.linea = linea
+        self.bytes_retenidos = bytes_retenidos
+        self.bloques = bloques
+    
+    def a_diccionario(self):
+        """Devuelve el sitio como diccionario serializable a JSON"""
+        return {
+            'archivo': self.archivo,
+            'linea': self.linea,
+            'bytes_retenidos': self.bytes_retenidos,
+            'bloques': self.bloques
+        }
+    
+    def __repr__(self):
+        return f"SitioReserva({os.path.basename(self.archivo)}:{self.linea}, {self.bytes_retenidos} bytes)"
+
+
+class MemoriaEtapa:
+    """
+    Memoria de una etapa de la compilación
+    
+    Los bytes se cuentan respecto a la memoria que había al empezar la etapa:
+    ``bytes_pico`` es lo máximo que llegó a reservar a la vez y
+    ``bytes_retenidos`` lo que seguía reservado al terminar (negativo si la
+    etapa liberó más de lo que reservó).
+    """
+    
+    __slots__ = ('bytes_pico', 'bytes_retenidos', 'sitios', 'objetos')
+    
+    def __init__(self, bytes_pico, bytes_retenidos, sitios, objetos):
+        self.bytes_pico = bytes_pico
+        self.bytes_retenidos = bytes_retenidos
+        # Lista de SitioReserva, de mayor a menor
+        self.sitios = sitios
+        # Objetos vivos al terminar la etapa, por nombre de tipo
+        self.objetos = objetos
+    
+    def a_diccionario(self):
+        """Devuelve la medida como diccionario serializable a JSON"""
+        return {
+            'bytes_pico': self.bytes_pico,
+            'bytes_retenidos': self.bytes_retenidos,
+            'sitios': [sitio.a_diccionario() for sitio in self.sitios],
+            'objetos': dict(self.objetos)
+        }
+    
+    def __repr__(self):
+        return f"MemoriaEtapa(bytes_pico={self.bytes_pico}, bytes_retenidos={self.bytes_retenidos})"
+
+
+class InformeMemoria:
+    """
+    Memoria de cada etapa de una o varias compilaciones
+    
+    Se pasa como observador de las etapas al crear el compilador, o se
+    obtiene de Compiler.compilar_con_memoria. Entre iniciar() y detener()
+    se registran también el pico y la memoria retenida de todo el proceso
+    de compilación, incluidos la lectura y la escritura de archivos. Si una
+    etapa se repite, se conserva su última medida. tracemalloc registra la
+    memoria de todo el proceso, así que las compilaciones de otros hilos
+    también se atribuyen a la etapa en curso.
+    """
+    
+    __slots__ = ('etapas', 'bytes_pico', 'bytes_retenidos', 'limite_sitios', '_base', '_pico',
+                 '_inicio_etapa', '_instantanea', '_propio')
+    
+    def __init__(self, limite_sitios=SITIOS):
+        """
+        Args:
+            limite_sitios: Número de sitios de reserva que se registran por etapa
+        """
+        # Medidas por nombre de etapa, en el orden en que se completaron
+        self.etapas = {}
+        self.bytes_pico = 0
+        self.bytes_retenidos = 0
+        self.limite_sitios = limite_sitios
+        self._base = None
+        self._pico = 0
+        self._inicio_etapa = 0
+        self._instantanea = None
+        # Si tracemalloc lo inició este informe, y por tanto debe detenerlo
+        self._propio = False
+    
+    def iniciar(self):
+        """Empieza a registrar la memoria, iniciando tracemalloc si no estaba activo"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._propio = True
+        
+        self._base = tracemalloc.get_traced_memory()[0]
+        self._pico = self._base
+        tracemalloc.reset_peak()
+    
+    def detener(self):
+        """Termina el registro y detiene tracemalloc si lo inició este informe"""
+        if self._base is None:
+            return
+        
+        actual, pico = tracemalloc.get_traced_memory()
+        self._pico = max(self._pico, pico)
+        self.bytes_pico = self._pico - self._base
+        self.bytes_retenidos = actual - self._base
+        self._base = None
+        self._instantanea = None
+        
+        if self._propio:
+            tracemalloc.stop()
+            self._propio = False
+    
+    def al_iniciar_etapa(self, etapa):
+        """Función al_iniciar_etapa del compilador: toma la memoria inicial de la etapa"""
+        if self._base is None:
+            self.iniciar()
+        
+        # La instantánea se toma antes de leer la memoria para no atribuirla a la etapa
+        self._instantanea = tracemalloc.take_snapshot().filter_traces(_FILTROS)
+        actual, pico = tracemalloc.get_traced_memory()
+        self._pico = max(self._pico, pico)
+        self._inicio_etapa = actual
+        tracemalloc.reset_peak()
+    
+    def al_completar_etapa(self, etapa, medida=None):
+        """Función al_completar_etapa del compilador: registra la memoria de la etapa"""
+        actual, pico = tracemalloc.get_traced_memory()
+        self._pico = max(self._pico, pico)
+        
+        sitios = []
+        if self._instantanea is not None:
+            final = tracemalloc.take_snapshot().filter_traces(_FILTROS)
+            # compare_to ordena por el valor absoluto de la diferencia; solo interesan los aumentos
+            diferencias = [d for d in final.compare_to(self._instantanea, 'lineno') if d.size_diff > 0]
+            diferencias.sort(key=lambda diferencia: diferencia.size_diff, reverse=True)
+            for diferencia in diferencias[:self.limite_sitios]:
+                marco = diferencia.traceback[0]
+                sitios.append(SitioReserva(marco.filename, marco.lineno, diferencia.size_diff,
+                                           diferencia.count_diff))
+            self._instantanea = None
+        
+        self.etapas[etapa] = MemoriaEtapa(pico - self._inicio_etapa, actual - self._inicio_etapa, sitios,
+                                          contar_objetos())
+    
+    def a_diccionario(self):
+        """Devuelve el informe como diccionario serializable a JSON"""
+        return {
+            'etapas': {etapa: memoria.a_diccionario() for etapa, memoria in self.etapas.items()},
+            'bytes_pico': self.bytes_pico,
+            'bytes_retenidos': self.bytes_retenidos
+        }
+    
+    def resumen(self):
+        """Devuelve una tabla legible con la memoria de cada etapa y sus principales sitios de reserva"""
+        nombres = [tipo.__name__ for tipo in TIPOS_CONTADOS]
+        lineas = [f"{'etapa':<12} {'pico (KB)':>11} {'retenido (KB)':>14}" + "".join(f" {n:>9}" for n in nombres)]
+        for etapa, memoria in self.etapas.items():
+            lineas.append(f"{etapa:<12} {memoria.bytes_pico / 1024:>11.1f} {memoria.bytes_retenidos / 1024:>14.1f}"
+                          + "".join(f" {memoria.objetos.get(n, 0):>9}" for n in nombres))
+        lineas.append(f"{'total':<12} {self.bytes_pico / 1024:>11.1f} {self.bytes_retenidos / 1024:>14.1f}")
+        
+        for etapa, memoria in self.etapas.items():
+            if memoria.sitios:
+                lineas.append(f"Sitios de reserva de {etapa}:")
+                for sitio in memoria.sitios:
+                    lineas.append(f"  {sitio.bytes_retenidos / 1024:>10.1f} KB {sitio.bloques:>8} bloques  "
+                                  f"{os.path.basename(sitio.archivo)}:{sitio.linea}")
+        return "\n".join(lineas)
+    
+    def __repr__(self):
+        return (f"InformeMemoria(bytes_pico={self.bytes_pico}, bytes_retenidos={self.bytes_retenidos}, "
+                f"etapas={list(self.etapas)})")
+
+
+def contar_objetos(tipos=TIPOS_CONTADOS, contenedores=CONTENEDORES):
+    """
+    Cuenta los objetos vivos de cada tipo que sigue el recolector de basura
+    
+    El compilador guarda los tokens en un TokenBuffer, sin un objeto Token
+    por cada uno, así que los elementos de los contenedores vivos se suman
+    al tipo que representan.
+    
+    Args:
+        tipos: Tipos a contar; también se cuentan sus subclases
+        contenedores: Diccionario {tipo del contenedor: tipo de sus elementos}
+    
+    Returns:
+        Diccionario {nombre del tipo: número de objetos}
+    """
+    cuentas = dict.fromkeys((tipo.__name__ for tipo in tipos), 0)
+    for objeto in gc.get_objects():
+        for tipo in tipos:
+            if isinstance(objeto, tipo):
+                cuentas[tipo.__name__] += 1
+                break
+        else:
+            for contenedor, tipo in contenedores.items():
+                if isinstance(objeto, contenedor) and tipo.__name__ in cuentas:
+                    cuentas[tipo.__name__] += len(objeto)
+                    break
+    return cuentas
@@ -2,25 +2,85 @@
 Módulo para el análisis sintáctico de documentos SimpleDoc
 """
 
+from enum import StrEnum
 from .lexer import TokenType
 from .exceptions import ParserError
 
 
+class TipoNodo(StrEnum):
+    """
+    Tipos de nodo del AST
+    
+    Cada tipo es igual a su nombre como cadena (``TipoNodo.TITULO1 == "TITULO1"``)
+    y tiene además un ``codigo`` entero consecutivo, que las etapas usan como
+    índice de sus tablas de despacho.
+    """
+    
+    DOCUMENTO = "DOCUMENTO"
+    TITULO1 = "TITULO1"
+    TITULO2 = "TITULO2"
+    TITULO3 = "TITULO3"
+    TEXTO = "TEXTO"
+    SALTO_LINEA = "SALTO_LINEA"
+    NEGRITA = "NEGRITA"
+    CURSIVA = "CURSIVA"
+    LISTA_ITEM = "LISTA_ITEM"
+    LISTA_NUM_ITEM = "LISTA_NUM_ITEM"
+    CODIGO_BLOQUE = "CODIGO_BLOQUE"
+    ENLACE = "ENLACE"
+    IMAGEN = "IMAGEN"
+    
+    def __init__(self, valor):
+        self.codigo = len(self.__class__._member_names_)
+
+
+def tabla_por_tipo(valores, defecto=None):
+    """
+    Construye una tabla densa indexada por ``TipoNodo.codigo``
+    
+    Args:
+        valores: Diccionario {tipo de nodo: valor}; los tipos pueden ser cadenas
+        defecto: Valor de los tipos que no aparecen en el diccionario
+    
+    Returns:
+        Lista con una posición por tipo de nodo
+    """
+    tabla = [defecto] * len(TipoNodo)
+    for tipo, valor in valores.items():
+        tabla[TipoNodo(tipo).codigo] = valor
+    return tabla
+
+
 class ASTNode:
-    """Nodo base para el árbol de sintaxis abstracta"""
+    """
+    Nodo base para el árbol de sintaxis abstracta
+    
+    Todos los nodos tienen los mismos campos: ``url`` solo se usa en enlaces e
+    imágenes y ``numero`` en los elementos de lista numerada; en los demás
+    nodos valen None. Los nodos sin hijos comparten una tupla vacía en lugar
+    de crear cada uno su propia lista; para añadir hijos se usa add_hijo.
+    """
     
-    def __init__(self, tipo, valor=None, hijos=None, linea=None):
-        self.tipo = tipo
+    __slots__ = ('tipo', 'valor', 'hijos', 'linea', 'url', 'numero')
+    
+    def __init__(self, tipo, valor=None, hijos=None, linea=None, url=None, numero=None):
+        # Los nodos creados con el nombre del tipo como cadena usan el miembro de TipoNodo
+        self.tipo = tipo if tipo.__class__ is TipoNodo else TipoNodo(tipo)
         self.valor = valor
-        self.hijos = hijos or []
+        self.hijos = hijos or ()
         self.linea = linea
+        self.url = url
+        self.numero = numero
     
     def __repr__(self):
         return f"ASTNode(tipo={self.tipo}, valor={self.valor}, hijos={len(self.hijos)}, linea={self.linea})"
     
     def add_hijo(self, hijo):
         """Añade un hijo al nodo"""
-        self.hijos.append(hijo)
+        if self.hijos:
+            self.hijos.append(hijo)
+        else:
+            self.hijos = [hijo]
 
 
 class Parser:
@@ -28,6 +88,8 @@ class Parser:
     Analizador sintáctico para el lenguaje SimpleDoc
     
     Convierte una secuencia de tokens en un árbol de sintaxis abstracta (AST).
+    El parser solo guarda su configuración, por lo que una misma instancia
+    puede usarse desde varios hilos a la vez.
     """
     
     def __init__(self, nivel_complejidad=3):
@@ -40,47 +102,102 @@ class Parser:
                 2 - Intermedio: Básico + formateo (negrita, cursiva) y listas
                 3 - Avanzado: Intermedio + enlaces y bloques de código
         """
-        self.tokens = []
-        self.posicion = 0
         self.nivel_complejidad = min(max(nivel_complejidad, 1), 3)
+        
+        # Tabla de despacho indexada por TokenType: los tipos de token de un
+        # nivel superior se saltan igual que los tokens no reconocidos
+        self.manejadores = [_AnalisisSintactico._saltar] * (max(TokenType) + 1)
+        for nivel, tipos, manejador in _MANEJADORES:
+            if nivel <= self.nivel_complejidad:
+                for tipo in tipos:
+                    self.manejadores[tipo] = manejador
     
-    def parsear(self, tokens):
+    def parsear(self, tokens, arena=False):
         """
-        Convierte una lista de tokens en un árbol de sintaxis abstracta
+        Convierte una secuencia de tokens en un árbol de sintaxis abstracta
         
         Args:
-            tokens: Lista de tokens generada por el lexer
-            
+            tokens: Lista de tokens generada por el lexer, TokenBuffer o
+                cualquier iterable de tokens (por ejemplo Lexer.iter_tokens)
+            arena: Si es True, el AST se guarda en una ArenaAST (arrays
+                paralelos en lugar de un objeto por nodo)
+        
         Returns:
-            Nodo raíz del AST
+            Nodo raíz del AST, o la ArenaAST si arena es True
         """
-        self.tokens = tokens
-        self.posicion = 0
+        if arena:
+            from .arena import construir_arena
+            return construir_arena(self.nivel_complejidad, tokens)
         
         # Crear nodo raíz para el documento
-        raiz = ASTNode("DOCUMENTO")
+        raiz = ASTNode(TipoNodo.DOCUMENTO)
+        
+        for nodo in self.iter_nodos(tokens):
+            raiz.add_hijo(nodo)
+        
+        return raiz
+    
+    def iter_nodos(self, tokens):
+        """
+        Genera los nodos de primer nivel del documento a medida que se parsean
+        
+        Los tokens se extraen de un iterador con un único token de anticipación,
+        por lo que la entrada puede ser un generador que nunca se materializa.
+        
+        Args:
+            tokens: Iterable de tokens
+        
+        Yields:
+            Nodos AST hijos del documento, en orden
+        """
+        analisis = _AnalisisSintactico(self.nivel_complejidad, tokens, self.manejadores)
         
         # Procesar tokens mientras no lleguemos al final
-        while not self._es_fin():
-            nodo = self._parsear_elemento()
+        while not analisis._es_fin():
+            nodo = analisis._parsear_elemento()
             if nodo:
-                raiz.add_hijo(nodo)
+                yield nodo
+
+
+class _AnalisisSintactico:
+    """
+    Estado de un único análisis sintáctico
+    
+    Guarda la posición dentro de la secuencia de tokens, de modo que cada
+    llamada al parser trabaja sobre su propio estado.
+    """
+    
+    def __init__(self, nivel_complejidad, tokens, manejadores):
+        """
+        Inicializa el estado de un análisis
         
-        return raiz
+        Args:
+            nivel_complejidad: Nivel de complejidad del parser
+            tokens: Iterable de tokens
+            manejadores: Tabla de despacho del parser, indexada por TokenType
+        """
+        self.nivel_complejidad = nivel_complejidad
+        self.manejadores = manejadores
+        self.tokens = tokens
+        self.posicion = 0
+        self._iterador = iter(tokens)
+        self._actual = next(self._iterador, None)
     
     def _token_actual(self):
         """Devuelve el token actual sin avanzar"""
-        return None if self._es_fin() else self.tokens[self.posicion]
+        return None if self._es_fin() else self._actual
     
     def _avanzar(self):
         """Avanza al siguiente token"""
         token = self._token_actual()
+        if token is not None:
+            self._actual = next(self._iterador, None)
         self.posicion += 1
         return token
     
     def _es_fin(self):
         """Comprueba si hemos llegado al final de los tokens"""
-        return self.posicion >= len(self.tokens) or self.tokens[self.posicion].tipo == TokenType.EOF
+        return self._actual is None or self._actual.tipo == TokenType.EOF
     
     def _consumir(self, tipo_token):
         """
@@ -88,10 +205,10 @@ class Parser:
         
         Args:
             tipo_token: Tipo de token esperado
-            
+        
         Returns:
             El token consumido
-            
+        
         Raises:
             ParserError: Si el tipo de token no coincide con el esperado
         """
@@ -113,81 +230,42 @@ class Parser:
         Parsea un elemento del documento
         
         Returns:
-            Nodo AST correspondiente al elemento parseado
+            Nodo AST correspondiente al elemento parseado, o None si el token
+            no forma ningún elemento en este nivel de complejidad
         """
         token = self._token_actual()
         
         if not token:
             return None
         
-        # Manejar diferentes tipos de tokens
-        if token.tipo == TokenType.SALTO_LINEA:
-            self._avanzar()
-            return ASTNode("SALTO_LINEA", linea=token.linea)
-        
-        elif token.tipo == TokenType.TITULO1:
-            self._avanzar()
-            return ASTNode("TITULO1", token.valor, linea=token.linea)
-        
-        elif token.tipo == TokenType.TITULO2:
-            self._avanzar()
-            return ASTNode("TITULO2", token.valor, linea=token.linea)
-        
-        elif token.tipo == TokenType.TITULO3:
-            self._avanzar()
-            return ASTNode("TITULO3", token.valor, linea=token.linea)
-        
-        elif token.tipo == TokenType.TEXTO:
-            self._avanzar()
-            return ASTNode("TEXTO", token.valor, linea=token.linea)
-        
-        # Nivel de complejidad 2 o superior
-        elif self.nivel_complejidad >= 2:
-            if token.tipo == TokenType.NEGRITA_INICIO:
-                return self._parsear_negrita()
-            
-            elif token.tipo == TokenType.CURSIVA_INICIO:
-                return self._parsear_cursiva()
-            
-            elif token.tipo == TokenType.LISTA_ITEM:
-                self._avanzar()
-                return ASTNode("LISTA_ITEM", token.valor, linea=token.linea)
-            
-            elif token.tipo == TokenType.LISTA_NUM_ITEM:
-                self._avanzar()
-                # Extraer el número y el contenido
-                partes = token.valor.split('. ', 1)
-                numero = int(partes[0])
-                contenido = partes[1]
-                nodo = ASTNode("LISTA_NUM_ITEM", contenido, linea=token.linea)
-                nodo.numero = numero
-                return nodo
-        
-        # Nivel de complejidad 3
-        elif self.nivel_complejidad >= 3:
-            if token.tipo == TokenType.CODIGO_BLOQUE:
-                self._avanzar()
-                return ASTNode("CODIGO_BLOQUE", token.valor, linea=token.linea)
-            
-            elif token.tipo == TokenType.ENLACE:
-                self._avanzar()
-                texto, url = token.valor.split('|', 1)
-                nodo = ASTNode("ENLACE", texto, linea=token.linea)
-                nodo.url = url
-                return nodo
-            
-            elif token.tipo == TokenType.IMAGEN:
-                self._avanzar()
-                alt_text, url = token.valor.split('|', 1)
-                nodo = ASTNode("IMAGEN", alt_text, linea=token.linea)
-                nodo.url = url
-                return nodo
-        
-        # Token no reconocido, lo saltamos
+        return self.manejadores[token.tipo](self, token)
+    
+    def _saltar(self, token):
+        """Salta un token no reconocido"""
         self._avanzar()
         return None
     
-    def _parsear_negrita(self):
+    def _parsear_simple(self, token):
+        """Parsea un elemento cuyo valor es el del token (títulos, texto, listas, código)"""
+        self._avanzar()
+        return ASTNode(_NODO_POR_TOKEN[token.tipo], token.fuente[token.inicio:token.fin], linea=token.linea)
+    
+    def _parsear_salto_linea(self, token):
+        """Parsea un salto de línea"""
+        self._avanzar()
+        return ASTNode(TipoNodo.SALTO_LINEA, linea=token.linea)
+    
+    def _parsear_lista_num_item(self, token):
+        """Parsea un elemento de lista numerada, separando el número del contenido"""
+        self._avanzar()
+        return ASTNode(TipoNodo.LISTA_NUM_ITEM, token.texto, linea=token.linea, numero=token.numero)
+    
+    def _parsear_referencia(self, token):
+        """Parsea un enlace o una imagen a partir de los campos texto y url del token"""
+        self._avanzar()
+        return ASTNode(_NODO_POR_TOKEN[token.tipo], token.texto, linea=token.linea, url=token.url)
+    
+    def _parsear_negrita(self, token=None):
         """
         Parsea un texto en negrita
         
@@ -195,7 +273,7 @@ class Parser:
             Nodo AST de tipo NEGRITA
         """
         inicio = self._consumir(TokenType.NEGRITA_INICIO)
-        nodo = ASTNode("NEGRITA", linea=inicio.linea)
+        nodo = ASTNode(TipoNodo.NEGRITA, linea=inicio.linea)
         
         # Parsear contenido de la negrita
         token = self._token_actual()
@@ -216,7 +294,7 @@ class Parser:
         
         return nodo
     
-    def _parsear_cursiva(self):
+    def _parsear_cursiva(self, token=None):
         """
         Parsea un texto en cursiva
         
@@ -224,7 +302,7 @@ class Parser:
             Nodo AST de tipo CURSIVA
         """
         inicio = self._consumir(TokenType.CURSIVA_INICIO)
-        nodo = ASTNode("CURSIVA", linea=inicio.linea)
+        nodo = ASTNode(TipoNodo.CURSIVA, linea=inicio.linea)
         
         # Parsear contenido de la cursiva
         token = self._token_actual()
@@ -244,3 +322,29 @@ class Parser:
             raise ParserError("Falta el cierre de cursiva (*)", inicio.linea, inicio.valor)
         
         return nodo
+
+
+# Tipo de nodo que produce cada tipo de token con valor propio
+_NODO_POR_TOKEN = {
+    TokenType.TITULO1: TipoNodo.TITULO1,
+    TokenType.TITULO2: TipoNodo.TITULO2,
+    TokenType.TITULO3: TipoNodo.TITULO3,
+    TokenType.TEXTO: TipoNodo.TEXTO,
+    TokenType.LISTA_ITEM: TipoNodo.LISTA_ITEM,
+    TokenType.CODIGO_BLOQUE: TipoNodo.CODIGO_BLOQUE,
+    TokenType.ENLACE: TipoNodo.ENLACE,
+    TokenType.IMAGEN: TipoNodo.IMAGEN,
+}
+
+# Manejadores del parser: (nivel mínimo, tipos de token, función)
+_MANEJADORES = (
+    (1, (TokenType.SALTO_LINEA,), _AnalisisSintactico._parsear_salto_linea),
+    (1, (TokenType.TITULO1, TokenType.TITULO2, TokenType.TITULO3, TokenType.TEXTO),
+     _AnalisisSintactico._parsear_simple),
+    (2, (TokenType.NEGRITA_INICIO,), _AnalisisSintactico._parsear_negrita),
+    (2, (TokenType.CURSIVA_INICIO,), _AnalisisSintactico._parsear_cursiva),
+    (2, (TokenType.LISTA_ITEM,), _AnalisisSintactico._parsear_simple),
+    (2, (TokenType.LISTA_NUM_ITEM,), _AnalisisSintactico._parsear_lista_num_item),
+    (3, (TokenType.CODIGO_BLOQUE,), _AnalisisSintactico._parsear_simple),
+    (3, (TokenType.ENLACE, TokenType.IMAGEN), _AnalisisSintactico._parsear_referencia),
+)
@@ -0,0 +1,249 @@
+"""
+Perfilado de la compilación con cProfile, separado por etapa
+
+Un PerfilEtapas mantiene un perfil de cProfile por cada etapa de la
+compilación (y otro para el trabajo fuera de ellas, como leer y escribir
+archivos) y cambia de perfil al empezar y terminar cada etapa mediante las
+funciones al_iniciar_etapa y al_completar_etapa del compilador. Los perfiles
+de varias compilaciones, incluso de otros procesos, se acumulan en el mismo
+PerfilEtapas.
+
+El resultado se guarda como un archivo de pstats, en el que cada función
+lleva la etapa entre corchetes, y como pilas colapsadas (una línea
+``etapa;función;función microsegundos`` por pila) que pueden leer
+flamegraph.pl, speedscope o inferno.
+"""
+
+import cProfile
+import os
+import pstats
+
+
+# Perfil del trabajo que no pertenece a ninguna etapa
+OTROS = 'otros'
+
+# Tiempo mínimo, en segundos, de las pilas colapsadas que se escriben
+MINIMO_PILA = 1e-6
+
+
+class PerfilEtapas:
+    """Perfiles de cProfile de una o varias compilaciones, uno por etapa"""
+    
+    def __init__(self):
+        # Perfiles de este proceso y estadísticas ya acumuladas, por etapa
+        self._perfiles = {}
+        self._acumulados = {}
+        self._activo = None
+        self._en_curso = False
+    
+    def iniciar(self):
+        """Empieza a perfilar; hasta la primera etapa, el tiempo se atribuye a OTROS"""
+        self._en_curso = True
+        self._activar(OTROS)
+    
+    def detener(self):
+        """Deja de perfilar"""
+        self._desactivar()
+        self._en_curso = False
+    
+    def al_iniciar_etapa(self, etapa):
+        """Función al_iniciar_etapa del compilador: perfila la etapa que empieza"""
+        self._activar(etapa)
+    
+    def al_completar_etapa(self, etapa, medida=None):
+        """Función al_completar_etapa del compilador: vuelve al perfil de OTROS"""
+        self._desactivar()
+        if self._en_curso:
+            self._activar(OTROS)
+    
+    def _activar(self, etapa):
+        """Activa el perfil de una etapa, desactivando el anterior"""
+        self._desactivar()
+        perfil = self._perfiles.get(etapa)
+        if perfil is None:
+            perfil = self._perfiles[etapa] = cProfile.Profile()
+        perfil.enable()
+        self._activo = perfil
+    
+    def _desactivar(self):
+        """Desactiva el perfil activo, si lo hay"""
+        if self._activo is not None:
+            self._activo.disable()
+            self._activo = None
+    
+    def datos(self):
+        """
+        Devuelve las estadísticas de cada etapa en un formato que puede enviarse a otro proceso
+        
+        Returns:
+            Diccionario {etapa: diccionario de estadísticas de pstats}
+        """
+        return {etapa: estadisticas.stats for etapa, estadisticas in self.por_etapa().items()}
+    
+    def agregar(self, datos):
+        """
+        Acumula las estadísticas de otro perfil, por ejemplo de otro proceso
+        
+        Args:
+            datos: Resultado de datos() de otro PerfilEtapas
+        """
+        for etapa, stats in datos.items():
+            estadisticas = pstats.Stats()
+            estadisticas.stats = stats
+            estadisticas.get_top_level_stats()
+            self._acumular(etapa, estadisticas)
+    
+    def _acumular(self, etapa, estadisticas):
+        """Suma unas estadísticas a las acumuladas de una etapa"""
+        if etapa in self._acumulados:
+            self._acumulados[etapa].add(estadisticas)
+        else:
+            self._acumulados[etapa] = estadisticas
+    
+    def por_etapa(self):
+        """
+        Devuelve las estadísticas de cada etapa, incluidas las de los perfiles agregados
+        
+        Returns:
+            Diccionario {etapa: pstats.Stats}
+        """
+        self._desactivar()
+        for etapa, perfil in self._perfiles.items():
+            self._acumular(etapa, pstats.Stats(perfil))
+        self._perfiles = {}
+        
+        if self._en_curso:
+            self._activar(OTROS)
+        return dict(self._acumulados)
+    
+    def estadisticas(self):
+        """
+        Devuelve las estadísticas de todas las etapas juntas
+        
+        Cada función aparece una vez por etapa en la que se ejecutó, con el
+        nombre de la etapa entre corchetes.
+        
+        Returns:
+            pstats.Stats
+        """
+        etiquetadas = {}
+        for etapa, estadisticas in self.por_etapa().items():
+            for funcion, (cc, nc, tt, ct, llamadores) in estadisticas.stats.items():
+                llamadores = {_etiquetar(llamador, etapa): valor for llamador, valor in llamadores.items()}
+                etiquetadas[_etiquetar(funcion, etapa)] = (cc, nc, tt, ct, llamadores)
+        
+        resultado = pstats.Stats()
+        resultado.stats = etiquetadas
+        resultado.get_top_level_stats()
+        return resultado
+    
+    def pilas_colapsadas(self):
+        """
+        Reconstruye las pilas de llamadas de cada etapa en formato colapsado
+        
+        cProfile solo registra pares llamador-llamado, así que el tiempo de una
+        función llamada desde varios sitios se reparte entre sus pilas en
+        proporción al tiempo de cada llamada, como hacen otras herramientas
+        que convierten perfiles de cProfile en flame graphs.
+        
+        Returns:
+            Lista de líneas ``etapa;función;...;función microsegundos``
+        """
+        lineas = []
+        for etapa, estadisticas in self.por_etapa().items():
+            lineas.extend(_colapsar(etapa, estadisticas.stats))
+        return lineas
+    
+    def funciones(self, limite=10):
+        """
+        Devuelve las funciones con más tiempo acumulado de cada etapa
+        
+        Args:
+            limite: Número máximo de funciones por etapa
+        
+        Returns:
+            Diccionario {etapa: lista de diccionarios serializables a JSON}
+        """
+        resultado = {}
+        for etapa, estadisticas in self.por_etapa().items():
+            ordenadas = sorted(estadisticas.stats.items(), key=lambda elemento: elemento[1][3], reverse=True)
+            resultado[etapa] = [
+                {
+                    'funcion': _nombre(funcion),
+                    'llamadas': nc,
+                    'segundos_propios': tt,
+                    'segundos_acumulados': ct
+                }
+                for funcion, (cc, nc, tt, ct, _) in ordenadas[:limite]
+            ]
+        return resultado
+    
+    def guardar(self, ruta):
+        """
+        Escribe el perfil en formato pstats y las pilas colapsadas junto a él
+        
+        Args:
+            ruta: Ruta del archivo de pstats (por ejemplo ``salida.prof``); las
+                pilas se escriben en la misma ruta con extensión ``.collapsed``
+        
+        Returns:
+            Tupla (ruta del archivo de pstats, ruta de las pilas colapsadas)
+        """
+        self.estadisticas().dump_stats(ruta)
+        
+        ruta_pilas = os.path.splitext(ruta)[0] + '.collapsed'
+        with open(ruta_pilas, 'w', encoding='utf-8') as f:
+            for linea in self.pilas_colapsadas():
+                f.write(linea + "\n")
+        
+        return ruta, ruta_pilas
+
+
+def _etiquetar(funcion, etapa):
+    """Añade la etapa al nombre de una función de pstats"""
+    archivo, linea, nombre = funcion
+    return archivo, linea, f"{nombre} [{etapa}]"
+
+
+def _nombre(funcion):
+    """Devuelve un nombre legible de una función de pstats, sin punto y coma"""
+    archivo, linea, nombre = funcion
+    if archivo == '~':
+        texto = nombre
+    else:
+        texto = f"{nombre} ({os.path.basename(archivo)}:{linea})"
+    return texto.replace(';', ',')
+
+
+def _colapsar(etapa, stats):
+    """Convierte las estadísticas de una etapa en líneas de pilas colapsadas"""
+    llamados = {}
+    raices = []
+    for funcion, (_, _, _, _, llamadores) in stats.items():
+        llamadores = [llamador for llamador in llamadores if llamador in stats]
+        if not llamadores:
+            raices.append(funcion)
+        for llamador in llamadores:
+            llamados.setdefault(llamador, []).append((funcion, stats[funcion][4][llamador][3]))
+    
+    tiempos = {}
+    # Cada entrada es (función, tiempo atribuido a esta pila, pila hasta la función)
+    pendientes = [(raiz, stats[raiz][3], (raiz,)) for raiz in raices]
+    
+    while pendientes:
+        funcion, tiempo, pila = pendientes.pop()
+        _, _, propio, acumulado, _ = stats[funcion]
+        proporcion = min(tiempo / acumulado, 1.0) if acumulado else 0.0
+        
+        if propio * proporcion >= MINIMO_PILA:
+            tiempos[pila] = tiempos.get(pila, 0.0) + propio * proporcion
+        
+        for llamado, tiempo_llamada in llamados.get(funcion, ()):
+            tiempo_llamado = tiempo_llamada * proporcion
+            if llamado not in pila and tiempo_llamado >= MINIMO_PILA:
+                pendientes.append((llamado, tiempo_llamado, pila + (llamado,)))
+    
+    return [
+        ";".join([etapa] + [_nombre(funcion) for funcion in pila]) + f" {round(tiempo * 1e6)}"
+        for pila, tiempo in sorted(tiempos.items(), key=lambda elemento: elemento[1], reverse=True)
+    ]
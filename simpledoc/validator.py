@@ -3,6 +3,114 @@ Módulo para la validación de documentos SimpleDoc
 """
 
 from .exceptions import ValidationError
+from .arena import ArenaAST, VistaNodo
+from .parser import tabla_por_tipo
+
+
+# Número máximo de diagnósticos recogidos por defecto en modo collect
+LIMITE_DIAGNOSTICOS = 100
+
+# Registro de reglas de validación: (identificador, tipos de nodo, nivel mínimo, función)
+REGLAS = []
+
+
+def regla(identificador, *tipos, nivel=1):
+    """
+    Decorador que registra una regla de validación
+    
+    Cada regla es una función que recibe el nodo a validar y su hermano
+    inmediatamente anterior (o None), y lanza ValidationError si el nodo
+    no es válido.
+    
+    Args:
+        identificador: Nombre único de la regla
+        tipos: Tipos de nodo a los que se aplica la regla
+        nivel: Nivel de complejidad mínimo a partir del cual se aplica
+    """
+    def registrar(funcion):
+        REGLAS.append((identificador, tipos, nivel, funcion))
+        return funcion
+    return registrar
+
+
+@regla("documento-vacio", "DOCUMENTO")
+def _validar_documento_vacio(nodo, anterior):
+    """Valida que el documento no esté vacío"""
+    if not nodo.hijos:
+        raise ValidationError("El documento está vacío")
+
+
+@regla("titulo-vacio", "TITULO1", "TITULO2", "TITULO3")
+def _validar_titulo(nodo, anterior):
+    """Valida que los títulos tengan contenido"""
+    if not nodo.valor or not nodo.valor.strip():
+        raise ValidationError(f"Título vacío", nodo.tipo, nodo.linea)
+
+
+@regla("formato-vacio", "NEGRITA", "CURSIVA", nivel=2)
+def _validar_formato(nodo, anterior):
+    """Valida que los elementos de formato no estén vacíos"""
+    if not nodo.hijos:
+        raise ValidationError(f"{nodo.tipo} sin contenido", nodo.tipo, nodo.linea)
+
+
+@regla("numeracion-lista", "LISTA_NUM_ITEM", nivel=2)
+def _validar_numeracion(nodo, anterior):
+    """Valida que los elementos de lista numerada tengan números consecutivos"""
+    if anterior is not None and anterior.tipo == "LISTA_NUM_ITEM":
+        if nodo.numero != anterior.numero + 1:
+            raise ValidationError(
+                f"Numeración de lista incorrecta: se esperaba {anterior.numero + 1}, se encontró {nodo.numero}", 
+                nodo.tipo, 
+                nodo.linea
+            )
+
+
+@regla("url-enlace", "ENLACE", nivel=3)
+def _validar_enlace(nodo, anterior):
+    """Valida que el enlace tenga una URL con formato básico correcto"""
+    if not nodo.url:
+        raise ValidationError(f"Enlace sin URL", nodo.tipo, nodo.linea)
+    
+    if not nodo.url.startswith(('http://', 'https://', 'mailto:', 'tel:', '/')):
+        raise ValidationError(f"URL de enlace mal formada: {nodo.url}", nodo.tipo, nodo.linea)
+
+
+@regla("url-imagen", "IMAGEN", nivel=3)
+def _validar_imagen(nodo, anterior):
+    """Valida que la imagen tenga una URL con formato básico correcto"""
+    if not nodo.url:
+        raise ValidationError(f"Imagen sin URL", nodo.tipo, nodo.linea)
+    
+    if not nodo.url.startswith(('http://', 'https://', '/')):
+        raise ValidationError(f"URL de imagen mal formada: {nodo.url}", nodo.tipo, nodo.linea)
+
+
+class Diagnostico:
+    """Problema encontrado por una regla de validación"""
+    
+    __slots__ = ('regla', 'tipo', 'linea', 'mensaje')
+    
+    def __init__(self, regla, tipo, linea, mensaje):
+        self.regla = regla
+        self.tipo = tipo
+        self.linea = linea
+        self.mensaje = mensaje
+    
+    def __str__(self):
+        return str(ValidationError(self.mensaje, self.tipo, self.linea))
+    
+    def __repr__(self):
+        return f"Diagnostico(regla={self.regla}, tipo={self.tipo}, linea={self.linea}, mensaje='{self.mensaje}')"
+    
+    def a_diccionario(self):
+        """Devuelve el diagnóstico como diccionario serializable a JSON"""
+        return {
+            'regla': self.regla,
+            'tipo': self.tipo,
+            'linea': self.linea,
+            'mensaje': self.mensaje
+        }
 
 
 class Validator:
@@ -10,6 +118,8 @@ class Validator:
     Validador de documentos SimpleDoc
     
     Verifica que la estructura del documento sea válida según las reglas del lenguaje.
+    Las reglas registradas con el decorador ``regla`` se agrupan por tipo de nodo
+    y se aplican durante un único recorrido iterativo del AST.
     """
     
     def __init__(self, nivel_complejidad=3):
@@ -23,164 +133,181 @@ class Validator:
                 3 - Avanzado: Intermedio + enlaces, imágenes y bloques de código
         """
         self.nivel_complejidad = min(max(nivel_complejidad, 1), 3)
+        
+        # Reglas aplicables a cada tipo de nodo según el nivel de complejidad
+        self.visitantes = {}
+        for identificador, tipos, nivel, funcion in REGLAS:
+            if nivel <= self.nivel_complejidad:
+                for tipo in tipos:
+                    self.visitantes.setdefault(tipo, []).append((identificador, funcion))
+        
+        # Las mismas reglas en una tabla densa indexada por TipoNodo.codigo
+        self.reglas_por_codigo = tabla_por_tipo(self.visitantes, ())
     
-    def validar(self, ast):
+    def validar(self, ast, collect=False, limite=LIMITE_DIAGNOSTICOS):
         """
         Valida la estructura del AST
         
         Args:
-            ast: Árbol de sintaxis abstracta a validar
-            
+            ast: Árbol de sintaxis abstracta o ArenaAST a validar
+            collect: Si es True, no se detiene en el primer error y devuelve
+                todos los problemas encontrados en un único recorrido
+            limite: Número máximo de diagnósticos a recoger en modo collect
+        
         Returns:
-            True si el documento es válido, False en caso contrario
-            
+            True si el documento es válido; en modo collect, lista de
+            Diagnostico (vacía si el documento es válido)
+        
         Raises:
             ValidationError: Si se encuentra un error en la estructura del documento
+                y no se está en modo collect
         """
-        # Realizar validaciones específicas según el nivel de complejidad
-        if self.nivel_complejidad >= 1:
-            self._validar_estructura_basica(ast)
-        
-        if self.nivel_complejidad >= 2:
-            self._validar_formato(ast)
-            self._validar_listas(ast)
+        recorrer = self._recorrer_arena if ast.__class__ is ArenaAST else self._recorrer
         
-        if self.nivel_complejidad >= 3:
-            self._validar_enlaces(ast)
-            self._validar_imagenes(ast)
-            self._validar_codigo(ast)
+        if collect:
+            diagnosticos = []
+            recorrer(ast, None, diagnosticos, limite)
+            return diagnosticos
         
+        recorrer(ast, None)
         return True
     
-    def _validar_estructura_basica(self, nodo):
+    def validar_bloques(self, nodos):
         """
-        Valida la estructura básica del documento
+        Valida los nodos de primer nivel a medida que se producen
+        
+        Permite validar un documento en streaming: cada nodo se comprueba
+        antes de entregarlo, sin necesidad de construir el AST completo.
         
         Args:
-            nodo: Nodo AST a validar
-            
+            nodos: Iterable de nodos hijos del documento
+        
+        Yields:
+            Los mismos nodos, una vez validados
+        
         Raises:
-            ValidationError: Si se encuentra un error en la estructura básica
+            ValidationError: Si se encuentra un error en la estructura del documento
         """
-        # Validar que el documento no esté vacío
-        if nodo.tipo == "DOCUMENTO" and not nodo.hijos:
-            raise ValidationError("El documento está vacío")
+        anterior = None
+        for nodo in nodos:
+            self.validar_bloque(nodo, anterior)
+            yield nodo
+            anterior = nodo
         
-        # Validar títulos
-        for hijo in nodo.hijos:
-            if hijo.tipo in ["TITULO1", "TITULO2", "TITULO3"]:
-                if not hijo.valor or not hijo.valor.strip():
-                    raise ValidationError(f"Título vacío", hijo.tipo, hijo.linea)
-            
-            # Validar recursivamente los hijos
-            if hijo.hijos:
-                self._validar_estructura_basica(hijo)
+        if anterior is None:
+            raise ValidationError("El documento está vacío")
     
-    def _validar_formato(self, nodo):
+    def validar_bloque(self, nodo, anterior=None):
         """
-        Valida el formato del texto (negrita, cursiva)
+        Valida un nodo de primer nivel de forma aislada
         
         Args:
-            nodo: Nodo AST a validar
-            
+            nodo: Nodo hijo del documento a validar
+            anterior: Nodo hermano inmediatamente anterior, necesario para
+                comprobar la numeración de las listas
+        
         Raises:
-            ValidationError: Si se encuentra un error en el formato
+            ValidationError: Si se encuentra un error en el nodo
         """
-        # Validar que los elementos de formato no estén vacíos
-        for hijo in nodo.hijos:
-            if hijo.tipo in ["NEGRITA", "CURSIVA"]:
-                if not hijo.hijos:
-                    raise ValidationError(f"{hijo.tipo} sin contenido", hijo.tipo, hijo.linea)
-            
-            # Validar recursivamente los hijos
-            if hijo.hijos:
-                self._validar_formato(hijo)
+        self._recorrer(nodo, anterior)
     
-    def _validar_listas(self, nodo):
+    def _recorrer(self, raiz, anterior, diagnosticos=None, limite=LIMITE_DIAGNOSTICOS):
         """
-        Valida la estructura de las listas
+        Recorre el subárbol en preorden con una pila explícita
+        
+        Aplica a cada nodo las reglas registradas para su tipo. Al no usar
+        recursión, la profundidad del AST no está limitada por la pila de Python.
         
         Args:
-            nodo: Nodo AST a validar
-            
+            raiz: Nodo inicial del recorrido
+            anterior: Hermano anterior del nodo inicial
+            diagnosticos: Lista donde se acumulan los errores, o None para
+                detenerse en el primero
+            limite: Número de diagnósticos tras el que se detiene el recorrido
+        
         Raises:
-            ValidationError: Si se encuentra un error en las listas
+            ValidationError: Si alguna regla no se cumple y no se acumulan diagnósticos
         """
-        # Validar elementos de lista
-        for i, hijo in enumerate(nodo.hijos):
-            if hijo.tipo == "LISTA_NUM_ITEM":
-                # Validar que los elementos de lista numerada tengan números consecutivos
-                if i > 0 and nodo.hijos[i-1].tipo == "LISTA_NUM_ITEM":
-                    if hijo.numero != nodo.hijos[i-1].numero + 1:
-                        raise ValidationError(
-                            f"Numeración de lista incorrecta: se esperaba {nodo.hijos[i-1].numero + 1}, se encontró {hijo.numero}", 
-                            hijo.tipo, 
-                            hijo.linea
-                        )
-            
-            # Validar recursivamente los hijos
-            if hijo.hijos:
-                self._validar_listas(hijo)
-    
-    def _validar_enlaces(self, nodo):
-        """
-        Valida los enlaces
+        reglas_por_codigo = self.reglas_por_codigo
+        pila = [(raiz, anterior)]
         
-        Args:
-            nodo: Nodo AST a validar
+        while pila:
+            nodo, anterior = pila.pop()
             
-        Raises:
-            ValidationError: Si se encuentra un error en los enlaces
-        """
-        for hijo in nodo.hijos:
-            if hijo.tipo == "ENLACE":
-                # Validar que el enlace tenga URL
-                if not hasattr(hijo, 'url') or not hijo.url:
-                    raise ValidationError(f"Enlace sin URL", hijo.tipo, hijo.linea)
-                
-                # Validar formato de URL básico
-                if not hijo.url.startswith(('http://', 'https://', 'mailto:', 'tel:', '/')):
-                    raise ValidationError(f"URL de enlace mal formada: {hijo.url}", hijo.tipo, hijo.linea)
+            for identificador, funcion in reglas_por_codigo[nodo.tipo.codigo]:
+                try:
+                    funcion(nodo, anterior)
+                except ValidationError as error:
+                    if diagnosticos is None:
+                        raise
+                    
+                    diagnosticos.append(_diagnostico(identificador, error, nodo))
+                    if len(diagnosticos) >= limite:
+                        return
             
-            # Validar recursivamente los hijos
-            if hijo.hijos:
-                self._validar_enlaces(hijo)
+            # Apilar los hijos en orden inverso para visitarlos en orden
+            hijos = nodo.hijos
+            for i in range(len(hijos) - 1, -1, -1):
+                pila.append((hijos[i], hijos[i - 1] if i else None))
     
-    def _validar_imagenes(self, nodo):
+    def _recorrer_arena(self, arena, anterior, diagnosticos=None, limite=LIMITE_DIAGNOSTICOS):
         """
-        Valida las imágenes
+        Recorre una ArenaAST en preorden siguiendo sus enlaces
+        
+        Avanza al primer hijo, al siguiente hermano o, si no hay, sube por los
+        padres hasta encontrar uno, por lo que no necesita pila. Las reglas
+        reciben dos VistaNodo que se apuntan al nodo actual y a su hermano
+        anterior, sin crear un objeto por nodo.
         
         Args:
-            nodo: Nodo AST a validar
-            
+            arena: ArenaAST a recorrer
+            anterior: Se ignora; la raíz de la arena no tiene hermanos
+            diagnosticos: Lista donde se acumulan los errores, o None para
+                detenerse en el primero
+            limite: Número de diagnósticos tras el que se detiene el recorrido
+        
         Raises:
-            ValidationError: Si se encuentra un error en las imágenes
+            ValidationError: Si alguna regla no se cumple y no se acumulan diagnósticos
         """
-        for hijo in nodo.hijos:
-            if hijo.tipo == "IMAGEN":
-                # Validar que la imagen tenga URL
-                if not hasattr(hijo, 'url') or not hijo.url:
-                    raise ValidationError(f"Imagen sin URL", hijo.tipo, hijo.linea)
+        reglas_por_codigo = self.reglas_por_codigo
+        tipos, padres = arena.tipos, arena.padres
+        primeros_hijos, siguientes = arena.primeros_hijos, arena.siguientes
+        nodo, vista_anterior = VistaNodo(arena), VistaNodo(arena)
+        indice, previo = 0, -1
+        
+        while indice >= 0:
+            reglas = reglas_por_codigo[tipos[indice]]
+            if reglas:
+                nodo.indice = indice
+                vista_anterior.indice = previo
                 
-                # Validar formato de URL básico
-                if not hijo.url.startswith(('http://', 'https://', '/')):
-                    raise ValidationError(f"URL de imagen mal formada: {hijo.url}", hijo.tipo, hijo.linea)
+                for identificador, funcion in reglas:
+                    try:
+                        funcion(nodo, vista_anterior if previo >= 0 else None)
+                    except ValidationError as error:
+                        if diagnosticos is None:
+                            raise
+                        
+                        diagnosticos.append(_diagnostico(identificador, error, nodo))
+                        if len(diagnosticos) >= limite:
+                            return
             
-            # Validar recursivamente los hijos
-            if hijo.hijos:
-                self._validar_imagenes(hijo)
-    
-    def _validar_codigo(self, nodo):
-        """
-        Valida los bloques de código
-        
-        Args:
-            nodo: Nodo AST a validar
+            # Siguiente nodo en preorden
+            if primeros_hijos[indice] >= 0:
+                indice, previo = primeros_hijos[indice], -1
+                continue
             
-        Raises:
-            ValidationError: Si se encuentra un error en los bloques de código
-        """
-        # No hay validaciones específicas para bloques de código por ahora
-        for hijo in nodo.hijos:
-            if hijo.hijos:
-                self._validar_codigo(hijo)
+            while indice >= 0 and siguientes[indice] < 0:
+                indice = padres[indice]
+            if indice >= 0:
+                indice, previo = siguientes[indice], indice
+
+
+def _diagnostico(identificador, error, nodo):
+    """Convierte el error de una regla en un Diagnostico, completando su tipo y línea con los del nodo"""
+    return Diagnostico(
+        identificador,
+        error.element or nodo.tipo,
+        error.line_number if error.line_number is not None else nodo.linea,
+        error.detail
+    )
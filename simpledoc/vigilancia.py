@@ -0,0 +1,231 @@
+"""
+Recompilación automática de archivos SimpleDoc al guardarlos
+
+Mantiene un proceso con los compiladores ya inicializados, detecta los
+archivos ``.sd`` que cambian en un directorio y recompila solo esos. Usa
+inotify (a través del paquete opcional ``inotify_simple``) si está
+disponible y, si no, compara periódicamente la fecha y el tamaño de los
+archivos. Los cambios que llegan en ráfaga se agrupan en una sola
+recompilación.
+"""
+
+import os
+import time
+from .compiler import RegistroCompiladores
+from .exceptions import SimpleDocError
+from .lote import EXTENSIONES, expandir_entradas
+
+try:
+    from inotify_simple import INotify, flags as banderas_inotify
+except ImportError:
+    INotify = banderas_inotify = None
+
+# Documento con todos los elementos, para inicializar el compilador antes del primer cambio
+_DOCUMENTO_CALENTAMIENTO = """# Título
+## Subtítulo
+Texto con **negrita**, *cursiva* y [un enlace](https://ejemplo.com).
+- Elemento
+1. Elemento
+![Imagen](https://ejemplo.com/imagen.png)
+```codigo```"""
+
+
+class Recompilacion:
+    """
+    Resultado de recompilar un archivo tras un cambio
+    
+    ``segundos`` es el tiempo de la compilación y ``latencia`` el tiempo
+    transcurrido desde que se guardó el archivo (su fecha de modificación)
+    hasta que se terminó de escribir el HTML, incluidas la detección y la
+    espera para agrupar cambios.
+    """
+    
+    __slots__ = ('entrada', 'salida', 'segundos', 'latencia', 'error')
+    
+    def __init__(self, entrada, salida, segundos, latencia, error=None):
+        self.entrada = entrada
+        self.salida = salida
+        self.segundos = segundos
+        self.latencia = latencia
+        self.error = error
+    
+    def __repr__(self):
+        return f"Recompilacion(entrada={self.entrada}, segundos={self.segundos:.4f}, error={self.error})"
+
+
+class Vigilante:
+    """
+    Vigila un directorio y recompila los archivos SimpleDoc que cambian
+    """
+    
+    def __init__(self, directorio, directorio_salida=None, nivel_complejidad=3, recursivo=False,
+                 intervalo=0.05, espera=0.02, al_recompilar=None, usar_inotify=True):
+        """
+        Inicializa el vigilante y prepara el compilador
+        
+        Args:
+            directorio: Directorio a vigilar
+            directorio_salida: Directorio de salida del HTML (por defecto, junto a cada archivo)
+            nivel_complejidad: Nivel de complejidad del compilador (1-3)
+            recursivo: Vigilar también los subdirectorios
+            intervalo: Segundos entre comprobaciones cuando no se usa inotify
+            espera: Segundos sin cambios nuevos que se esperan antes de
+                recompilar, para agrupar las ráfagas de escrituras
+            al_recompilar: Función que recibe cada Recompilacion
+            usar_inotify: Usar inotify si está disponible
+        """
+        self.directorio = directorio
+        self.directorio_salida = directorio_salida
+        self.recursivo = recursivo
+        self.intervalo = intervalo
+        self.espera = espera
+        self.al_recompilar = al_recompilar
+        self.inotify = INotify() if usar_inotify and INotify is not None else None
+        self._directorios = {}
+        
+        # Compilador listo antes del primer cambio: tablas de reglas y
+        # expresiones regulares del nivel ya construidas
+        self.compiler = RegistroCompiladores().obtener(nivel_complejidad)
+        self.compiler.compilar(_DOCUMENTO_CALENTAMIENTO)
+        
+        self.salidas = {}
+        self.huellas = self._explorar()
+        if self.inotify is not None:
+            self._vigilar_directorios()
+    
+    @property
+    def modo(self):
+        """Mecanismo de detección de cambios en uso"""
+        return "inotify" if self.inotify is not None else "sondeo"
+    
+    def ejecutar(self, duracion=None):
+        """
+        Vigila el directorio hasta que se interrumpa o pase ``duracion`` segundos
+        
+        Args:
+            duracion: Segundos que dura la vigilancia (None para no terminar)
+        """
+        limite = None if duracion is None else time.monotonic() + duracion
+        pendientes = set()
+        ultimo_cambio = 0.0
+        
+        while limite is None or time.monotonic() < limite:
+            # Mientras se agrupa una ráfaga solo se espera lo justo para cerrarla
+            cambios = self._esperar_cambios(self.espera if pendientes else self.intervalo)
+            ahora = time.monotonic()
+            
+            if cambios:
+                pendientes.update(cambios)
+                ultimo_cambio = ahora
+            
+            if pendientes and ahora - ultimo_cambio >= self.espera:
+                self.recompilar(sorted(pendientes))
+                pendientes = set()
+    
+    def recompilar(self, pendientes):
+        """
+        Recompila los archivos indicados
+        
+        Args:
+            pendientes: Rutas de los archivos modificados
+        
+        Returns:
+            Lista de Recompilacion
+        """
+        resultados = []
+        
+        for entrada in pendientes:
+            salida = self.salidas.get(entrada)
+            try:
+                guardado = os.stat(entrada).st_mtime_ns
+            except OSError:
+                # El archivo se borró después de modificarse
+                continue
+            if salida is None:
+                continue
+            
+            inicio = time.perf_counter()
+            error = None
+            try:
+                directorio = os.path.dirname(salida)
+                if directorio:
+                    os.makedirs(directorio, exist_ok=True)
+                self.compiler.compilar_archivo(entrada, salida)
+            except (SimpleDocError, IOError, UnicodeDecodeError) as e:
+                error = str(e)
+            
+            segundos = time.perf_counter() - inicio
+            latencia = max(time.time_ns() - guardado, 0) / 1e9
+            resultado = Recompilacion(entrada, salida, segundos, latencia, error)
+            resultados.append(resultado)
+            if self.al_recompilar:
+                self.al_recompilar(resultado)
+        
+        return resultados
+    
+    def _esperar_cambios(self, espera):
+        """Espera como mucho ``espera`` segundos y devuelve las rutas modificadas"""
+        if self.inotify is None:
+            time.sleep(espera)
+            return self._cambios_sondeo()
+        return self._cambios_inotify(espera)
+    
+    def _explorar(self):
+        """Devuelve la huella (fecha, tamaño) de cada archivo y actualiza sus rutas de salida"""
+        huellas = {}
+        # Cada archivo se recompila al guardarlo, así que si dos comparten salida
+        # se conserva la del último guardado en lugar de detener la vigilancia
+        for entrada, salida in expandir_entradas([self.directorio], self.recursivo, self.directorio_salida,
+                                                 comprobar_salidas=False):
+            try:
+                estado = os.stat(entrada)
+            except OSError:
+                continue
+            huellas[entrada] = (estado.st_mtime_ns, estado.st_size)
+            self.salidas[entrada] = salida
+        return huellas
+    
+    def _cambios_sondeo(self):
+        """Compara el estado actual del directorio con el anterior"""
+        huellas = self._explorar()
+        cambios = [ruta for ruta, huella in huellas.items() if self.huellas.get(ruta) != huella]
+        self.huellas = huellas
+        return cambios
+    
+    def _vigilar_directorios(self):
+        """Registra en inotify el directorio y, si es recursivo, sus subdirectorios"""
+        mascara = (banderas_inotify.CLOSE_WRITE | banderas_inotify.MOVED_TO
+                   | banderas_inotify.CREATE | banderas_inotify.DELETE_SELF)
+        directorios = [self.directorio]
+        if self.recursivo:
+            directorios = [actual for actual, _, _ in os.walk(self.directorio)]
+        
+        vigilados = set(self._directorios.values())
+        for directorio in directorios:
+            directorio = os.path.normpath(directorio)
+            if directorio not in vigilados:
+                self._directorios[self.inotify.add_watch(directorio, mascara)] = directorio
+    
+    def _cambios_inotify(self, espera):
+        """Lee los eventos de inotify pendientes y devuelve los archivos escritos"""
+        cambios = []
+        nuevos_directorios = False
+        
+        for evento in self.inotify.read(timeout=int(espera * 1000)):
+            directorio = self._directorios.get(evento.wd)
+            if directorio is None:
+                continue
+            
+            ruta = os.path.join(directorio, evento.name)
+            if evento.mask & banderas_inotify.ISDIR:
+                nuevos_directorios = nuevos_directorios or (evento.mask & banderas_inotify.CREATE)
+            elif evento.mask & (banderas_inotify.CLOSE_WRITE | banderas_inotify.MOVED_TO) and ruta.endswith(EXTENSIONES):
+                cambios.append(ruta)
+        
+        if cambios or nuevos_directorios:
+            # Actualizar las rutas de salida de los archivos nuevos
+            self._explorar()
+        if nuevos_directorios and self.recursivo:
+            self._vigilar_directorios()
+        
+        return cambios
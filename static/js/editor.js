@@ -95,20 +95,55 @@ function hola() {
         }
     }
     
-    // Función para compilar el código
-    function compilar() {
-        const codigo = editor.value;
-        const nivel = nivelComplejidad.value;
+    // Estado del documento compilado en el servidor, para recompilar solo lo editado
+    let documento = null;
+    
+    // Función para mostrar el HTML del documento a partir de sus fragmentos
+    function mostrarDocumento() {
+        const html = documento.cabecera + documento.fragmentos.join('') + documento.cierre + documento.pie;
+        resultado.value = html;
+        preview.innerHTML = html;
+    }
+    
+    // Función para mostrar un error de compilación
+    function mostrarError(data) {
+        // Mostrar error, o todos los diagnósticos de validación si los hay
+        if (data.diagnosticos && data.diagnosticos.length > 1) {
+            const lista = data.diagnosticos
+                .map(d => `Línea ${d.linea}: ${d.mensaje}`)
+                .join('<br>');
+            mostrarAlerta(`${data.diagnosticos.length} errores:<br>${lista}`);
+        } else {
+            mostrarAlerta(`Error: ${data.error}`);
+        }
+        console.error(data.error);
+    }
+    
+    // Función para calcular la edición de líneas entre dos versiones del texto
+    function calcularEdicion(anteriores, actuales) {
+        let inicio = 0;
+        const limite = Math.min(anteriores.length, actuales.length);
+        while (inicio < limite && anteriores[inicio] === actuales[inicio]) {
+            inicio++;
+        }
         
-        if (!codigo.trim()) {
-            mostrarAlerta('El editor está vacío. Escribe algo para compilar.');
-            return;
+        let finAnterior = anteriores.length;
+        let finActual = actuales.length;
+        while (finAnterior > inicio && finActual > inicio &&
+               anteriores[finAnterior - 1] === actuales[finActual - 1]) {
+            finAnterior--;
+            finActual--;
         }
         
-        // Enviar el código al servidor para compilar
+        return [inicio, finAnterior, actuales.slice(inicio, finActual)];
+    }
+    
+    // Función para compilar el documento completo
+    function compilarCompleto(codigo, nivel) {
         const formData = new FormData();
         formData.append('codigo', codigo);
         formData.append('nivel_complejidad', nivel);
+        formData.append('incremental', 'true');
         
         fetch('/compilar', {
             method: 'POST',
@@ -117,14 +152,19 @@ function hola() {
         .then(response => response.json())
         .then(data => {
             if (data.success) {
-                // Actualizar el resultado
-                resultado.value = data.html;
-                preview.innerHTML = data.html;
+                documento = {
+                    id: data.documento_id,
+                    nivel: nivel,
+                    lineas: codigo.split('\n'),
+                    fragmentos: data.fragmentos,
+                    cierre: data.cierre,
+                    cabecera: data.cabecera,
+                    pie: data.pie
+                };
+                mostrarDocumento();
                 mostrarAlerta('Compilación exitosa', 'success');
             } else {
-                // Mostrar error
-                mostrarAlerta(`Error: ${data.error}`);
-                console.error(data.error);
+                mostrarError(data);
             }
         })
         .catch(error => {
@@ -133,6 +173,67 @@ function hola() {
         });
     }
     
+    // Función para recompilar solo las líneas editadas desde la última compilación
+    function recompilar(codigo) {
+        const lineas = codigo.split('\n');
+        const edicion = calcularEdicion(documento.lineas, lineas);
+        
+        // Sin cambios respecto a la última compilación
+        if (edicion[0] === edicion[1] && edicion[2].length === 0) {
+            mostrarDocumento();
+            return;
+        }
+        
+        const formData = new FormData();
+        formData.append('documento_id', documento.id);
+        formData.append('ediciones', JSON.stringify([edicion]));
+        
+        fetch('/recompilar', {
+            method: 'POST',
+            body: formData
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                for (const cambio of data.cambios) {
+                    documento.fragmentos.splice(cambio.inicio, cambio.fin - cambio.inicio, ...cambio.fragmentos);
+                    documento.cierre = cambio.cierre;
+                }
+                documento.lineas = lineas;
+                mostrarDocumento();
+                mostrarAlerta('Compilación exitosa', 'success');
+            } else if (data.estado_perdido) {
+                // El servidor ya no conserva el documento: compilarlo completo
+                documento = null;
+                compilarCompleto(codigo, nivelComplejidad.value);
+            } else {
+                mostrarError(data);
+            }
+        })
+        .catch(error => {
+            mostrarAlerta(`Error al comunicarse con el servidor: ${error}`);
+            console.error('Error:', error);
+        });
+    }
+    
+    // Función para compilar el código
+    function compilar() {
+        const codigo = editor.value;
+        const nivel = nivelComplejidad.value;
+        
+        if (!codigo.trim()) {
+            mostrarAlerta('El editor está vacío. Escribe algo para compilar.');
+            return;
+        }
+        
+        // Sin identificador, el servidor no conserva el documento (es demasiado grande)
+        if (documento && documento.id && documento.nivel === nivel) {
+            recompilar(codigo);
+        } else {
+            compilarCompleto(codigo, nivel);
+        }
+    }
+    
     // Event listeners
     btnCompilar.addEventListener('click', compilar);
     
@@ -0,0 +1,129 @@
+"""
+Pruebas unitarias para el AST en arrays paralelos de SimpleDoc
+"""
+
+import os
+import unittest
+from unittest import mock
+from simpledoc import arena as modulo_arena
+from simpledoc.arena import ArenaAST, VistaNodo
+from simpledoc.exceptions import ParserError, ValidationError
+from simpledoc.html_generator import HTMLGenerator
+from simpledoc.lexer import Lexer, Token, TokenType
+from simpledoc.parser import Parser
+from simpledoc.validator import Validator
+
+
+EJEMPLOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ejemplos")
+
+
+class TestArenaAST(unittest.TestCase):
+    """Pruebas para el parser, el validador y el generador sobre una ArenaAST"""
+    
+    def parsear(self, texto, nivel=3, arena=True):
+        lexer = Lexer(nivel)
+        tokens = lexer.tokenizar_compacto(texto) if arena else lexer.tokenizar(texto)
+        return Parser(nivel).parsear(tokens, arena=arena)
+    
+    def test_estructura(self):
+        """Prueba los enlaces entre nodos y los valores tomados del texto original"""
+        texto = "# Título\nHola **negrita** y *cursiva*\n2. Dos\n[Enlace](https://ejemplo.com)"
+        ast = self.parsear(texto)
+        
+        self.assertIsInstance(ast, ArenaAST)
+        self.assertIs(ast.fuente, texto)
+        raiz = ast.raiz
+        self.assertEqual(raiz.tipo, "DOCUMENTO")
+        self.assertIsNone(raiz.linea)
+        
+        hijos = list(raiz.hijos)
+        self.assertEqual([ast.tipo(i) for i in hijos],
+                         ["TITULO1", "SALTO_LINEA", "TEXTO", "NEGRITA", "TEXTO", "CURSIVA",
+                          "SALTO_LINEA", "LISTA_NUM_ITEM", "SALTO_LINEA", "ENLACE"])
+        self.assertEqual(ast.valor(hijos[0]), "Título")
+        self.assertTrue(all(ast.padres[i] == 0 for i in hijos))
+        
+        negrita = VistaNodo(ast, hijos[3])
+        self.assertIsNone(negrita.valor)
+        self.assertEqual([ast.valor(i) for i in negrita.hijos], ["negrita"])
+        
+        numerado = VistaNodo(ast, hijos[7])
+        self.assertEqual((numerado.valor, numerado.numero, numerado.linea), ("Dos", 2, 3))
+        enlace = VistaNodo(ast, hijos[9])
+        self.assertEqual((enlace.valor, enlace.url), ("Enlace", "https://ejemplo.com"))
+    
+    def test_mismo_resultado_que_objetos(self):
+        """Prueba que el HTML y los diagnósticos coinciden con los del AST de objetos"""
+        for nombre in sorted(os.listdir(EJEMPLOS)):
+            with open(os.path.join(EJEMPLOS, nombre), encoding='utf-8') as f:
+                texto = f.read()
+            
+            for nivel in (1, 2, 3):
+                with self.subTest(ejemplo=nombre, nivel=nivel):
+                    objetos = self.parsear(texto, nivel, arena=False)
+                    arena = self.parsear(texto, nivel)
+                    
+                    self.assertEqual(HTMLGenerator(nivel).generar(arena), HTMLGenerator(nivel).generar(objetos))
+                    self.assertEqual(Validator(nivel).validar(arena, collect=True),
+                                     Validator(nivel).validar(objetos, collect=True))
+    
+    def test_tokens_sin_buffer(self):
+        """Prueba que también se puede construir la arena a partir de una lista de tokens"""
+        tokens = [
+            Token(TokenType.NEGRITA_INICIO, "**", 1, 1),
+            Token(TokenType.CURSIVA_INICIO, "*", 1, 3),
+            Token(TokenType.TEXTO, "a", 1, 4),
+            Token(TokenType.CURSIVA_FIN, "*", 1, 5),
+            Token(TokenType.IMAGEN, "Logo](/logo.png", 1, 6),
+            Token(TokenType.NEGRITA_FIN, "**", 1, 24),
+            Token(TokenType.EOF, "", 1, 26),
+        ]
+        ast = Parser(3).parsear(tokens, arena=True)
+        
+        self.assertEqual(HTMLGenerator(3).generar(ast), HTMLGenerator(3).generar(Parser(3).parsear(tokens)))
+        self.assertEqual(Validator(3).validar(ast, collect=True), [])
+    
+    def test_validacion(self):
+        """Prueba los errores de validación, en el primer error y en modo collect"""
+        ast = self.parsear("# Título\n[Mal](ftp://ejemplo.com)\n![Sin](ruta)")
+        
+        with self.assertRaises(ValidationError):
+            Validator(3).validar(ast)
+        
+        diagnosticos = Validator(3).validar(ast, collect=True)
+        self.assertEqual([(d.regla, d.linea) for d in diagnosticos], [("url-enlace", 2), ("url-imagen", 3)])
+    
+    def test_cierre_pendiente(self):
+        """Prueba que la falta de cierre produce el mismo error que el parser de objetos"""
+        tokens = [Token(TokenType.CURSIVA_INICIO, "*", 1, 1), Token(TokenType.TEXTO, "sin cierre", 1, 2)]
+        
+        with self.assertRaises(ParserError) as contexto:
+            Parser(3).parsear(tokens, arena=True)
+        
+        self.assertIn("Falta el cierre de cursiva", str(contexto.exception))
+    
+    def test_numeros_de_lista_grandes(self):
+        """Prueba que los números de lista que no caben en 32 bits se conservan"""
+        texto = "99999999999. b\n4294967295. c\n123456789012345678901234567890. d"
+        arena = self.parsear(texto)
+        objetos = self.parsear(texto, arena=False)
+        
+        numeros = [arena.numero(i) for i in arena.raiz.hijos if arena.numero(i) is not None]
+        self.assertEqual(numeros, [99999999999, 4294967295, 123456789012345678901234567890])
+        self.assertEqual(HTMLGenerator(3).generar(arena), HTMLGenerator(3).generar(objetos))
+    
+    def test_sin_objetos_por_nodo(self):
+        """Prueba que validar y generar HTML solo crean un número fijo de vistas"""
+        ast = self.parsear("Texto **con** *formato* y [enlace](https://ejemplo.com)\n" * 200)
+        
+        with mock.patch.object(modulo_arena.VistaNodo, '__init__', autospec=True,
+                               side_effect=VistaNodo.__init__) as creadas:
+            Validator(3).validar(ast)
+            HTMLGenerator(3).generar(ast)
+        
+        self.assertLessEqual(creadas.call_count, 3)
+        self.assertLess(ast.nbytes(), 64 * len(ast))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+"""
+Pruebas unitarias para los nodos del AST de SimpleDoc
+"""
+
+import unittest
+from simpledoc.ast_generator import ASTGenerator
+from simpledoc.parser import ASTNode
+
+
+class TestASTNode(unittest.TestCase):
+    """Pruebas para la representación compacta de los nodos"""
+    
+    def test_campos_fijos(self):
+        """Prueba que los nodos no tienen __dict__ y que url y numero son opcionales"""
+        nodo = ASTNode("TEXTO", "texto", linea=1)
+        
+        self.assertFalse(hasattr(nodo, '__dict__'))
+        self.assertIsNone(nodo.url)
+        self.assertIsNone(nodo.numero)
+        with self.assertRaises(AttributeError):
+            nodo.otro = 1
+    
+    def test_hijos_compartidos(self):
+        """Prueba que las hojas comparten la tupla vacía y que add_hijo crea la lista"""
+        primero = ASTNode("TEXTO", "a")
+        segundo = ASTNode("TEXTO", "b")
+        self.assertIs(primero.hijos, segundo.hijos)
+        
+        negrita = ASTNode("NEGRITA")
+        negrita.add_hijo(primero)
+        negrita.add_hijo(segundo)
+        self.assertEqual(negrita.hijos, [primero, segundo])
+        self.assertEqual(ASTNode("TEXTO", "c").hijos, ())
+    
+    def test_ast_de_enlaces_y_listas(self):
+        """Prueba que el parser rellena url y numero en los nodos que los usan"""
+        ast = ASTGenerator(nivel_complejidad=3).generar_ast("Ver [Enlace](https://ejemplo.com)\n3. Tercero")
+        enlace, numerado = ast.hijos[1], ast.hijos[-1]
+        
+        self.assertEqual((enlace.tipo, enlace.url), ("ENLACE", "https://ejemplo.com"))
+        self.assertEqual((numerado.tipo, numerado.numero), ("LISTA_NUM_ITEM", 3))
+        self.assertIsNone(ast.hijos[0].url)
+
+
+if __name__ == '__main__':
+    unittest.main()
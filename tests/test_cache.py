@@ -0,0 +1,88 @@
+"""
+Pruebas unitarias para la caché de compilaciones de SimpleDoc
+"""
+
+import hashlib
+import tempfile
+import unittest
+from simpledoc import __version__
+from simpledoc.cache import CacheLRU, CacheDisco, clave_compilacion
+from simpledoc.compiler import Compiler
+
+
+# Documento de referencia con todos los elementos de la sintaxis
+DOCUMENTO = ("# Título\n\n## Sección\n\n### Apartado\n\n"
+             "Texto con **negrita**, *cursiva* y [a|b](https://ejemplo.com/x|y).\n\n"
+             "- uno\n- **dos**\n\n1. primero\n2. segundo\n\n![logo|alt](/logo.png)\n\n```codigo```\n")
+
+# Hash SHA-256 del HTML del documento de referencia en cada nivel con la
+# versión indicada. Si la salida cambia, hay que subir __version__ para que
+# las cachés en disco y los manifiestos anteriores no sirvan HTML antiguo.
+VERSION_SALIDA = '1.1.1'
+HUELLAS_SALIDA = {
+    1: '005fc850a39c882bebf5e30ebb66cb1c296a94c806d57990eb8f77cb5bcf63cf',
+    2: '95412b2757b91d3e31db325219836c979e194381979bc7547549c4c8815d1dcb',
+    3: '08d27f0b3043869529bf55e57abfb96f743a4a421928b870081005addf69248b',
+}
+
+
+class TestCache(unittest.TestCase):
+    """Pruebas para las cachés de compilación"""
+    
+    def test_clave_depende_de_texto_y_nivel(self):
+        """Prueba que la clave cambia con el texto y con el nivel"""
+        clave = clave_compilacion("# Título", 3)
+        self.assertEqual(clave, clave_compilacion("# Título", 3))
+        self.assertNotEqual(clave, clave_compilacion("# Título", 2))
+        self.assertNotEqual(clave, clave_compilacion("# Otro", 3))
+    
+    def test_version_cambia_con_la_salida(self):
+        """Prueba que la salida no cambia sin subir la versión que forma parte de la clave"""
+        huellas = {nivel: hashlib.sha256(Compiler(nivel).compilar(DOCUMENTO).encode('utf-8')).hexdigest()
+                   for nivel in HUELLAS_SALIDA}
+        
+        if huellas != HUELLAS_SALIDA:
+            self.assertNotEqual(__version__, VERSION_SALIDA,
+                                "El HTML generado ha cambiado: sube __version__ y actualiza HUELLAS_SALIDA")
+        self.assertEqual((__version__, huellas), (VERSION_SALIDA, HUELLAS_SALIDA),
+                         "Actualiza VERSION_SALIDA y HUELLAS_SALIDA con la nueva versión")
+    
+    def test_lru_desaloja_menos_usada(self):
+        """Prueba el desalojo LRU al superar el tamaño máximo"""
+        valor = "x" * 100
+        cache = CacheLRU(max_bytes=3 * len(valor) + 200)
+        cache.guardar("a", valor)
+        cache.guardar("b", valor)
+        cache.obtener("a")
+        cache.guardar("c", valor)
+        cache.guardar("d", valor)
+        
+        self.assertIsNotNone(cache.obtener("a"))
+        self.assertIsNone(cache.obtener("b"))
+        self.assertLessEqual(cache.bytes, cache.max_bytes)
+        self.assertGreaterEqual(cache.estadisticas()['desalojos'], 1)
+    
+    def test_compilador_usa_cache(self):
+        """Prueba que el compilador devuelve el resultado de la caché"""
+        cache = CacheLRU()
+        compiler = Compiler(nivel_complejidad=3, cache=cache)
+        
+        primero = compiler.compilar("# Título\n\nTexto")
+        segundo = compiler.compilar("# Título\n\nTexto")
+        
+        self.assertEqual(primero, segundo)
+        self.assertEqual(cache.estadisticas()['aciertos'], 1)
+        self.assertEqual(cache.estadisticas()['fallos'], 1)
+    
+    def test_cache_disco(self):
+        """Prueba que la caché en disco persiste entre instancias"""
+        with tempfile.TemporaryDirectory() as directorio:
+            html = Compiler(cache=CacheDisco(directorio)).compilar("Texto\r\ncon CRLF")
+            
+            cache = CacheDisco(directorio)
+            self.assertEqual(Compiler(cache=cache).compilar("Texto\r\ncon CRLF"), html)
+            self.assertEqual(cache.aciertos, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
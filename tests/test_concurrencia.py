@@ -0,0 +1,71 @@
+"""
+Pruebas unitarias para el uso concurrente de los compiladores de SimpleDoc
+"""
+
+import glob
+import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from simpledoc.compiler import Compiler, RegistroCompiladores
+from simpledoc.lexer import Lexer
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def leer_ejemplos():
+    """Devuelve el texto de los documentos de ejemplo del repositorio"""
+    rutas = sorted(glob.glob(os.path.join(RAIZ, "ejemplos", "*.sd")))
+    textos = []
+    for ruta in rutas:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            textos.append(f.read())
+    return textos
+
+
+class TestConcurrencia(unittest.TestCase):
+    """Pruebas para compartir compiladores entre hilos"""
+    
+    def test_registro_reutiliza_compiladores(self):
+        """Prueba que el registro devuelve una única instancia por nivel"""
+        registro = RegistroCompiladores()
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            compiladores = list(pool.map(registro.obtener, [2] * 32))
+        
+        self.assertTrue(all(c is compiladores[0] for c in compiladores))
+        self.assertIsNot(registro.obtener(1), registro.obtener(3))
+        self.assertIs(registro.obtener(5), registro.obtener(3))
+    
+    def test_compilador_compartido_entre_hilos(self):
+        """Prueba que un compilador compartido produce el mismo HTML desde varios hilos"""
+        textos = [f"{texto}\n\nVariante {i}" for i in range(50) for texto in leer_ejemplos()]
+        esperado = [Compiler(nivel_complejidad=3).compilar(texto) for texto in textos]
+        
+        compiler = Compiler(nivel_complejidad=3)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            resultado = list(pool.map(compiler.compilar, textos))
+        
+        self.assertEqual(resultado, esperado)
+    
+    def test_analisis_intercalados(self):
+        """Prueba que dos análisis perezosos del mismo lexer no comparten estado"""
+        lexer = Lexer(nivel_complejidad=3)
+        primero = lexer.iter_tokens(["# Uno\n", "texto\n", "más"])
+        segundo = lexer.iter_tokens(["- a\n", "\n", "## Dos"])
+        
+        intercalados = []
+        for a, b in zip(primero, segundo):
+            intercalados.append((a.tipo, a.valor, a.linea, a.columna))
+            intercalados.append((b.tipo, b.valor, b.linea, b.columna))
+        
+        separados = []
+        for a, b in zip(lexer.tokenizar("# Uno\ntexto\nmás"), lexer.tokenizar("- a\n\n## Dos")):
+            separados.append((a.tipo, a.valor, a.linea, a.columna))
+            separados.append((b.tipo, b.valor, b.linea, b.columna))
+        
+        self.assertEqual(intercalados, separados)
+
+
+if __name__ == '__main__':
+    unittest.main()
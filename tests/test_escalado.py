@@ -0,0 +1,127 @@
+"""
+Pruebas de escalado del compilador SimpleDoc
+
+Miden cada etapa sobre entradas de tamaño n, 2n, 4n y 8n y fallan si el
+tiempo crece claramente más deprisa que el tamaño. Un coste cuadrático
+multiplica el tiempo por 64 al pasar de n a 8n, mientras que la cota
+admite hasta 8 veces la tolerancia, de modo que el ruido de la máquina no
+basta para superarla.
+"""
+
+import gc
+import time
+import unittest
+from simpledoc.lexer import Lexer, Token, TokenType
+from simpledoc.parser import Parser
+from simpledoc.validator import Validator
+from simpledoc.html_generator import HTMLGenerator
+
+
+# Factores de tamaño respecto a n
+FACTORES = (1, 2, 4, 8)
+
+# Margen sobre el crecimiento lineal que se admite entre n y 8n
+TOLERANCIA = 2.5
+
+# Repeticiones de cada medida; se usa la mínima, la menos afectada por el ruido
+REPETICIONES = 5
+
+
+def cronometrar(funcion):
+    """Devuelve el menor tiempo de varias ejecuciones de ``funcion``, sin recolector de basura"""
+    mejor = float('inf')
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(REPETICIONES):
+            inicio = time.perf_counter()
+            funcion()
+            mejor = min(mejor, time.perf_counter() - inicio)
+    finally:
+        gc.enable()
+    return mejor
+
+
+def tokens_anidados(profundidad, grupos=20):
+    """Genera grupos de negritas y cursivas alternadas anidadas hasta ``profundidad`` niveles"""
+    tokens = []
+    for grupo in range(grupos):
+        tipos = [(TokenType.NEGRITA_INICIO, TokenType.NEGRITA_FIN, "**") if nivel % 2 == 0 else
+                 (TokenType.CURSIVA_INICIO, TokenType.CURSIVA_FIN, "*") for nivel in range(profundidad)]
+        tokens.extend(Token(inicio, marca, grupo + 1, 1) for inicio, _, marca in tipos)
+        tokens.append(Token(TokenType.TEXTO, "texto", grupo + 1, 1))
+        tokens.extend(Token(fin, marca, grupo + 1, 1) for _, fin, marca in reversed(tipos))
+        tokens.append(Token(TokenType.SALTO_LINEA, "\n", grupo + 1, 1))
+    tokens.append(Token(TokenType.EOF, "", grupos + 1, 1))
+    return tokens
+
+
+class TestEscalado(unittest.TestCase):
+    """Pruebas de que el tiempo de cada etapa crece linealmente con la entrada"""
+    
+    def setUp(self):
+        """Configuración para las pruebas"""
+        self.lexer = Lexer(nivel_complejidad=3)
+        self.parser = Parser(nivel_complejidad=3)
+        self.validator = Validator(nivel_complejidad=3)
+        self.html_generator = HTMLGenerator(nivel_complejidad=3)
+    
+    def _tiempos_etapas(self, texto=None, tokens=None):
+        """Mide cada etapa; sin texto, se parte de los tokens y no se mide el lexer"""
+        tiempos = {}
+        if texto is not None:
+            tiempos['lexer'] = cronometrar(lambda: self.lexer.tokenizar(texto))
+            tokens = self.lexer.tokenizar(texto)
+        
+        tiempos['parser'] = cronometrar(lambda: self.parser.parsear(tokens))
+        ast = self.parser.parsear(tokens)
+        tiempos['validador'] = cronometrar(lambda: self.validator.validar(ast, collect=True))
+        tiempos['generador'] = cronometrar(lambda: self.html_generator.generar(ast))
+        return tiempos
+    
+    def _comprobar_lineal(self, generar, n, desde_tokens=False):
+        """
+        Comprueba que ninguna etapa crece más que linealmente entre n y 8n
+        
+        Args:
+            generar: Función que recibe un tamaño y devuelve el texto (o los tokens)
+            n: Tamaño base
+            desde_tokens: Si generar devuelve tokens en lugar de texto
+        """
+        medidas = []
+        for factor in FACTORES:
+            entrada = generar(n * factor)
+            medidas.append(self._tiempos_etapas(tokens=entrada) if desde_tokens else self._tiempos_etapas(entrada))
+        
+        for etapa in medidas[0]:
+            tiempos = [medida[etapa] for medida in medidas]
+            crecimiento = tiempos[-1] / tiempos[0]
+            with self.subTest(etapa=etapa):
+                self.assertLess(crecimiento, FACTORES[-1] * TOLERANCIA,
+                                f"{etapa}: {' / '.join(f'{t * 1000:.2f} ms' for t in tiempos)}")
+    
+    def test_linea_larga(self):
+        """Prueba una única línea muy larga con formato, enlaces e imágenes"""
+        fragmento = "texto **negrita** y *cursiva* con [enlace](https://ejemplo.com) e ![img](/a.png) "
+        self._comprobar_lineal(lambda k: fragmento * k, 150)
+    
+    def test_muchas_lineas_cortas(self):
+        """Prueba muchas líneas cortas separadas en párrafos"""
+        self._comprobar_lineal(lambda k: "línea corta\n\n" * k, 800)
+    
+    def test_marcas_alternadas(self):
+        """Prueba una línea con marcas de negrita y cursiva alternadas sin cerrar correctamente"""
+        self._comprobar_lineal(lambda k: "**a *b " * k + "c* d**", 1000)
+    
+    def test_anidamiento_profundo(self):
+        """Prueba negritas y cursivas anidadas a gran profundidad"""
+        self._comprobar_lineal(tokens_anidados, 40, desde_tokens=True)
+    
+    def test_listas_largas(self):
+        """Prueba listas con muchos elementos seguidos"""
+        self._comprobar_lineal(lambda k: "- elemento de la lista\n" * k, 600)
+        self._comprobar_lineal(lambda k: "".join(f"{i}. elemento\n" for i in range(1, k + 1)), 600)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Pruebas unitarias para las estadísticas de compilación de SimpleDoc
+"""
+
+import contextlib
+import io
+import json
+import unittest
+from simpledoc.cache import CacheLRU
+from simpledoc.compiler import Compiler
+from simpledoc.estadisticas import ETAPAS, CompileStats
+from simpledoc.lexer import Lexer
+
+
+TEXTO = "# Título\n\nTexto con **negrita** y [enlace](https://ejemplo.com)\n- uno\n- dos\n"
+
+
+class TestEstadisticas(unittest.TestCase):
+    """Pruebas para CompileStats y Compiler.compilar_con_estadisticas"""
+    
+    def test_etapas_y_contadores(self):
+        """Prueba que se miden todas las etapas y se cuentan tokens, nodos y bytes"""
+        html, estadisticas = Compiler().compilar_con_estadisticas(TEXTO)
+        
+        self.assertEqual(html, Compiler().compilar(TEXTO))
+        self.assertEqual(tuple(estadisticas.etapas), ETAPAS)
+        self.assertTrue(all(medida.segundos >= 0 for medida in estadisticas.etapas.values()))
+        self.assertEqual(estadisticas.tokens, len(Lexer().tokenizar(TEXTO)))
+        self.assertGreater(estadisticas.nodos, estadisticas.tokens // 2)
+        self.assertEqual(estadisticas.bytes_entrada, len(TEXTO.encode('utf-8')))
+        self.assertEqual(estadisticas.bytes_salida, len(html.encode('utf-8')))
+        self.assertIsNone(estadisticas.acierto_cache)
+        
+        datos = json.loads(json.dumps(estadisticas.a_diccionario()))
+        self.assertEqual(datos['tokens'], estadisticas.tokens)
+        self.assertIn("generacion", estadisticas.resumen())
+    
+    def test_cache(self):
+        """Prueba que un acierto de caché se registra sin ejecutar ninguna etapa"""
+        compiler = Compiler(cache=CacheLRU())
+        _, primera = compiler.compilar_con_estadisticas(TEXTO)
+        _, segunda = compiler.compilar_con_estadisticas(TEXTO)
+        
+        self.assertIs(primera.acierto_cache, False)
+        self.assertIs(segunda.acierto_cache, True)
+        self.assertEqual(segunda.etapas, {})
+        self.assertEqual(segunda.bytes_salida, primera.bytes_salida)
+    
+    def test_al_completar_etapa(self):
+        """Prueba que la función del compilador se llama al terminar cada etapa"""
+        llamadas = []
+        compiler = Compiler(al_completar_etapa=lambda etapa, medida: llamadas.append(etapa))
+        
+        self.assertEqual(compiler.compilar(TEXTO), Compiler().compilar(TEXTO))
+        self.assertEqual(tuple(llamadas), ETAPAS)
+    
+    def test_diagnosticos(self):
+        """Prueba que con diagnósticos no se mide la generación de HTML"""
+        estadisticas = CompileStats()
+        html, diagnosticos = Compiler().compilar_con_diagnosticos("[Mal](ftp://ejemplo.com)",
+                                                                  estadisticas=estadisticas)
+        
+        self.assertIsNone(html)
+        self.assertEqual(len(diagnosticos), 1)
+        self.assertEqual(tuple(estadisticas.etapas), ETAPAS[:3])
+    
+    def test_modo_debug(self):
+        """Prueba que la compilación medida imprime lo mismo que la normal en modo depuración"""
+        salidas = []
+        for estadisticas in (None, CompileStats()):
+            with contextlib.redirect_stdout(io.StringIO()) as salida:
+                Compiler(modo_debug=True).compilar(TEXTO, estadisticas)
+            salidas.append(salida.getvalue())
+        
+        self.assertIn("--- AST generado ---", salidas[0])
+        self.assertEqual(salidas[1], salidas[0])
+    
+    def test_archivo_mapeado(self):
+        """Prueba que las estadísticas por etapa no se admiten al compilar con mmap"""
+        with self.assertRaises(ValueError):
+            Compiler().compilar_archivo("no_existe.sd", mapear=True, estadisticas=CompileStats())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Pruebas unitarias para el generador de HTML de SimpleDoc
+"""
+
+import io
+import unittest
+from simpledoc.html_generator import CABECERA_HTML, PIE_HTML, HTMLGenerator
+from simpledoc.parser import ASTNode
+
+
+class TestHTMLGenerator(unittest.TestCase):
+    """Pruebas para el recorrido iterativo del AST"""
+    
+    def _documento(self, *hijos):
+        return ASTNode("DOCUMENTO", hijos=list(hijos))
+    
+    def test_formato_anidado(self):
+        """Prueba el orden de las etiquetas en el formato anidado"""
+        cursiva = ASTNode("CURSIVA", hijos=[ASTNode("TEXTO", "a<b")])
+        negrita = ASTNode("NEGRITA", hijos=[ASTNode("TEXTO", " x "), cursiva, ASTNode("TEXTO", "y ")])
+        html = HTMLGenerator(2).generar(self._documento(negrita))
+        
+        self.assertEqual(html, f"{CABECERA_HTML}<p><strong> x <em>a&lt;b</em>y </strong></p>\n{PIE_HTML}")
+    
+    def test_anidamiento_profundo(self):
+        """Prueba que el anidamiento no está limitado por la recursión"""
+        nodo = ASTNode("TEXTO", "fondo")
+        for _ in range(20000):
+            nodo = ASTNode("NEGRITA", hijos=[nodo])
+        html = HTMLGenerator(2).generar(self._documento(nodo))
+        
+        self.assertTrue(html.startswith(f"{CABECERA_HTML}<p>" + "<strong>" * 20000 + "fondo"))
+        self.assertTrue(html.endswith("</strong>" * 20000 + f"</p>\n{PIE_HTML}"))
+    
+    def test_salida_del_llamador(self):
+        """Prueba que se puede escribir en un objeto con write()"""
+        ast = self._documento(ASTNode("TITULO1", "Título"), ASTNode("TEXTO", "texto"))
+        salida = io.StringIO()
+        
+        self.assertIsNone(HTMLGenerator(1).generar(ast, salida))
+        self.assertEqual(salida.getvalue(), HTMLGenerator(1).generar(ast))
+    
+    def test_nodos_por_nivel(self):
+        """Prueba que cada nivel solo genera sus tipos de nodo"""
+        enlace = ASTNode("ENLACE", "texto", linea=1)
+        enlace.url = "https://ejemplo.com"
+        ast = self._documento(enlace)
+        
+        self.assertIn('<a href="https://ejemplo.com">texto</a>', HTMLGenerator(3).generar(ast))
+        self.assertNotIn("<a", HTMLGenerator(2).generar(ast))
+
+
+if __name__ == '__main__':
+    unittest.main()
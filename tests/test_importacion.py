@@ -0,0 +1,48 @@
+"""
+Pruebas unitarias para las importaciones perezosas de SimpleDoc
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def modulos_cargados(codigo):
+    """Ejecuta código en un intérprete nuevo y devuelve los módulos que quedaron cargados"""
+    programa = f"{codigo}\nimport sys\nprint('\\n'.join(sys.modules))"
+    salida = subprocess.run([sys.executable, "-c", programa], cwd=RAIZ,
+                            capture_output=True, text=True, check=True).stdout
+    return set(salida.split())
+
+
+class TestImportacion(unittest.TestCase):
+    """Pruebas para que la línea de comandos no cargue módulos innecesarios"""
+    
+    def test_paquete_perezoso(self):
+        """Prueba que importar el paquete no importa sus submódulos"""
+        modulos = modulos_cargados("import simpledoc")
+        self.assertFalse({m for m in modulos if m.startswith("simpledoc.")})
+    
+    def test_exportaciones_del_paquete(self):
+        """Prueba que los nombres exportados se cargan al usarlos"""
+        import simpledoc
+        from simpledoc.compiler import Compiler
+        
+        self.assertIs(simpledoc.Compiler, Compiler)
+        with self.assertRaises(AttributeError):
+            simpledoc.NoExiste
+    
+    def test_main_no_importa_la_web(self):
+        """Prueba que la línea de comandos no importa Flask ni la interfaz web"""
+        modulos = modulos_cargados("import main")
+        self.assertNotIn("web_interface", modulos)
+        self.assertNotIn("flask", modulos)
+        self.assertNotIn("simpledoc.compiler", modulos)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+"""
+Pruebas unitarias para la recompilación incremental de SimpleDoc
+"""
+
+import unittest
+from simpledoc.compiler import Compiler
+from simpledoc.exceptions import ValidationError
+
+
+DOCUMENTO = """# Título
+
+Párrafo con **negrita** y *cursiva*.
+que sigue aquí.
+
+- Elemento 1
+- Elemento 2
+
+1. Primero
+2. Segundo
+
+[Enlace](https://www.google.com)
+
+## Final
+
+Último párrafo."""
+
+
+class TestIncremental(unittest.TestCase):
+    """Pruebas para la recompilación por rangos de líneas"""
+    
+    def setUp(self):
+        self.compiler = Compiler(nivel_complejidad=3)
+        self.estado = self.compiler.compilar_incremental(DOCUMENTO)
+    
+    def assertIgualACompilacionCompleta(self):
+        """Comprueba que el estado produce el mismo HTML que una compilación completa"""
+        esperado = Compiler(nivel_complejidad=3).compilar(self.estado.texto())
+        self.assertEqual(self.estado.html(), esperado)
+    
+    def test_compilacion_inicial(self):
+        """Prueba que el estado inicial produce el HTML de compilar"""
+        self.assertEqual(self.estado.html(), self.compiler.compilar(DOCUMENTO))
+    
+    def test_edicion_en_medio(self):
+        """Prueba que editar una línea solo regenera su bloque"""
+        cambios = self.compiler.recompilar(self.estado, [(6, 7, ["- Elemento *nuevo*"])])
+        
+        self.assertIgualACompilacionCompleta()
+        self.assertLessEqual(cambios[0]['fin'] - cambios[0]['inicio'], 3)
+    
+    def test_insertar_y_borrar_lineas(self):
+        """Prueba inserciones y borrados que desplazan las líneas siguientes"""
+        self.compiler.recompilar(self.estado, [(1, 1, ["", "Nuevo párrafo", "en dos líneas"])])
+        self.assertIgualACompilacionCompleta()
+        
+        self.compiler.recompilar(self.estado, [(5, 9, [])])
+        self.assertIgualACompilacionCompleta()
+    
+    def test_edicion_al_final(self):
+        """Prueba añadir y borrar líneas al final del documento"""
+        total = len(self.estado.lineas)
+        self.compiler.recompilar(self.estado, [(total, total, ["", "- Otro elemento"])])
+        self.assertIgualACompilacionCompleta()
+        
+        self.compiler.recompilar(self.estado, [(total - 1, total + 2, [])])
+        self.assertIgualACompilacionCompleta()
+    
+    def test_error_no_modifica_estado(self):
+        """Prueba que una edición inválida deja el estado sin cambios"""
+        html = self.estado.html()
+        texto = self.estado.texto()
+        
+        with self.assertRaises(ValidationError):
+            self.compiler.recompilar(self.estado, [(0, len(self.estado.lineas), ["[Enlace](ftp://ejemplo.com)"])])
+        
+        self.assertEqual(self.estado.html(), html)
+        self.assertEqual(self.estado.texto(), texto)
+    
+    def test_edicion_no_renumera_el_resto(self):
+        """Prueba que insertar líneas no recorre los nodos posteriores y los errores usan la línea actual"""
+        ultimo = self.estado.nodos[-1][0]
+        linea = ultimo.linea
+        self.compiler.recompilar(self.estado, [(1, 1, ["", "Nuevo párrafo"])])
+        
+        self.assertIs(self.estado.nodos[-1][0], ultimo)
+        self.assertEqual(ultimo.linea, linea)
+        self.assertIgualACompilacionCompleta()
+        
+        # El enlace está ahora en la línea 14
+        self.assertTrue(self.estado.lineas[13].startswith("[Enlace]"))
+        with self.assertRaises(ValidationError) as contexto:
+            self.compiler.recompilar(self.estado, [(13, 14, ["[Enlace](ftp://ejemplo.com)"])])
+        self.assertEqual(contexto.exception.line_number, 14)
+    
+    def test_diagnosticos_de_ediciones(self):
+        """Prueba que se recogen todos los errores del documento editado sin modificar el estado"""
+        texto = self.estado.texto()
+        ediciones = [(0, 1, ["[Uno](ftp://a.com)", "[Dos](ftp://b.com)"])]
+        
+        with self.assertRaises(ValidationError):
+            self.compiler.recompilar(self.estado, ediciones)
+        diagnosticos = self.estado.diagnosticos(self.compiler, ediciones)
+        
+        self.assertEqual([d.linea for d in diagnosticos], [1, 2])
+        self.assertEqual(self.estado.texto(), texto)
+        self.assertEqual(self.estado.diagnosticos(self.compiler), [])
+    
+    def test_edicion_fuera_de_rango(self):
+        """Prueba que las ediciones se comprueban sobre el documento que dejan las anteriores"""
+        total = len(self.estado.lineas)
+        texto = self.estado.texto()
+        
+        with self.assertRaises(ValueError):
+            self.compiler.recompilar(self.estado, [(0, 1, ["# Otro"]), (total, total + 1, [])])
+        self.assertEqual(self.estado.texto(), texto)
+        
+        with self.assertRaises(ValueError):
+            self.estado.comprobar_ediciones([(0, total, []), (0, 2, [])])
+        
+        self.compiler.recompilar(self.estado, [(0, 0, ["# Otro", ""]), (total, total + 2, ["Fin."])])
+        self.assertIgualACompilacionCompleta()
+    
+    def test_tamano(self):
+        """Prueba que el tamaño del estado sigue al texto y al HTML que conserva"""
+        tamano = self.estado.tamano()
+        self.assertGreater(tamano, len(DOCUMENTO))
+        
+        self.compiler.recompilar(self.estado, [(0, 0, ["Texto " * 1000, ""])])
+        # El texto insertado cuenta una vez en las líneas y otra en su párrafo de HTML
+        self.assertGreater(self.estado.tamano(), tamano + 2 * len("Texto " * 1000))
+    
+    def test_nivel_distinto(self):
+        """Prueba que no se puede recompilar con otro nivel de complejidad"""
+        with self.assertRaises(ValueError):
+            Compiler(nivel_complejidad=2).recompilar(self.estado, [(0, 1, ["# Otro"])])
+
+
+if __name__ == '__main__':
+    unittest.main()
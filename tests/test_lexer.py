@@ -2,8 +2,15 @@
 Pruebas unitarias para el lexer de SimpleDoc
 """
 
+import glob
+import io
+import os
 import unittest
 from simpledoc.lexer import Lexer, TokenType
+from simpledoc.parser import Parser
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
 class TestLexer(unittest.TestCase):
@@ -119,5 +126,118 @@ Este es un **párrafo** con *formato*.
         self.assertEqual(tokens[-1].tipo, TokenType.EOF)
 
 
+class TestMotoresLexer(unittest.TestCase):
+    """Pruebas de regresión que comparan el motor de escaneo con el clásico"""
+    
+    CASOS = [
+        "",
+        "\n",
+        "   \n\t\n",
+        "**Nota:** el resto de la línea",
+        "*cursiva* al inicio y **negrita** después",
+        "texto con ** sueltos * y `comillas`",
+        "- **lista** con formato",
+        "12. Elemento numerado",
+        "Ver [enlace](https://ejemplo.com) e ![imagen](/img.png) juntos",
+        "[a|b](https://ejemplo.com/x|y) al inicio",
+        "[a|b](u) y ![x|y](z)",
+        "```codigo``` y más texto",
+        "## Título\n### Subtítulo\n#Sin espacio",
+    ]
+    
+    @staticmethod
+    def _tuplas(tokens):
+        """Convierte los tokens en tuplas comparables, con los campos que lee el parser"""
+        return [(t.tipo, t.valor, t.linea, t.columna, t.texto, t.url, t.numero) for t in tokens]
+    
+    def _comparar(self, texto):
+        """Comprueba que ambos motores producen los mismos tokens en todos los niveles"""
+        for nivel in (1, 2, 3):
+            clasico = Lexer(nivel, engine="clasico").tokenizar(texto)
+            escaner = Lexer(nivel, engine="escaner").tokenizar(texto)
+            self.assertEqual(self._tuplas(escaner), self._tuplas(clasico), f"nivel {nivel}")
+    
+    def test_motores_ejemplos(self):
+        """Prueba ambos motores sobre los documentos de ejemplo"""
+        rutas = glob.glob(os.path.join(RAIZ, "ejemplos", "*.sd")) + [os.path.join(RAIZ, "ejemplo.sd")]
+        self.assertTrue(rutas)
+        
+        for ruta in rutas:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                texto = f.read()
+            with self.subTest(ruta=os.path.basename(ruta)):
+                self._comparar(texto)
+    
+    def test_motores_casos_limite(self):
+        """Prueba ambos motores sobre casos límite de la sintaxis"""
+        for texto in self.CASOS:
+            with self.subTest(texto=texto):
+                self._comparar(texto)
+    
+    def test_token_buffer(self):
+        """Prueba que el TokenBuffer contiene los mismos tokens que la lista"""
+        for texto in self.CASOS:
+            with self.subTest(texto=texto):
+                lista = Lexer().tokenizar(texto)
+                buffer = Lexer().tokenizar_compacto(texto)
+                self.assertEqual(len(buffer), len(lista))
+                self.assertEqual(self._tuplas(buffer), self._tuplas(lista))
+    
+    def test_parsear_token_buffer(self):
+        """Prueba que el Parser consume el TokenBuffer directamente"""
+        texto = "# Título\n\nTexto con **negrita** y [enlace](https://ejemplo.com)"
+        ast_lista = Parser().parsear(Lexer().tokenizar(texto))
+        ast_buffer = Parser().parsear(Lexer().tokenizar_compacto(texto))
+        
+        self.assertEqual([(n.tipo, n.valor) for n in ast_buffer.hijos],
+                         [(n.tipo, n.valor) for n in ast_lista.hijos])
+    
+    def test_iter_tokens(self):
+        """Prueba que el modo streaming produce los mismos tokens que tokenizar"""
+        for texto in self.CASOS:
+            with self.subTest(texto=texto):
+                lista = Lexer().tokenizar(texto)
+                por_lineas = Lexer().iter_tokens(io.StringIO(texto))
+                por_trozos = Lexer().iter_tokens(texto[i:i + 3] for i in range(0, len(texto), 3))
+                por_texto = Lexer().iter_tokens(texto)
+                self.assertEqual(self._tuplas(por_lineas), self._tuplas(lista))
+                self.assertEqual(self._tuplas(por_trozos), self._tuplas(lista))
+                self.assertEqual(self._tuplas(por_texto), self._tuplas(lista))
+    
+    def test_parsear_iterador(self):
+        """Prueba que el Parser consume tokens de un generador"""
+        texto = "# Título\n\n- uno\n- dos\n\n1. **tres**"
+        ast_lista = Parser().parsear(Lexer().tokenizar(texto))
+        ast_iterador = Parser().parsear(Lexer().iter_tokens(io.StringIO(texto)))
+        
+        self.assertEqual([(n.tipo, n.valor, n.linea) for n in ast_iterador.hijos],
+                         [(n.tipo, n.valor, n.linea) for n in ast_lista.hijos])
+    
+    def test_intervalos_del_texto(self):
+        """Prueba que los tokens referencian el texto original y exponen sus campos"""
+        texto = "3. Tercero\nVer [a|b](https://ejemplo.com/x|y)"
+        tokens = Lexer().tokenizar(texto)
+        numerado, enlace = tokens[0], tokens[3]
+        
+        self.assertTrue(all(token.fuente is texto for token in tokens))
+        self.assertEqual((numerado.inicio, numerado.fin), (0, 10))
+        self.assertEqual((numerado.numero, numerado.texto), (3, "Tercero"))
+        self.assertEqual(texto[enlace.inicio:enlace.fin], "a|b](https://ejemplo.com/x|y")
+        self.assertEqual((enlace.texto, enlace.url), ("a|b", "https://ejemplo.com/x|y"))
+    
+    def test_enlace_con_barra(self):
+        """Prueba que la barra vertical se conserva en el texto y la URL de los enlaces"""
+        texto = "Ver [a|b](https://ejemplo.com/x|y) y ![c|d](/img|1.png)"
+        for tokens in (Lexer().tokenizar(texto), Lexer().tokenizar_compacto(texto)):
+            ast = Parser().parsear(tokens)
+            self.assertEqual([(n.valor, n.url) for n in ast.hijos if n.url],
+                             [("a|b", "https://ejemplo.com/x|y"), ("c|d", "/img|1.png")])
+    
+    def test_motor_desconocido(self):
+        """Prueba que un motor desconocido se rechaza"""
+        with self.assertRaises(ValueError):
+            Lexer(engine="otro")
+
+
 if __name__ == "__main__":
     unittest.main()
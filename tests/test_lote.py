@@ -0,0 +1,178 @@
+"""
+Pruebas unitarias para la compilación por lotes de SimpleDoc
+"""
+
+import os
+import tempfile
+import unittest
+from simpledoc.lote import Manifiesto, expandir_entradas, compilar_lote, compilar_lote_incremental
+
+
+class TestLote(unittest.TestCase):
+    """Pruebas para la expansión de entradas y la compilación por lotes"""
+    
+    def setUp(self):
+        """Crea un árbol de documentos temporal"""
+        self.temporal = tempfile.TemporaryDirectory()
+        self.raiz = self.temporal.name
+        self.docs = os.path.join(self.raiz, "docs")
+        os.makedirs(os.path.join(self.docs, "sub"))
+        
+        for ruta, texto in [
+            ("a.sd", "# Documento A\n\nTexto de A."),
+            ("b.sd", "# Documento B\n\n- uno\n- dos"),
+            ("notas.txt", "No es SimpleDoc"),
+            (os.path.join("sub", "c.sd"), "## Documento C"),
+        ]:
+            with open(os.path.join(self.docs, ruta), 'w', encoding='utf-8') as f:
+                f.write(texto)
+    
+    def tearDown(self):
+        self.temporal.cleanup()
+    
+    def test_expandir_directorio(self):
+        """Prueba la expansión de directorios con y sin recursión"""
+        planos = [os.path.basename(e) for e, _ in expandir_entradas([self.docs])]
+        recursivos = [os.path.basename(e) for e, _ in expandir_entradas([self.docs], recursivo=True)]
+        
+        self.assertEqual(planos, ["a.sd", "b.sd"])
+        self.assertEqual(recursivos, ["a.sd", "b.sd", "c.sd"])
+    
+    def test_expandir_glob_sin_duplicados(self):
+        """Prueba los patrones glob y que un archivo no se repite"""
+        patron = os.path.join(self.docs, "*.sd")
+        trabajos = expandir_entradas([patron, os.path.join(self.docs, "a.sd")])
+        
+        self.assertEqual([os.path.basename(e) for e, _ in trabajos], ["a.sd", "b.sd"])
+    
+    def test_directorio_salida_conserva_estructura(self):
+        """Prueba que la salida conserva las rutas relativas a la entrada"""
+        salida = os.path.join(self.raiz, "build")
+        trabajos = dict(expandir_entradas([self.docs], recursivo=True, directorio_salida=salida))
+        
+        self.assertEqual(trabajos[os.path.join(self.docs, "sub", "c.sd")],
+                         os.path.join(salida, "sub", "c.html"))
+    
+    def test_salidas_duplicadas(self):
+        """Prueba que dos entradas con la misma salida se rechazan"""
+        salida = os.path.join(self.raiz, "build")
+        # La misma entrada escrita de dos formas no es un conflicto
+        trabajos = expandir_entradas([os.path.join(self.docs, "a.sd"),
+                                      os.path.join(self.docs, "sub", "..", "a.sd")], directorio_salida=salida)
+        self.assertEqual(len(trabajos), 1)
+        
+        os.makedirs(os.path.join(self.raiz, "otro"))
+        with open(os.path.join(self.raiz, "otro", "a.sd"), 'w', encoding='utf-8') as f:
+            f.write("# Otro A")
+        with self.assertRaises(ValueError):
+            expandir_entradas([os.path.join(self.docs, "a.sd"), os.path.join(self.raiz, "otro", "a.sd")],
+                              directorio_salida=salida)
+        
+        with open(os.path.join(self.docs, "b.simpledoc"), 'w', encoding='utf-8') as f:
+            f.write("# Otro B")
+        with self.assertRaises(ValueError):
+            expandir_entradas([self.docs])
+    
+    def test_compilar_lote_en_paralelo(self):
+        """Prueba que un error en un archivo no interrumpe el lote"""
+        with open(os.path.join(self.docs, "roto.sd"), 'wb') as f:
+            f.write(b"\xff\xfe")
+        
+        salida = os.path.join(self.raiz, "build")
+        trabajos = expandir_entradas([self.docs], recursivo=True, directorio_salida=salida)
+        resultado = compilar_lote(trabajos, jobs=2, tam_trozo=1)
+        
+        self.assertEqual([r.entrada for r in resultado.archivos], [e for e, _ in trabajos])
+        self.assertEqual(resultado.compilados, 3)
+        self.assertEqual([os.path.basename(r.entrada) for r in resultado.errores], ["roto.sd"])
+        self.assertTrue(os.path.isfile(os.path.join(salida, "sub", "c.html")))
+
+    
+    def test_procesos_negativos(self):
+        """Prueba que un número de procesos negativo se rechaza"""
+        trabajos = expandir_entradas([self.docs])
+        with self.assertRaises(ValueError):
+            compilar_lote(trabajos, jobs=-3)
+    
+    def test_compilacion_incremental(self):
+        """Prueba que solo se recompilan los archivos que cambian"""
+        salida = os.path.join(self.raiz, "build")
+        manifiesto = Manifiesto.ruta_por_defecto(salida)
+        
+        def construir(nivel=3, forzar=False):
+            trabajos = expandir_entradas([self.docs], recursivo=True, directorio_salida=salida)
+            return compilar_lote_incremental(trabajos, manifiesto, nivel, forzar)
+        
+        self.assertEqual(construir().compilados, 3)
+        self.assertTrue(os.path.isfile(manifiesto))
+        
+        resultado = construir()
+        self.assertEqual((resultado.compilados, resultado.omitidos), (0, 3))
+        
+        with open(os.path.join(self.docs, "b.sd"), 'a', encoding='utf-8') as f:
+            f.write("\n- tres")
+        resultado = construir()
+        self.assertEqual([os.path.basename(r.entrada) for r in resultado.archivos], ["b.sd"])
+        
+        os.remove(os.path.join(salida, "a.html"))
+        self.assertEqual([os.path.basename(r.entrada) for r in construir().archivos], ["a.sd"])
+        
+        self.assertEqual(construir(nivel=2).compilados, 3)
+        self.assertEqual(construir(nivel=2, forzar=True).compilados, 3)
+    
+    def test_incremental_directorio_salida_sin_normalizar(self):
+        """Prueba que un directorio de salida con ``.`` o ``..`` no recompila todo"""
+        for directorio in (os.path.join(self.raiz, ".", "build"), os.path.join(self.docs, "..", "otro")):
+            with self.subTest(directorio=directorio):
+                manifiesto = Manifiesto.ruta_por_defecto(directorio)
+                trabajos = expandir_entradas([self.docs], recursivo=True, directorio_salida=directorio)
+                self.assertEqual(compilar_lote_incremental(trabajos, manifiesto).compilados, 3)
+                
+                resultado = compilar_lote_incremental(trabajos, manifiesto)
+                self.assertEqual((resultado.compilados, resultado.omitidos), (0, 3))
+    
+    def test_incremental_misma_huella(self):
+        """Prueba que un cambio de fecha sin cambio de contenido no recompila"""
+        salida = os.path.join(self.raiz, "build")
+        manifiesto = Manifiesto.ruta_por_defecto(salida)
+        trabajos = expandir_entradas([self.docs], directorio_salida=salida)
+        compilar_lote_incremental(trabajos, manifiesto)
+        
+        ruta = os.path.join(self.docs, "a.sd")
+        estado = os.stat(ruta)
+        os.utime(ruta, ns=(estado.st_atime_ns, estado.st_mtime_ns + 10**9))
+        
+        self.assertEqual(compilar_lote_incremental(trabajos, manifiesto).compilados, 0)
+    
+    def test_incremental_salida_modificada(self):
+        """Prueba que se recompilan las salidas editadas o truncadas a mano"""
+        salida = os.path.join(self.raiz, "build")
+        manifiesto = Manifiesto.ruta_por_defecto(salida)
+        trabajos = expandir_entradas([self.docs], directorio_salida=salida)
+        compilar_lote_incremental(trabajos, manifiesto)
+        
+        ruta = os.path.join(salida, "a.html")
+        with open(ruta, 'r', encoding='utf-8') as f:
+            original = f.read()
+        
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(original[:10])
+        resultado = compilar_lote_incremental(trabajos, manifiesto)
+        self.assertEqual([os.path.basename(r.entrada) for r in resultado.archivos], ["a.sd"])
+        with open(ruta, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), original)
+        
+        # Misma longitud y misma fecha de antes: solo el hash delata el cambio
+        estado = os.stat(ruta)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write("x" * len(original.encode('utf-8')))
+        os.utime(ruta, ns=(estado.st_atime_ns, estado.st_mtime_ns + 10**9))
+        self.assertEqual(compilar_lote_incremental(trabajos, manifiesto).compilados, 1)
+        
+        # Solo cambia la fecha: no se recompila
+        os.utime(ruta, ns=(estado.st_atime_ns, estado.st_mtime_ns + 2 * 10**9))
+        self.assertEqual(compilar_lote_incremental(trabajos, manifiesto).compilados, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Pruebas unitarias para el informe de memoria de SimpleDoc
+"""
+
+import json
+import tracemalloc
+import unittest
+from simpledoc.cache import CacheLRU
+from simpledoc.compiler import Compiler
+from simpledoc.estadisticas import ETAPAS
+from simpledoc.lexer import Lexer
+from simpledoc.memoria import InformeMemoria
+
+
+TEXTO = "# Título\n\nTexto con **negrita** y [enlace](https://ejemplo.com)\n- uno\n- dos\n" * 200
+
+
+class TestMemoria(unittest.TestCase):
+    """Pruebas para InformeMemoria y Compiler.compilar_con_memoria"""
+    
+    def test_etapas(self):
+        """Prueba que se registra la memoria de cada etapa y los nodos vivos"""
+        html, informe = Compiler().compilar_con_memoria(TEXTO)
+        
+        self.assertEqual(html, Compiler().compilar(TEXTO))
+        self.assertEqual(tuple(informe.etapas), ETAPAS)
+        self.assertFalse(tracemalloc.is_tracing())
+        
+        for memoria in informe.etapas.values():
+            self.assertGreaterEqual(memoria.bytes_pico, memoria.bytes_retenidos)
+        
+        # Los tokens del TokenBuffer se cuentan aunque no existan objetos Token
+        tokens = Lexer().tokenizar_compacto(TEXTO)
+        self.assertGreaterEqual(informe.etapas['lexico'].objetos['Token'], len(tokens))
+        self.assertGreater(len(tokens), 1000)
+        
+        # El AST se construye en el análisis sintáctico y sigue vivo hasta el final
+        self.assertEqual(informe.etapas['lexico'].objetos['ASTNode'], 0)
+        self.assertGreater(informe.etapas['sintactico'].objetos['ASTNode'], 1000)
+        self.assertGreater(informe.etapas['sintactico'].bytes_retenidos, 0)
+        self.assertTrue(any(sitio.archivo.endswith("parser.py") for sitio in informe.etapas['sintactico'].sitios))
+        
+        # El HTML de salida es lo único que queda retenido de la compilación
+        self.assertGreaterEqual(informe.etapas['generacion'].bytes_retenidos, len(html))
+        self.assertGreaterEqual(informe.bytes_pico, informe.etapas['sintactico'].bytes_pico)
+    
+    def test_json_y_resumen(self):
+        """Prueba que el informe se serializa a JSON y se resume en una tabla"""
+        _, informe = Compiler().compilar_con_memoria(TEXTO, limite_sitios=3)
+        
+        datos = json.loads(json.dumps(informe.a_diccionario()))
+        self.assertEqual(list(datos['etapas']), list(ETAPAS))
+        self.assertLessEqual(len(datos['etapas']['sintactico']['sitios']), 3)
+        self.assertIn('ASTNode', datos['etapas']['generacion']['objetos'])
+        
+        resumen = informe.resumen()
+        self.assertIn("sintactico", resumen)
+        self.assertIn("Sitios de reserva", resumen)
+    
+    def test_sin_cache_y_tracemalloc_activo(self):
+        """Prueba que no se usa la caché y que no se detiene un tracemalloc ajeno"""
+        compiler = Compiler(cache=CacheLRU())
+        compiler.compilar(TEXTO)
+        
+        tracemalloc.start()
+        try:
+            _, informe = compiler.compilar_con_memoria(TEXTO)
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+        
+        self.assertEqual(tuple(informe.etapas), ETAPAS)
+    
+    def test_observador(self):
+        """Prueba el informe como observador de las etapas de un compilador"""
+        informe = InformeMemoria()
+        compiler = Compiler(al_iniciar_etapa=informe.al_iniciar_etapa,
+                            al_completar_etapa=informe.al_completar_etapa)
+        
+        informe.iniciar()
+        compiler.compilar(TEXTO)
+        informe.detener()
+        
+        self.assertEqual(tuple(informe.etapas), ETAPAS)
+        self.assertFalse(tracemalloc.is_tracing())
+
+
+if __name__ == '__main__':
+    unittest.main()
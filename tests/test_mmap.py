@@ -0,0 +1,93 @@
+"""
+Pruebas unitarias para la compilación de archivos proyectados en memoria
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+from simpledoc import compiler as modulo_compiler
+from simpledoc.cache import CacheLRU
+from simpledoc.compiler import Compiler
+from simpledoc.exceptions import ValidationError
+from simpledoc.lexer import Lexer
+
+
+class TestEntradaMapeada(unittest.TestCase):
+    """Pruebas para Compiler.compilar_archivo con mmap y Lexer.iter_tokens_binario"""
+    
+    CASOS = [
+        b"",
+        b"# T\xc3\xadtulo\r\n\r\nTexto con **negrita** y *cursiva*\r\n",
+        b"- uno\r- dos\r\r1. tres\r2. cuatro",
+        b"\xef\xbb\xbfVer [a|b](https://ejemplo.com/x|y) y ![c](/img.png)\n",
+        b"```c\xc3\xb3digo``` y m\xc3\xa1s\n\x1c\n\xc2\x85texto\n## Fin\n",
+    ]
+    
+    def setUp(self):
+        """Configuración para las pruebas"""
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+    
+    def _escribir(self, datos):
+        """Escribe los bytes en un archivo temporal y devuelve su ruta"""
+        ruta = os.path.join(self.directorio.name, "entrada.sd")
+        with open(ruta, 'wb') as f:
+            f.write(datos)
+        return ruta
+    
+    def _compilar(self, ruta, mapear):
+        """Compila el archivo y devuelve el HTML escrito"""
+        salida = Compiler(nivel_complejidad=3).compilar_archivo(ruta, mapear=mapear)
+        with open(salida, 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    def test_tokens_binarios(self):
+        """Prueba que el análisis de bytes produce los mismos tokens que el de texto"""
+        for datos in self.CASOS:
+            texto = datos.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+            with self.subTest(datos=datos):
+                binarios = list(Lexer().iter_tokens_binario(datos))
+                esperados = list(Lexer().iter_tokens(texto))
+                self.assertEqual([(t.tipo, t.valor, t.texto, t.url, t.numero, t.linea, t.columna) for t in binarios],
+                                 [(t.tipo, t.valor, t.texto, t.url, t.numero, t.linea, t.columna) for t in esperados])
+    
+    def test_mapeado_igual_a_lectura(self):
+        """Prueba que compilar con mmap produce el mismo HTML que leer el archivo"""
+        for datos in self.CASOS:
+            with self.subTest(datos=datos):
+                ruta = self._escribir(datos)
+                self.assertEqual(self._compilar(ruta, mapear=True), self._compilar(ruta, mapear=False))
+    
+    def test_error_no_deja_archivos(self):
+        """Prueba que un error de validación no deja salida ni archivos temporales"""
+        ruta = self._escribir(b"# T\xc3\xadtulo\n[Mal](ftp://ejemplo.com)\n")
+        
+        with self.assertRaises(ValidationError):
+            Compiler(nivel_complejidad=3).compilar_archivo(ruta, mapear=True)
+        
+        self.assertEqual(os.listdir(self.directorio.name), ["entrada.sd"])
+
+    
+    def test_mapeo_automatico(self):
+        """Prueba que el mapeo automático no se salta la caché ni el modo de depuración"""
+        ruta = self._escribir(self.CASOS[1])
+        
+        with mock.patch.object(modulo_compiler, 'UMBRAL_MAPEO', 0), \
+                mock.patch.object(Compiler, '_compilar_mapeado', autospec=True) as mapeado:
+            Compiler().compilar_archivo(ruta)
+            self.assertEqual(mapeado.call_count, 1)
+            
+            cache = CacheLRU()
+            Compiler(cache=cache).compilar_archivo(ruta)
+            self.assertEqual(len(cache), 1)
+            
+            with contextlib.redirect_stdout(io.StringIO()) as salida:
+                Compiler(modo_debug=True).compilar_archivo(ruta)
+            self.assertIn("--- HTML generado ---", salida.getvalue())
+            self.assertEqual(mapeado.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
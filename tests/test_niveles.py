@@ -0,0 +1,50 @@
+"""
+Pruebas unitarias para los elementos admitidos en cada nivel de complejidad
+"""
+
+import unittest
+from simpledoc.compiler import Compiler
+from simpledoc.lexer import TokenType
+from simpledoc.parser import ASTNode, Parser, TipoNodo
+
+
+class TestNiveles(unittest.TestCase):
+    """Pruebas para las tablas de despacho de cada nivel"""
+    
+    def _tipos(self, texto, nivel):
+        """Devuelve los tipos de los nodos de primer nivel del texto"""
+        compiler = Compiler(nivel_complejidad=nivel)
+        return [nodo.tipo for nodo in compiler.parser.parsear(compiler.lexer.tokenizar(texto)).hijos]
+    
+    def test_elementos_nivel_3(self):
+        """Prueba que el nivel 3 conserva enlaces, imágenes y bloques de código"""
+        texto = "Ver [Enlace](https://ejemplo.com) y ![Imagen](/a.png)\n```codigo```"
+        self.assertEqual(self._tipos(texto, 3),
+                         ["TEXTO", "ENLACE", "TEXTO", "IMAGEN", "SALTO_LINEA", "CODIGO_BLOQUE"])
+        self.assertEqual(self._tipos(texto, 2), ["TEXTO", "SALTO_LINEA", "TEXTO"])
+        
+        html = Compiler(nivel_complejidad=3).compilar(texto)
+        self.assertIn('<a href="https://ejemplo.com">Enlace</a>', html)
+        self.assertIn('<img src="/a.png" alt="Imagen">', html)
+        self.assertIn('<pre><code>codigo</code></pre>', html)
+    
+    def test_elementos_de_nivel_superior(self):
+        """Prueba que los tokens de un nivel superior se saltan"""
+        parser = Parser(nivel_complejidad=1)
+        self.assertIs(parser.manejadores[TokenType.NEGRITA_INICIO], parser.manejadores[TokenType.EOF])
+        self.assertIsNot(Parser(nivel_complejidad=2).manejadores[TokenType.NEGRITA_INICIO],
+                         parser.manejadores[TokenType.EOF])
+    
+    def test_tipo_nodo(self):
+        """Prueba que los tipos de nodo se comparan como cadenas y tienen un código denso"""
+        self.assertEqual(ASTNode("TITULO1", "Título").tipo, TipoNodo.TITULO1)
+        self.assertEqual(TipoNodo.TITULO1, "TITULO1")
+        self.assertEqual(f"{TipoNodo.TITULO1}", "TITULO1")
+        self.assertEqual(sorted(tipo.codigo for tipo in TipoNodo), list(range(len(TipoNodo))))
+        
+        with self.assertRaises(ValueError):
+            ASTNode("DESCONOCIDO")
+
+
+if __name__ == '__main__':
+    unittest.main()
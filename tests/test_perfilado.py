@@ -0,0 +1,99 @@
+"""
+Pruebas unitarias para el perfilado por etapas de SimpleDoc
+"""
+
+import os
+import pstats
+import re
+import tempfile
+import unittest
+from simpledoc.compiler import Compiler
+from simpledoc.estadisticas import ETAPAS
+from simpledoc.lote import compilar_lote
+from simpledoc.perfilado import OTROS, PerfilEtapas
+
+
+TEXTO = "# Título\n\nTexto con **negrita** y [enlace](https://ejemplo.com)\n- uno\n- dos\n" * 50
+
+
+def perfilar(texto, perfil=None):
+    """Compila un texto perfilando sus etapas y devuelve el perfil"""
+    perfil = perfil or PerfilEtapas()
+    compiler = Compiler(al_iniciar_etapa=perfil.al_iniciar_etapa, al_completar_etapa=perfil.al_completar_etapa)
+    perfil.iniciar()
+    compiler.compilar(texto)
+    perfil.detener()
+    return perfil
+
+
+class TestPerfilado(unittest.TestCase):
+    """Pruebas para PerfilEtapas y el perfilado de compilaciones por lotes"""
+    
+    def setUp(self):
+        """Crea un directorio temporal"""
+        self.temporal = tempfile.TemporaryDirectory()
+        self.raiz = self.temporal.name
+    
+    def tearDown(self):
+        self.temporal.cleanup()
+    
+    def test_perfil_por_etapa(self):
+        """Prueba que cada etapa tiene su perfil con las funciones de su componente"""
+        funciones = perfilar(TEXTO).funciones(limite=50)
+        
+        self.assertTrue(set(ETAPAS) <= set(funciones))
+        self.assertTrue(any('tokenizar_compacto' in f['funcion'] for f in funciones['lexico']))
+        self.assertTrue(any('parsear' in f['funcion'] for f in funciones['sintactico']))
+        self.assertTrue(any('generar' in f['funcion'] for f in funciones['generacion']))
+        self.assertFalse(any('tokenizar_compacto' in f['funcion'] for f in funciones['generacion']))
+    
+    def test_guardar(self):
+        """Prueba que se escriben un archivo de pstats y las pilas colapsadas"""
+        ruta, ruta_pilas = perfilar(TEXTO).guardar(os.path.join(self.raiz, "salida.prof"))
+        
+        self.assertEqual(ruta_pilas, os.path.join(self.raiz, "salida.collapsed"))
+        nombres = [nombre for _, _, nombre in pstats.Stats(ruta).stats]
+        self.assertTrue(any(nombre.endswith("[sintactico]") for nombre in nombres))
+        
+        with open(ruta_pilas, encoding='utf-8') as f:
+            lineas = f.read().splitlines()
+        self.assertTrue(lineas)
+        for linea in lineas:
+            self.assertRegex(linea, r"^\S[^;]*;.* \d+$")
+            self.assertIn(linea.split(";", 1)[0], ETAPAS + (OTROS,))
+    
+    def test_agregar(self):
+        """Prueba que los perfiles de varias compilaciones se acumulan"""
+        uno = perfilar(TEXTO)
+        llamadas = {f['funcion']: f['llamadas'] for f in uno.funciones(limite=100)['sintactico']}
+        
+        total = PerfilEtapas()
+        total.agregar(uno.datos())
+        total.agregar(perfilar(TEXTO).datos())
+        acumuladas = {f['funcion']: f['llamadas'] for f in total.funciones(limite=100)['sintactico']}
+        
+        parsear = next(nombre for nombre in llamadas if re.match(r"parsear \(", nombre))
+        self.assertEqual(acumuladas[parsear], 2 * llamadas[parsear])
+    
+    def test_lote(self):
+        """Prueba que el perfil de un lote incluye los archivos de todos los procesos"""
+        trabajos = []
+        for nombre in ("a", "b", "c"):
+            entrada = os.path.join(self.raiz, f"{nombre}.sd")
+            with open(entrada, 'w', encoding='utf-8') as f:
+                f.write(TEXTO)
+            trabajos.append((entrada, os.path.join(self.raiz, f"{nombre}.html")))
+        
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                perfil = PerfilEtapas()
+                resultado = compilar_lote(trabajos, jobs=jobs, tam_trozo=1, perfil=perfil)
+                
+                self.assertEqual(resultado.compilados, 3)
+                funciones = perfil.funciones(limite=100)
+                parsear = [f for f in funciones['sintactico'] if re.match(r"parsear \(parser", f['funcion'])]
+                self.assertEqual(parsear[0]['llamadas'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
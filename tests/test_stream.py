@@ -0,0 +1,74 @@
+"""
+Pruebas unitarias para la compilación en streaming de SimpleDoc
+"""
+
+import glob
+import io
+import os
+import unittest
+from simpledoc.compiler import Compiler
+from simpledoc.exceptions import ValidationError
+from simpledoc.parser import ASTNode
+from simpledoc.validator import Validator
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestCompilacionStream(unittest.TestCase):
+    """Pruebas para Compiler.compilar_stream"""
+    
+    def _compilar_stream(self, texto, nivel=3):
+        """Compila el texto en streaming y devuelve el HTML escrito"""
+        salida = io.StringIO()
+        Compiler(nivel_complejidad=nivel).compilar_stream(io.StringIO(texto), salida)
+        return salida.getvalue()
+    
+    def test_stream_igual_a_compilar(self):
+        """Prueba que el streaming produce el mismo HTML que compilar"""
+        rutas = glob.glob(os.path.join(RAIZ, "ejemplos", "*.sd")) + [os.path.join(RAIZ, "ejemplo.sd")]
+        
+        for ruta in rutas:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                texto = f.read()
+            for nivel in (1, 2, 3):
+                with self.subTest(ruta=os.path.basename(ruta), nivel=nivel):
+                    self.assertEqual(self._compilar_stream(texto, nivel),
+                                     Compiler(nivel_complejidad=nivel).compilar(texto))
+    
+    def test_stream_parrafos_y_listas(self):
+        """Prueba la agrupación de párrafos y listas entre bloques"""
+        texto = "Uno\ndos\n\n\ntres\n- a\n- b\n1. c\n2. d\n# Fin\n"
+        self.assertEqual(self._compilar_stream(texto), Compiler().compilar(texto))
+    
+    def test_stream_escribe_por_bloques(self):
+        """Prueba que cada bloque se escribe en cuanto se cierra"""
+        escrituras = []
+        
+        class Salida:
+            def write(self, texto):
+                escrituras.append(texto)
+        
+        lineas = iter(["# Título\n", "Párrafo\n", "\n", "- elemento\n"])
+        Compiler().compilar_stream(lineas, Salida())
+        
+        self.assertTrue(escrituras[0].startswith("<!DOCTYPE html>"))
+        self.assertIn("<h1>Título</h1>\n", escrituras)
+        self.assertIn("<p>Párrafo</p>\n", escrituras)
+    
+    def test_validar_bloques(self):
+        """Prueba la validación en streaming de nodos consecutivos"""
+        primero = ASTNode("LISTA_NUM_ITEM", "uno", linea=1)
+        primero.numero = 1
+        tercero = ASTNode("LISTA_NUM_ITEM", "tres", linea=2)
+        tercero.numero = 3
+        
+        with self.assertRaises(ValidationError):
+            list(Validator().validar_bloques(iter([primero, tercero])))
+        
+        with self.assertRaises(ValidationError):
+            list(Validator().validar_bloques(iter([])))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Pruebas unitarias para el registro de reglas del validador de SimpleDoc
+"""
+
+import unittest
+from simpledoc.parser import ASTNode
+from simpledoc.validator import Validator
+from simpledoc.exceptions import ValidationError
+
+
+class TestReglasValidator(unittest.TestCase):
+    """Pruebas para el recorrido único del validador"""
+    
+    def test_reglas_por_nivel(self):
+        """Prueba que cada nivel solo registra sus reglas"""
+        self.assertNotIn("NEGRITA", Validator(nivel_complejidad=1).visitantes)
+        self.assertIn("NEGRITA", Validator(nivel_complejidad=2).visitantes)
+        self.assertNotIn("ENLACE", Validator(nivel_complejidad=2).visitantes)
+        self.assertIn("ENLACE", Validator(nivel_complejidad=3).visitantes)
+    
+    def test_anidamiento_profundo(self):
+        """Prueba que el recorrido no está limitado por la profundidad de recursión"""
+        raiz = ASTNode("DOCUMENTO")
+        nodo = raiz
+        for i in range(20000):
+            hijo = ASTNode("NEGRITA" if i % 2 else "CURSIVA", linea=1)
+            nodo.add_hijo(hijo)
+            nodo = hijo
+        nodo.add_hijo(ASTNode("TEXTO", "fondo", linea=1))
+        
+        self.assertTrue(Validator().validar(raiz))
+    
+    def test_error_en_orden_del_documento(self):
+        """Prueba que se informa del primer error en orden del documento"""
+        raiz = ASTNode("DOCUMENTO")
+        enlace = ASTNode("ENLACE", "enlace", linea=1)
+        enlace.url = "ftp://ejemplo.com"
+        raiz.add_hijo(enlace)
+        raiz.add_hijo(ASTNode("NEGRITA", linea=2))
+        
+        with self.assertRaises(ValidationError) as contexto:
+            Validator().validar(raiz)
+        self.assertEqual(contexto.exception.line_number, 1)
+
+    
+    def _documento_con_errores(self):
+        """Construye un documento con varios errores de validación"""
+        raiz = ASTNode("DOCUMENTO")
+        for linea, url in enumerate(["ftp://a", "https://b", "ftp://c", "ftp://d"], start=1):
+            enlace = ASTNode("ENLACE", "enlace", linea=linea)
+            enlace.url = url
+            raiz.add_hijo(enlace)
+        raiz.add_hijo(ASTNode("CURSIVA", linea=5))
+        return raiz
+    
+    def test_collect_todos_los_diagnosticos(self):
+        """Prueba que el modo collect recoge todos los errores en un recorrido"""
+        diagnosticos = Validator().validar(self._documento_con_errores(), collect=True)
+        
+        self.assertEqual([d.linea for d in diagnosticos], [1, 3, 4, 5])
+        self.assertEqual([d.regla for d in diagnosticos],
+                         ["url-enlace", "url-enlace", "url-enlace", "formato-vacio"])
+        self.assertEqual(diagnosticos[-1].tipo, "CURSIVA")
+        self.assertEqual(diagnosticos[-1].mensaje, "CURSIVA sin contenido")
+    
+    def test_collect_limite(self):
+        """Prueba que el modo collect respeta el límite de diagnósticos"""
+        diagnosticos = Validator().validar(self._documento_con_errores(), collect=True, limite=2)
+        self.assertEqual(len(diagnosticos), 2)
+    
+    def test_collect_documento_valido(self):
+        """Prueba que un documento válido no produce diagnósticos"""
+        raiz = ASTNode("DOCUMENTO")
+        raiz.add_hijo(ASTNode("TEXTO", "texto", linea=1))
+        self.assertEqual(Validator().validar(raiz, collect=True), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
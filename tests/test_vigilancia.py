@@ -0,0 +1,63 @@
+"""
+Pruebas unitarias para la recompilación automática de SimpleDoc
+"""
+
+import os
+import tempfile
+import unittest
+from simpledoc.vigilancia import Vigilante
+
+
+class TestVigilancia(unittest.TestCase):
+    """Pruebas para la detección de cambios por sondeo"""
+    
+    def setUp(self):
+        """Crea un directorio con dos documentos"""
+        self.temporal = tempfile.TemporaryDirectory()
+        self.docs = self.temporal.name
+        self.salida = os.path.join(self.docs, "build")
+        self.escribir("a.sd", "# Documento A")
+        self.escribir("b.sd", "# Documento B")
+        self.vigilante = Vigilante(self.docs, self.salida, usar_inotify=False)
+    
+    def tearDown(self):
+        self.temporal.cleanup()
+    
+    def escribir(self, nombre, texto, desplazamiento_ns=0):
+        """Escribe un documento, adelantando su fecha para que el cambio sea visible"""
+        ruta = os.path.join(self.docs, nombre)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(texto)
+        if desplazamiento_ns:
+            estado = os.stat(ruta)
+            os.utime(ruta, ns=(estado.st_atime_ns, estado.st_mtime_ns + desplazamiento_ns))
+        return ruta
+    
+    def test_solo_recompila_los_cambiados(self):
+        """Prueba que solo se recompilan los archivos modificados o nuevos"""
+        self.assertEqual(self.vigilante._cambios_sondeo(), [])
+        
+        modificado = self.escribir("a.sd", "# Documento A editado", 10**9)
+        nuevo = self.escribir("c.sd", "## Documento C")
+        cambios = self.vigilante._cambios_sondeo()
+        self.assertEqual(sorted(cambios), [modificado, nuevo])
+        
+        resultados = self.vigilante.recompilar(cambios)
+        self.assertTrue(all(r.error is None for r in resultados))
+        with open(os.path.join(self.salida, "a.html"), encoding='utf-8') as f:
+            self.assertIn("Documento A editado", f.read())
+        self.assertFalse(os.path.exists(os.path.join(self.salida, "b.html")))
+    
+    def test_error_no_detiene_la_vigilancia(self):
+        """Prueba que un archivo inválido se informa como error"""
+        ruta = os.path.join(self.docs, "a.sd")
+        with open(ruta, 'wb') as f:
+            f.write(b"\xff\xfe")
+        
+        resultados = self.vigilante.recompilar([ruta])
+        self.assertIsNotNone(resultados[0].error)
+        self.assertGreaterEqual(resultados[0].latencia, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
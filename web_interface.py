@@ -1,21 +1,41 @@
 
 
+import io
+import json
 import os
+import secrets
+import threading
+from collections import OrderedDict
 from flask import Flask, render_template, request, flash, jsonify
-from simpledoc.compiler import Compiler
-from simpledoc.exceptions import SimpleDocError
-from simpledoc.lexer import Lexer
-from simpledoc.parser import Parser
-from simpledoc.validator import Validator
-from simpledoc.html_generator import HTMLGenerator
-from simpledoc.ast_generator import ASTGenerator
+from simpledoc.cache import CacheLRU
+from simpledoc.compiler import Compiler, RegistroCompiladores
+from simpledoc.estadisticas import CompileStats
+from simpledoc.exceptions import SimpleDocError, ValidationError
+from simpledoc.html_generator import CABECERA_HTML, PIE_HTML
+from simpledoc.perfilado import PerfilEtapas
 
 # Crear la aplicación Flask
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "simpledoc_secret_key")
 
-# Compilador por defecto (nivel de complejidad 3)
-default_compiler = Compiler(nivel_complejidad=3)
+# Caché compartida por todas las compilaciones de la aplicación
+cache_compilacion = CacheLRU(max_bytes=int(os.environ.get("SIMPLEDOC_CACHE_BYTES", 64 * 1024 * 1024)))
+
+# Estados de compilación incremental de los documentos abiertos en el editor,
+# limitados en número y en tamaño total (según EstadoCompilacion.tamano)
+MAX_ESTADOS_INCREMENTALES = int(os.environ.get("SIMPLEDOC_MAX_ESTADOS", 256))
+MAX_BYTES_ESTADOS = int(os.environ.get("SIMPLEDOC_MAX_BYTES_ESTADOS", 64 * 1024 * 1024))
+estados_incrementales = OrderedDict()
+tamanos_estados = {}
+cerrojo_estados = threading.Lock()
+
+# Compiladores compartidos por todas las peticiones, uno por nivel de complejidad
+compiladores = RegistroCompiladores(cache=cache_compilacion)
+
+# Perfilado de compilaciones bajo petición; está desactivado salvo que se
+# habilite, porque cada compilación perfilada es varias veces más lenta
+app.config['SIMPLEDOC_PERFILADO'] = os.environ.get("SIMPLEDOC_PERFILADO") == "1"
+cerrojo_perfilado = threading.Lock()
 
 
 @app.route('/')
@@ -29,6 +49,12 @@ def compilar():
     """
     Compila el código SimpleDoc enviado y devuelve el HTML generado
     
+    Con ``estadisticas=true``, la respuesta del modo normal incluye el tiempo
+    de cada etapa y los contadores de la compilación. Con ``perfil=true``, si
+    el perfilado está habilitado en la configuración (SIMPLEDOC_PERFILADO),
+    incluye también las funciones más costosas de cada etapa según cProfile
+    y las pilas colapsadas para dibujar un flame graph.
+    
     Returns:
         JSON con el resultado de la compilación
     """
@@ -36,17 +62,69 @@ def compilar():
     codigo = request.form.get('codigo', '')
     nivel_complejidad = int(request.form.get('nivel_complejidad', 3))
     modo_detallado = request.form.get('modo_detallado', 'false') == 'true'
+    modo_incremental = request.form.get('incremental', 'false') == 'true'
+    con_estadisticas = request.form.get('estadisticas', 'false') == 'true'
+    con_perfil = request.form.get('perfil', 'false') == 'true'
     
     try:
-        if not modo_detallado:
+        if modo_incremental and not modo_detallado:
+            # Modo incremental: conservar el estado para recompilar solo las ediciones
+            compiler = compiladores.obtener(nivel_complejidad)
+            try:
+                estado = compiler.compilar_incremental(codigo)
+            except ValidationError as e:
+                # La compilación incremental se detiene en el primer error; se recogen todos para el editor
+                return respuesta_diagnosticos(e, compiler.compilar_con_diagnosticos(codigo)[1])
+            documento_id = guardar_estado_incremental(estado)
+            
+            return jsonify({
+                'success': True,
+                'html': estado.html(),
+                'mensaje': 'Compilación exitosa',
+                'documento_id': documento_id,
+                'fragmentos': estado.fragmentos,
+                'cierre': estado.cierre,
+                'cabecera': CABECERA_HTML,
+                'pie': PIE_HTML,
+                'detalles': None
+            })
+        
+        elif not modo_detallado:
             # Modo normal: usar el compilador directamente
-            compiler = Compiler(nivel_complejidad=nivel_complejidad)
-            html_generado = compiler.compilar(codigo)
+            estadisticas = CompileStats() if con_estadisticas else None
+            perfil = None
+            if con_perfil:
+                if not app.config['SIMPLEDOC_PERFILADO']:
+                    return jsonify({
+                        'success': False,
+                        'error': 'El perfilado no está habilitado en este servidor (SIMPLEDOC_PERFILADO=1)',
+                        'mensaje': 'Perfilado no disponible',
+                        'detalles': None
+                    })
+                html_generado, diagnosticos, perfil = compilar_perfilado(codigo, nivel_complejidad, estadisticas)
+            else:
+                compiler = compiladores.obtener(nivel_complejidad)
+                html_generado, diagnosticos = compiler.compilar_con_diagnosticos(codigo, estadisticas=estadisticas)
+            estadisticas = estadisticas.a_diccionario() if estadisticas is not None else None
+            
+            if diagnosticos:
+                return jsonify({
+                    'success': False,
+                    'error': str(diagnosticos[0]),
+                    'mensaje': 'Error de compilación',
+                    'diagnosticos': [d.a_diccionario() for d in diagnosticos],
+                    'estadisticas': estadisticas,
+                    'perfil': perfil,
+                    'detalles': None
+                })
             
             return jsonify({
                 'success': True,
                 'html': html_generado,
                 'mensaje': 'Compilación exitosa',
+                'diagnosticos': [],
+                'estadisticas': estadisticas,
+                'perfil': perfil,
                 'detalles': None
             })
         else:
@@ -69,6 +147,222 @@ def compilar():
         })
 
 
+def compilar_perfilado(codigo, nivel_complejidad, estadisticas=None):
+    """
+    Compila el código perfilando cada etapa con cProfile
+    
+    Se usa un compilador sin caché, para perfilar siempre la compilación
+    completa, y solo se perfila una compilación a la vez, porque el perfil de
+    cProfile no distingue entre peticiones.
+    
+    Args:
+        codigo: Código SimpleDoc
+        nivel_complejidad: Nivel de complejidad del compilador (1-3)
+        estadisticas: CompileStats opcional que se rellena con las medidas
+    
+    Returns:
+        Tupla (html, diagnosticos, perfil); perfil es un diccionario con las
+        funciones más costosas de cada etapa y las pilas colapsadas
+    
+    Raises:
+        SimpleDocError: Si ya se está perfilando otra compilación
+    """
+    if not cerrojo_perfilado.acquire(blocking=False):
+        raise SimpleDocError("Ya se está perfilando otra compilación; inténtalo de nuevo más tarde")
+    
+    try:
+        perfil = PerfilEtapas()
+        compiler = Compiler(nivel_complejidad, al_iniciar_etapa=perfil.al_iniciar_etapa,
+                            al_completar_etapa=perfil.al_completar_etapa)
+        perfil.iniciar()
+        try:
+            html_generado, diagnosticos = compiler.compilar_con_diagnosticos(codigo, estadisticas=estadisticas)
+        finally:
+            perfil.detener()
+        
+        return html_generado, diagnosticos, {
+            'funciones': perfil.funciones(),
+            'colapsado': perfil.pilas_colapsadas()
+        }
+    finally:
+        cerrojo_perfilado.release()
+
+
+@app.route('/recompilar', methods=['POST'])
+def recompilar():
+    """
+    Recompila un documento abierto aplicando solo las líneas editadas
+    
+    Espera el identificador devuelto por /compilar en modo incremental y una
+    lista JSON de ediciones [inicio, fin, nuevas_lineas].
+    
+    Returns:
+        JSON con los cambios en los fragmentos de HTML
+    """
+    documento_id = request.form.get('documento_id', '')
+    
+    with cerrojo_estados:
+        entrada = estados_incrementales.get(documento_id)
+        if entrada is not None:
+            estados_incrementales.move_to_end(documento_id)
+    
+    if entrada is None:
+        return jsonify({
+            'success': False,
+            'error': 'El documento ya no está disponible para recompilación incremental',
+            'mensaje': 'Estado no encontrado',
+            'estado_perdido': True
+        })
+    
+    estado, cerrojo = entrada
+    
+    try:
+        ediciones = json.loads(request.form.get('ediciones', '[]'))
+    except ValueError:
+        ediciones = None
+    if not ediciones_validas(ediciones):
+        return jsonify({
+            'success': False,
+            'error': 'Las ediciones deben ser una lista de [inicio, fin, [líneas]] con inicio y fin enteros',
+            'mensaje': 'Petición no válida'
+        }), 400
+    
+    try:
+        with cerrojo:
+            try:
+                estado.comprobar_ediciones(ediciones)
+            except ValueError as e:
+                # El editor y el servidor ya no ven el mismo documento: debe compilarlo completo
+                return jsonify({
+                    'success': False,
+                    'error': str(e),
+                    'mensaje': 'Petición no válida',
+                    'estado_perdido': True
+                }), 400
+            
+            compiler = compiladores.obtener(estado.nivel_complejidad)
+            cambios = []
+            # Se aplican de una en una porque el estado conserva las ediciones
+            # anteriores a un error, y los diagnósticos deben partir de ellas
+            try:
+                for indice, edicion in enumerate(ediciones):
+                    try:
+                        cambios.extend(compiler.recompilar(estado, [edicion]))
+                    except ValidationError as e:
+                        return respuesta_diagnosticos(e, estado.diagnosticos(compiler, ediciones[indice:]))
+            finally:
+                actualizar_tamano_estado(documento_id, estado)
+        
+        return jsonify({
+            'success': True,
+            'mensaje': 'Recompilación exitosa',
+            'cambios': cambios
+        })
+        
+    except (SimpleDocError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'mensaje': 'Error de compilación'
+        })
+
+
+def ediciones_validas(ediciones):
+    """
+    Comprueba que unas ediciones recibidas en JSON tienen la forma [[inicio, fin, [líneas]], ...]
+    
+    Args:
+        ediciones: Valor decodificado del JSON
+    
+    Returns:
+        True si cada edición tiene dos enteros y una lista de cadenas
+    """
+    if not isinstance(ediciones, list):
+        return False
+    
+    for edicion in ediciones:
+        if not isinstance(edicion, list) or len(edicion) != 3:
+            return False
+        inicio, fin, lineas = edicion
+        if not all(isinstance(n, int) and not isinstance(n, bool) for n in (inicio, fin)):
+            return False
+        if not isinstance(lineas, list) or not all(isinstance(linea, str) for linea in lineas):
+            return False
+    return True
+
+
+def respuesta_diagnosticos(error, diagnosticos):
+    """
+    Devuelve la respuesta de error de una compilación incremental con todos sus diagnósticos
+    
+    Args:
+        error: Primer ValidationError encontrado por la compilación incremental
+        diagnosticos: Diagnósticos de validación de todo el documento
+    
+    Returns:
+        JSON con el error y la lista de diagnósticos
+    """
+    return jsonify({
+        'success': False,
+        'error': str(diagnosticos[0]) if diagnosticos else str(error),
+        'mensaje': 'Error de compilación',
+        'diagnosticos': [d.a_diccionario() for d in diagnosticos],
+        'detalles': None
+    })
+
+
+def guardar_estado_incremental(estado):
+    """
+    Guarda el estado de un documento y desaloja los menos usados si hay demasiados
+    
+    Args:
+        estado: EstadoCompilacion del documento
+        
+    Returns:
+        Identificador del documento, o None si el documento es demasiado
+        grande para conservarlo
+    """
+    tamano = estado.tamano()
+    if tamano > MAX_BYTES_ESTADOS:
+        return None
+    
+    documento_id = secrets.token_hex(16)
+    
+    with cerrojo_estados:
+        estados_incrementales[documento_id] = (estado, threading.Lock())
+        tamanos_estados[documento_id] = tamano
+        desalojar_estados()
+    
+    return documento_id
+
+
+def actualizar_tamano_estado(documento_id, estado):
+    """
+    Anota el tamaño de un estado tras recompilarlo y desaloja otros si hace falta
+    
+    Args:
+        documento_id: Identificador del documento
+        estado: EstadoCompilacion del documento, ya modificado
+    """
+    tamano = estado.tamano()
+    
+    with cerrojo_estados:
+        entrada = estados_incrementales.get(documento_id)
+        if entrada is None or entrada[0] is not estado:
+            return
+        tamanos_estados[documento_id] = tamano
+        desalojar_estados()
+
+
+def desalojar_estados():
+    """Desaloja los estados menos usados hasta cumplir los límites (con cerrojo_estados adquirido)"""
+    total = sum(tamanos_estados.values())
+    while estados_incrementales and (len(estados_incrementales) > MAX_ESTADOS_INCREMENTALES
+                                     or total > MAX_BYTES_ESTADOS):
+        documento_id, _ = estados_incrementales.popitem(last=False)
+        total -= tamanos_estados.pop(documento_id)
+
+
 def procesar_detallado(codigo, nivel_complejidad):
     """
     Procesa el código SimpleDoc mostrando cada etapa del proceso de compilación
@@ -80,9 +374,10 @@ def procesar_detallado(codigo, nivel_complejidad):
     Returns:
         Diccionario con detalles de cada etapa
     """
+    compiler = compiladores.obtener(nivel_complejidad)
+    
     # 1. Análisis léxico (tokenización)
-    lexer = Lexer(nivel_complejidad)
-    tokens = lexer.tokenizar(codigo)
+    tokens = compiler.lexer.tokenizar(codigo)
     
     # Formatear tokens para mostrar
     tokens_formateados = []
@@ -100,38 +395,29 @@ def procesar_detallado(codigo, nivel_complejidad):
     }
     
     # 2. Análisis sintáctico (generación del AST)
-    parser = Parser(nivel_complejidad)
-    ast = parser.parsear(tokens)
-    
-    # Formatear AST para mostrar (capturando la salida de imprimir_ast)
-    import io
-    import sys
-    ast_generator = ASTGenerator(nivel_complejidad)
+    ast = compiler.parser.parsear(tokens)
     
-    # Capturar la salida de la función imprimir_ast
-    stdout_original = sys.stdout
+    # Formatear AST para mostrar (escribiendo la salida de imprimir_ast en un
+    # buffer propio, sin tocar sys.stdout, que comparten todos los hilos)
     string_io = io.StringIO()
-    sys.stdout = string_io
-    
-    ast_generator.imprimir_ast(ast)
-    
-    # Restaurar stdout y obtener el texto capturado
-    sys.stdout = stdout_original
+    compiler.ast_generator.imprimir_ast(ast, salida=string_io)
     ast_texto = string_io.getvalue()
     
     # 3. Validación del documento
-    validator = Validator(nivel_complejidad)
+    diagnosticos = []
     try:
-        validator.validar(ast)
-        validacion_exitosa = True
-        validacion_mensaje = "El documento es válido."
+        diagnosticos = compiler.validator.validar(ast, collect=True)
+        validacion_exitosa = not diagnosticos
+        if validacion_exitosa:
+            validacion_mensaje = "El documento es válido."
+        else:
+            validacion_mensaje = "\n".join(str(d) for d in diagnosticos)
     except Exception as e:
         validacion_exitosa = False
         validacion_mensaje = str(e)
     
     # 4. Generación de código HTML
-    generator = HTMLGenerator(nivel_complejidad)
-    html = generator.generar(ast)
+    html = compiler.html_generator.generar(ast)
     
     # Devolver todos los detalles
     return {
@@ -139,7 +425,8 @@ def procesar_detallado(codigo, nivel_complejidad):
         'ast': ast_texto,
         'validacion': {
             'exitosa': validacion_exitosa,
-            'mensaje': validacion_mensaje
+            'mensaje': validacion_mensaje,
+            'diagnosticos': [d.a_diccionario() for d in diagnosticos]
         },
         'html': html
     }
@@ -214,7 +501,7 @@ function ejemplo() {
     
     # Compilar la documentación usando el compilador
     try:
-        html = default_compiler.compilar(doc_simpledoc)
+        html = compiladores.obtener(3).compilar(doc_simpledoc)
         return html
     except Exception as e:
         return f"<p>Error al generar la documentación: {str(e)}</p>"